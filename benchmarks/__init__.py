@@ -0,0 +1 @@
+"""Benchmarks for nseapi, run with ``python -m benchmarks.<name>``."""
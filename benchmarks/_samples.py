@@ -0,0 +1,78 @@
+"""Valid constructor arguments for every command class in ``nseapi.commands``."""
+
+from nseapi.commands import CACHE_UPDATE, network, pms, radius, subscriber
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+SAMPLES = {
+    CACHE_UPDATE: ((MAC,), {}),
+    network.SET_BANDWIDTH_UP: ((MAC, 1024), {}),
+    network.SET_BANDWIDTH_DOWN: ((), {"subscriber": MAC, "bandwidth_down": 4096}),
+    network.SET_BANDWIDTH_MAX_UP: ((), {"subscriber": MAC, "bandwidth_max_up": 2048}),
+    network.SET_BANDWIDTH_MAX_DOWN: (
+        (),
+        {"subscriber": MAC, "bandwidth_max_down": 8192},
+    ),
+    radius.LOGIN: (("guest", "s3cr3t&<pass>", MAC), {"portal_sub_id": "abc-123"}),
+    radius.LOGOUT: (("guest", MAC), {}),
+    subscriber.ADD_USER: (
+        (MAC,),
+        {
+            "user_name": "guest",
+            "password": {"VALUE": "secret", "ENCRYPT": False},
+            "room_number": "1204",
+            "expiry_time": {"VALUE": 24, "UNITS": "HOURS"},
+            "bandwidth_max_down": 8192,
+            "bandwidth_max_up": 2048,
+            "payment_method": "ROOM_OPEN",
+        },
+    ),
+    subscriber.ADD_DEVICE: (
+        (MAC, "Lobby printer"),
+        {"ip_addr": "10.0.0.12", "vlan": 12, "proxy_arp": True},
+    ),
+    subscriber.ADD_GROUP: (
+        (MAC,),
+        {
+            "user_name": "conference",
+            "password": "secret",
+            "expiry_time": {"VALUE": 3, "UNITS": "DAYS"},
+            "group_users_max": 200,
+        },
+    ),
+    subscriber.ADD_ACCESS_CODE: (
+        (MAC,),
+        {
+            "user_name": "CODE1234",
+            "expiry_time": {"VALUE": 2, "UNITS": "HOURS"},
+            "valid_until": "2026-12-31T23:59",
+        },
+    ),
+    subscriber.USER_DELETE: ((MAC,), {}),
+    subscriber.DEVICE_DELETE: ((MAC,), {}),
+    subscriber.USER_QUERY: (("guest",), {"id_type": "USER_NAME"}),
+    subscriber.USER_AUTHORIZE: ((MAC,), {}),
+    subscriber.SUBSCRIBER_QUERY_CURRENT: ((MAC,), {}),
+    subscriber.SUBSCRIBER_QUERY_AUTH: ((), {"mac_addr": MAC}),
+    pms.USER_PAYMENT: (
+        ("guest", "secret", "1204", MAC, "RES42"),
+        {
+            "payment": 9.99,
+            "trans_id": 1001,
+            "expiry_time": {"VALUE": 1, "UNITS": "DAYS"},
+        },
+    ),
+    pms.USER_PURCHASE: (
+        ("1204", "MOVIE", "Pay-per-view <HD>", 9.0, 0.99, 9.99, "Jane Doe", "RES42"),
+        {"trans_id": 1002},
+    ),
+    pms.PMS_PENDING_TRANSACTION: (("PS|RN1204|TA999",), {"transaction_id": 7}),
+    pms.ROOM_SET_ACCESS: (("1204", "ROOM_OPEN"), {}),
+    pms.ROOM_QUERY_ACCESS: (("1204",), {}),
+}
+
+
+def build(cls):
+    """A new, valid instance of the command class ``cls``."""
+    args, kwargs = SAMPLES[cls]
+    return cls(*args, **kwargs)
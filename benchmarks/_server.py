@@ -0,0 +1,12 @@
+from contextlib import contextmanager
+
+from nseapi.testing import StubNSE
+
+OK = b'<?xml version="1.0" encoding="utf-8"?>\n<USG RESULT="OK"></USG>'
+
+
+@contextmanager
+def stand_in_nse():
+    """Run a local stand-in NSE answering every command with RESULT=OK."""
+    with StubNSE(OK, record=False) as server:
+        yield server.server_address
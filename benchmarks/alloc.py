@@ -0,0 +1,91 @@
+"""
+Memory allocated per round trip: the former ``http.client`` transport
+against the buffer-reusing ``nseapi.transport.Connection``.
+
+    python -m benchmarks.alloc [--requests N]
+
+For every call the peak of :mod:`tracemalloc` above the memory in use
+before it is recorded, which counts the short-lived buffers and objects
+a round trip goes through even though they are freed right after.
+"""
+
+import argparse
+import http.client
+import time
+import tracemalloc
+
+from benchmarks._server import stand_in_nse
+from nseapi.commands import CACHE_UPDATE
+from nseapi.transport import Connection, ConnectionPool, request_head
+
+BODY = CACHE_UPDATE("00:1A:2B:3C:4D:5E").to_bytes()
+
+
+def legacy(host, port):
+    """``ConnectionPool`` round trip as it was, through ``http.client``."""
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+
+    def call():
+        conn.request(
+            "POST", ConnectionPool.path, body=BODY, headers=ConnectionPool.headers
+        )
+        rsp = conn.getresponse()
+        return rsp.read()
+
+    return call, conn.close
+
+
+def current(host, port):
+    head = request_head(host, port, ConnectionPool.path, ConnectionPool.headers)
+    conn = Connection(host, port, 5, head)
+
+    def call():
+        conn.send(BODY)
+        return conn.read_response()[2]
+
+    return call, conn.close
+
+
+def measure(call, requests):
+    """Mean bytes allocated at peak per call, and mean microseconds per call."""
+    for _ in range(100):
+        call()
+    start = time.perf_counter()
+    for _ in range(requests):
+        call()
+    elapsed = time.perf_counter() - start
+    peaks = 0
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call()
+            peaks += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return peaks / requests, elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with stand_in_nse() as (host, port):
+        results = {}
+        for name, factory in (("http.client", legacy), ("Connection", current)):
+            call, close = factory(host, port)
+            try:
+                results[name] = measure(call, args.requests)
+            finally:
+                close()
+    print(f"{'transport':<16}{'bytes/call':>12}{'us/call':>10}")
+    for name, (size, usec) in results.items():
+        print(f"{name:<16}{size:>12.0f}{usec:>10.1f}")
+    (old, _), (new, _) = results.values()
+    print(f"{old / new:.1f}x fewer bytes allocated per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Response decoding cost: the former ``xmltodict.parse`` path against the
+bytes decoder of ``nseapi.response``.
+
+    python -m benchmarks.decode [--number N]
+"""
+
+import argparse
+import timeit
+
+import xmltodict
+
+from nseapi import exceptions as nse_err
+from nseapi.response import decode
+
+RESPONSES = {
+    "ok": b'<?xml version="1.0" encoding="UTF-8"?>\n<USG RESULT="OK" ID="1204"/>',
+    "error": b'<USG RESULT="ERROR" ERROR_NUM="204" ERROR_DESC="User name already used"/>',
+    "room": (
+        b'<USG RESULT="OK"><ROOM_NUMBER>1204</ROOM_NUMBER>'
+        b"<ACCESS_MODE>ROOM_OPEN</ACCESS_MODE></USG>"
+    ),
+    "subscriber": (
+        b'<?xml version="1.0" encoding="UTF-8"?>\n<USG RESULT="OK">'
+        b'<SUBSCRIBER MAC_ADDR="001A2B3C4D5E"><USER_NAME>guest</USER_NAME>'
+        b"<ROOM_NUMBER>1204</ROOM_NUMBER>"
+        b'<EXPIRY_TIME UNITS="SECONDS">86400</EXPIRY_TIME>'
+        b"<BANDWIDTH_MAX_UP>2048</BANDWIDTH_MAX_UP>"
+        b"<BANDWIDTH_MAX_DOWN>8192</BANDWIDTH_MAX_DOWN></SUBSCRIBER></USG>"
+    ),
+}
+
+
+def legacy_decode(rsp):
+    """``Device._parse`` as it was before the bytes decoder."""
+    data = xmltodict.parse(rsp.decode("utf-8")).get("USG")
+    if data["@RESULT"] == "ERROR":
+        raise nse_err.USGError("Execute request failed", data)
+    return data
+
+
+def _call(fn, rsp):
+    try:
+        return fn(rsp)
+    except nse_err.USGError as e:
+        return e.error_num
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'response':<16}{'xmltodict (us)':>16}{'decode (us)':>14}{'speedup':>10}")
+    for name, rsp in RESPONSES.items():
+        assert _call(legacy_decode, rsp) == _call(decode, rsp)
+        old = timeit.timeit(lambda: _call(legacy_decode, rsp), number=args.number)
+        new = timeit.timeit(lambda: _call(decode, rsp), number=args.number)
+        print(
+            f"{name:<16}{old / args.number * 1e6:>16.2f}"
+            f"{new / args.number * 1e6:>14.2f}{old / new:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Throughput and tail latency of ``Device.execute`` against a simulated NSE.
+
+    python -m benchmarks.loadtest [--requests N] [--threads N] [--latency S]
+        [--jitter S] [--error-rate R] [--max-concurrency N]
+
+Each thread adds a subscriber, queries it and deletes it again, so the
+commands hit the subscriber table of :class:`nseapi.testing.FakeNSE` the
+way a captive portal would.
+"""
+
+import argparse
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.suite import percentile
+from nseapi import exceptions as nse_err
+from nseapi.commands import subscriber
+from nseapi.device import Device
+from nseapi.testing import FakeNSE
+from nseapi.types import MACAddress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--jitter", type=float, default=0.008)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    macs = itertools.count(0x001A2B000000)
+    latencies = []
+    errors = []
+
+    def call(i):
+        mac = MACAddress(next(macs))
+        commands = (
+            subscriber.ADD_USER(mac, user_name=f"guest{i}"),
+            subscriber.SUBSCRIBER_QUERY_CURRENT(mac),
+            subscriber.USER_DELETE(str(mac)),
+        )
+        for cmd in commands:
+            start = time.perf_counter_ns()
+            try:
+                dev.execute(cmd)
+            except nse_err.USGError as e:
+                errors.append(e.error_num)
+            latencies.append(time.perf_counter_ns() - start)
+
+    nse = FakeNSE(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency,
+    )
+    with nse, Device("127.0.0.1", port=nse.port, pool_size=args.threads) as dev:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(call, range(args.requests // 3)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{len(latencies)} commands in {elapsed:.2f}s: "
+        f"{len(latencies) / elapsed:.0f} req/s, "
+        f"p50 {percentile(latencies, 50) / 1e6:.2f} ms, "
+        f"p99 {percentile(latencies, 99) / 1e6:.2f} ms, "
+        f"{len(errors)} USG errors"
+    )
+
+
+if __name__ == "__main__":
+    main()
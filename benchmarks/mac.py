@@ -0,0 +1,77 @@
+"""
+Memory and parse time of a MAC-keyed subscriber index: the former
+string-and-segments ``MACAddress`` against the int-backed one, and
+one-by-one parsing against ``MACAddress.parse_many``.
+
+    python -m benchmarks.mac [--count N]
+"""
+
+import argparse
+import re
+import time
+import tracemalloc
+
+from nseapi.types import MACAddress
+
+
+class LegacyMACAddress:
+    """``MACAddress`` as it was before it was int-backed (and unhashable)."""
+
+    _regex = re.compile(r"^([0-9A-Fa-f]{2}([-:]?)){5}([0-9A-Fa-f]{2})$")
+
+    def __init__(self, addr):
+        if not self._regex.match(addr):
+            raise ValueError("Not a valid MAC address")
+        self._addr = addr.upper().replace(":", "").replace("-", "")
+        self._segments = [self._addr[i : i + 2] for i in range(0, 12, 2)]
+
+
+def addresses(count):
+    return [
+        ":".join("%02X" % b for b in (i + 0x001A2B000000).to_bytes(6, "big"))
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del index
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    raw = addresses(args.count)
+    # the legacy objects are unhashable, so they had to be keyed by string
+    old_size, old_time = measure(
+        lambda: {m._addr: m for m in map(LegacyMACAddress, raw)}
+    )
+    new_size, new_time = measure(lambda: {MACAddress(a): i for i, a in enumerate(raw)})
+    print(
+        f"{args.count} MACs: legacy {old_size / 2**20:.0f} MiB in {old_time:.2f}s, "
+        f"int-backed {new_size / 2**20:.0f} MiB in {new_time:.2f}s "
+        f"({new_size / old_size:.0%} of the memory)"
+    )
+
+    start = time.perf_counter()
+    [MACAddress(a) for a in raw]
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    MACAddress.parse_many(raw)
+    many = time.perf_counter() - start
+    print(
+        f"{args.count} MACs: one by one {single:.2f}s, "
+        f"parse_many {many:.2f}s ({single / many:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Requests/sec of ``Device.execute`` with and without connection pooling.
+
+    python -m benchmarks.pool [--requests N] [--threads N]
+"""
+
+import argparse
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import xmltodict
+
+from benchmarks._server import stand_in_nse
+from nseapi.commands import CACHE_UPDATE
+from nseapi.device import Device
+
+BODY = CACHE_UPDATE("00:1A:2B:3C:4D:5E").to_bytes()
+
+
+def unpooled(host, port):
+    """The pre-pool transport: one ``urlopen`` (and TCP handshake) per call."""
+    req = urllib.request.Request(
+        f"http://{host}:{port}/usg/command.xml",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        method="POST",
+    )
+
+    def call():
+        with urllib.request.urlopen(req, data=BODY, timeout=5) as rsp:
+            return xmltodict.parse(rsp.read().decode("utf-8"))["USG"]
+
+    return call
+
+
+def pooled(dev):
+    def call():
+        return dev.execute(BODY)
+
+    return call
+
+
+def run(call, requests, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(requests):
+            call()
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(lambda _: call(), range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with stand_in_nse() as (host, port):
+        with Device(host, port=port, pool_size=args.threads) as dev:
+            for threads in sorted({1, args.threads}):
+                without = run(unpooled(host, port), args.requests, threads)
+                with_ = run(pooled(dev), args.requests, threads)
+                print(
+                    f"threads={threads:<3} without pool: {without:8.0f} req/s   "
+                    f"with pool: {with_:8.0f} req/s   ({with_ / without:.1f}x)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Serialization cost per command class: the former per-call
+``xmltodict.unparse`` path against the compiled serializer.
+
+    python -m benchmarks.serialize [--number N]
+"""
+
+import argparse
+import timeit
+
+import xmltodict
+
+from benchmarks._samples import SAMPLES, build
+
+
+def legacy_to_bytes(cmd):
+    """``Command.to_xml()`` as it was before specs were compiled, plus encoding."""
+    usg_dict = {"@COMMAND": cmd._type}
+    for key, spec in cmd._spec.get("attributes", {}).items():
+        if key in cmd._input_data:
+            usg_dict[f"@{key}"] = str(cmd._input_data[key])
+        elif "value" in spec:
+            usg_dict[f"@{key}"] = str(spec["value"])
+
+    for key in cmd._spec.get("elements", {}):
+        if key in cmd._input_data:
+            element_value = cmd._input_data[key]
+            if isinstance(element_value, dict):
+                element_dict = {"#text": str(element_value.get("VALUE", ""))}
+                for attr_key, attr_value in element_value.items():
+                    if attr_key != "VALUE":
+                        element_dict[f"@{attr_key}"] = str(attr_value)
+                usg_dict[key] = element_dict
+            else:
+                usg_dict[key] = str(element_value)
+    return xmltodict.unparse({"USG": usg_dict}, pretty=True).encode("utf-8")
+
+
+def compiled_to_bytes(cmd):
+    return cmd._layout.serialize(cmd._values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'command':<24}{'xmltodict (us)':>16}{'compiled (us)':>16}{'speedup':>10}")
+    for cls in SAMPLES:
+        cmd = build(cls)
+        cmd.validate()
+        assert xmltodict.parse(legacy_to_bytes(cmd)) == xmltodict.parse(
+            compiled_to_bytes(cmd)
+        )
+        old = timeit.timeit(lambda: legacy_to_bytes(cmd), number=args.number)
+        new = timeit.timeit(lambda: compiled_to_bytes(cmd), number=args.number)
+        print(
+            f"{cls._type:<24}{old / args.number * 1e6:>16.2f}"
+            f"{new / args.number * 1e6:>16.2f}{old / new:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
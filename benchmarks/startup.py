@@ -0,0 +1,57 @@
+"""
+Cold import time of ``nseapi.commands``, lazy against every command module.
+
+    python -m benchmarks.startup [--runs N]
+
+Each run is a fresh interpreter started with ``-X importtime``; the
+median of the cumulative times it reports for the ``nseapi`` modules is
+printed.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+CASES = {
+    "nseapi.commands": "import nseapi.commands",
+    "+ all commands": (
+        "import nseapi.commands.radius, nseapi.commands.subscriber, "
+        "nseapi.commands.pms, nseapi.commands.network"
+    ),
+    "nseapi.device": "import nseapi.device",
+}
+
+
+def import_time(code):
+    """Microseconds spent importing the top-level ``nseapi`` modules."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # top-level entries only: nested ones are part of their importer
+        if name.startswith(" nseapi"):
+            total += int(cumulative)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'import':<20}{'median (ms)':>12}")
+    for name, code in CASES.items():
+        times = [import_time(code) for _ in range(args.runs)]
+        print(f"{name:<20}{statistics.median(times) / 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark suite of the command, decoding and transport paths, saved as
+JSON to compare runs against each other.
+
+    python -m benchmarks.suite [--quick] [--group NAME ...] [--output FILE]
+                               [--compare BASELINE] [--threshold 0.1]
+
+Measures, for every command class in ``nseapi.commands``, construction,
+validation and ``to_xml``; ``MACAddress`` parsing; response decoding of
+representative payloads; and ``Device.execute`` throughput and p50/p99
+latency against a local stand-in NSE.
+
+Per-operation timings are the best of several repeats, which is the
+figure least disturbed by other load on the machine. With ``--compare``,
+the results are checked against an earlier run and the command exits
+with status 1 if any got worse by more than ``--threshold`` (10%).
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._samples import SAMPLES, build
+from benchmarks._server import stand_in_nse
+from benchmarks.decode import RESPONSES
+from nseapi.commands import CACHE_UPDATE
+from nseapi.device import Device
+from nseapi.response import decode
+from nseapi.types import MACAddress, _parse_mac
+
+FORMAT = 1  # of the JSON results; bumped when they stop being comparable
+
+# units whose larger values are better; the others are durations
+HIGHER_IS_BETTER = {"req/s"}
+
+
+def per_op(fn, number, repeat=5):
+    """Best nanoseconds per call of ``fn`` over ``repeat`` runs of ``number``."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e9
+
+
+def bench_commands(scale):
+    number = int(2000 * scale)
+    for cls in SAMPLES:
+        args, kwargs = SAMPLES[cls]
+        cmd = build(cls)
+        yield f"construct/{cls._type}", per_op(lambda: cls(*args, **kwargs), number)
+        # validation of a fresh command converts its input; of a validated
+        # one, it only checks the converted values again
+        yield f"validate/{cls._type}", per_op(lambda: build(cls).validate(), number)
+        yield f"to_xml/{cls._type}", per_op(cmd.to_xml, number)
+
+
+def bench_mac(scale):
+    number = int(10000 * scale)
+    raw = [
+        ":".join("%02X" % b for b in (i + 0x001A2B000000).to_bytes(6, "big"))
+        for i in range(number)
+    ]
+
+    def parse_cold():
+        _parse_mac.cache_clear()
+        for addr in raw:
+            MACAddress(addr)
+
+    def parse_many():
+        _parse_mac.cache_clear()
+        MACAddress.parse_many(raw)
+
+    yield "mac/parse", per_op(parse_cold, 1) / number
+    yield "mac/parse_cached", per_op(lambda: MACAddress(raw[0]), number)
+    yield "mac/parse_many", per_op(parse_many, 1) / number
+
+
+def bench_decode(scale):
+    number = int(5000 * scale)
+
+    def call(rsp):
+        try:
+            decode(rsp)
+        except Exception:  # the error payload raises USGError
+            pass
+
+    for name, rsp in RESPONSES.items():
+        yield f"decode/{name}", per_op(lambda: call(rsp), number)
+
+
+def bench_execute(scale, threads=(1, 8)):
+    requests = int(1000 * scale)
+    body = CACHE_UPDATE("00:1A:2B:3C:4D:5E")
+    with stand_in_nse() as (host, port):
+        for count in threads:
+            with Device(host, port=port, pool_size=count) as dev:
+                for _ in range(50):
+                    dev.execute(body)
+                latencies = []
+
+                def call(_):
+                    start = time.perf_counter_ns()
+                    dev.execute(body)
+                    latencies.append(time.perf_counter_ns() - start)
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(count) as pool:
+                    list(pool.map(call, range(requests)))
+                elapsed = time.perf_counter() - start
+            latencies.sort()
+            yield f"execute/threads={count}/throughput", requests / elapsed
+            yield f"execute/threads={count}/p50", percentile(latencies, 50) / 1000
+            yield f"execute/threads={count}/p99", percentile(latencies, 99) / 1000
+
+
+def percentile(ordered, q):
+    """The ``q``-th percentile of a sorted list, nearest rank."""
+    index = max(0, -(-len(ordered) * q // 100) - 1)
+    return ordered[int(index)]
+
+
+BENCHMARKS = (
+    # (group, function, unit of its values)
+    ("commands", bench_commands, "ns"),
+    ("mac", bench_mac, "ns"),
+    ("decode", bench_decode, "ns"),
+    ("execute", bench_execute, None),
+)
+
+
+def _unit(name, unit):
+    if unit is not None:
+        return unit
+    return "req/s" if name.endswith("/throughput") else "us"
+
+
+def run(scale=1, groups=None):
+    """``{name: {"value": float, "unit": str}}`` of the benchmarks run."""
+    results = {}
+    for group, fn, unit in BENCHMARKS:
+        if groups and group not in groups:
+            continue
+        for name, value in fn(scale):
+            results[name] = {"value": round(value, 1), "unit": _unit(name, unit)}
+            print(f"{name:<48}{value:>14.1f} {results[name]['unit']}", flush=True)
+    return results
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results):
+    """The JSON document of a run, with what is needed to compare it."""
+    return {
+        "format": FORMAT,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(baseline, results, threshold):
+    """
+    Print the change of every result also in ``baseline``.
+
+    :returns: the names of the results worse than the baseline by more
+      than ``threshold``
+    """
+    if baseline.get("format") != FORMAT:
+        raise SystemExit("baseline was saved by an incompatible suite version")
+    regressions = []
+    print(f"\n{'benchmark':<48}{'baseline':>12}{'now':>12}{'change':>9}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None or old["unit"] != result["unit"] or not old["value"]:
+            continue
+        change = result["value"] / old["value"] - 1
+        if result["unit"] in HIGHER_IS_BETTER:
+            change = -change
+        worse = change > threshold
+        if worse:
+            regressions.append(name)
+        print(
+            f"{name:<48}{old['value']:>12.1f}{result['value']:>12.1f}"
+            f"{change:>+8.0%}{' !' if worse else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations")
+    parser.add_argument(
+        "--group",
+        action="append",
+        choices=[group for group, _, _ in BENCHMARKS],
+        help="run only this group of benchmarks (repeatable)",
+    )
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = run(scale=1 if not args.quick else 0.2, groups=args.group)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report(results), f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import threading
+import time
+
+from nseapi import exceptions as nse_err
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a gateway is down, for use as ``Device(breaker=...)``.
+
+    After ``failure_threshold`` consecutive connection failures the breaker
+    opens and every command fails at once with :class:`CircuitOpenError`.
+    Once ``reset_timeout`` has passed it half-opens: a single command is let
+    through to test the gateway, closing the breaker if it succeeds and
+    opening it again otherwise.
+
+    :param int failure_threshold: consecutive failures that open the breaker
+    :param float reset_timeout: seconds the breaker stays open
+
+    :class:`USGError` answers show that the gateway is up and count as
+    successes.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = None
+        self._lock = threading.Lock()
+        # counters
+        self.opened = 0
+        self.rejected = 0
+
+    def __repr__(self):
+        return "CircuitBreaker(%s)" % self.state
+
+    @property
+    def state(self):
+        """``"closed"``, ``"open"`` or ``"half-open"``."""
+        with self._lock:
+            if self._state == OPEN and self._expired():
+                return HALF_OPEN
+            return self._state
+
+    def stats(self):
+        """Current state and counters, for monitoring."""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+    def before_call(self, dev):
+        """Raise :class:`CircuitOpenError` if ``dev`` must not be tried now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            now = time.monotonic()
+            if self._state == OPEN and self._expired():
+                self._state = HALF_OPEN
+            # half-open: one probe at a time; a probe that never reported
+            # back (e.g. cancelled) is replaced after the reset timeout
+            if self._state == HALF_OPEN and (
+                self._probe_at is None or now - self._probe_at > self.reset_timeout
+            ):
+                self._probe_at = now
+                return
+            self.rejected += 1
+        raise nse_err.CircuitOpenError(dev, "gateway marked down")
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_at = None
+
+    def reset(self):
+        """Close the breaker, e.g. after the gateway was fixed."""
+        self.record_success()
+
+    def _expired(self):
+        return time.monotonic() - self._opened_at >= self.reset_timeout
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from nseapi.types import MACAddress
+
+# seconds a response stays fresh, per cacheable (read-only) command type
+DEFAULT_TTLS = {
+    "SUBSCRIBER_QUERY_CURRENT": 5,
+    "SUBSCRIBER_QUERY_AUTH": 5,
+    "USER_QUERY": 5,
+    "ROOM_QUERY_ACCESS": 10,
+}
+
+_MAC_FIELDS = ("MAC_ADDR", "SUBSCRIBER", "SUB_MAC_ADDR", "MAC_ADDRESS")
+_USER_FIELDS = ("USER_NAME", "SUB_USER_NAME")
+
+
+def _mac_key(value):
+    try:
+        return ("MAC", int(MACAddress(value)))
+    except (TypeError, ValueError):
+        return ("MAC", str(value).upper())
+
+
+def command_keys(command):
+    """
+    The subscribers and rooms a command is about, as ``("MAC", int)``,
+    ``("USER_NAME", str)`` and ``("ROOM", str)`` keys.
+    """
+    data = command._input_data
+    keys = set()
+    for field in _MAC_FIELDS:
+        if field in data:
+            keys.add(_mac_key(data[field]))
+    for field in _USER_FIELDS:
+        if field in data:
+            keys.add(("USER_NAME", str(data[field])))
+    if "ROOM_NUMBER" in data:
+        keys.add(("ROOM", str(data["ROOM_NUMBER"])))
+    user = data.get("USER")
+    if isinstance(user, dict):
+        if str(user.get("ID_TYPE", "")).upper() == "MAC_ADDR":
+            keys.add(_mac_key(user.get("VALUE")))
+        else:
+            keys.add(("USER_NAME", str(user.get("VALUE"))))
+    return keys
+
+
+def response_keys(value):
+    """
+    The subscribers and rooms a decoded response is about, as keys like
+    those of :func:`command_keys`: the MAC addresses, user names and room
+    numbers among its attributes and elements, at any depth.
+    """
+    keys = set()
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, Mapping):
+            continue
+        for field, item in node.items():
+            if isinstance(item, (Mapping, list)):
+                stack.append(item)
+                item = item.get("#text") if isinstance(item, Mapping) else None
+            if item is None:
+                continue
+            field = field.lstrip("@")
+            if field in _MAC_FIELDS:
+                keys.add(_mac_key(item))
+            elif field in _USER_FIELDS:
+                keys.add(("USER_NAME", str(item)))
+            elif field == "ROOM_NUMBER":
+                keys.add(("ROOM", str(item)))
+    return keys
+
+
+class ResponseCache:
+    """
+    LRU cache of NSE query responses, for use as ``Device(cache=...)``.
+
+    Only the command types with a TTL are cached; any other command that
+    goes through the same device drops the cached responses about the same
+    MAC address, user name or room, and keeps a query in flight at the same
+    time from caching its possibly older response. A response is about the
+    keys of its query (see :func:`command_keys`) and those found in it (see
+    :func:`response_keys`), so a query by user name is dropped by a
+    command sent by MAC address for the same subscriber.
+
+    :param dict ttl: seconds a response stays fresh, per command type;
+      merged over :data:`DEFAULT_TTLS`, a TTL of 0 disables caching
+    :param int maxsize: maximum number of cached responses
+    :param int max_bytes: maximum total size of the cached responses, as
+      received from the NSE
+
+    Cached responses are shared between callers and must not be modified.
+    """
+
+    def __init__(self, ttl=None, maxsize=1024, max_bytes=1 << 20):
+        self.ttl = {**DEFAULT_TTLS, **(ttl or {})}
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires, value, size, tags)
+        self._tags = {}  # tag -> keys
+        self._bytes = 0
+        # generations: a clock counting invalidations, the clock at which
+        # each recently invalidated tag was last invalidated, and the clock
+        # of the most recent invalidation forgotten to bound that dict
+        self._clock = 0
+        self._invalidated = OrderedDict()  # tag -> clock
+        self._floor = 0
+        self._lock = threading.Lock()
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __repr__(self):
+        return "ResponseCache(%d entries, %d bytes)" % (len(self._entries), self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters and current size, for monitoring."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def key(self, command, body):
+        """Cache key of ``command``, ``None`` if its type is not cached."""
+        if self.ttl.get(command._type):
+            return command._type, body
+        return None
+
+    def get(self, key):
+        """The fresh cached response for ``key``, or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def generation(self):
+        """
+        The current generation, to take before fetching a response and pass
+        to :meth:`put` with it.
+        """
+        with self._lock:
+            return self._clock
+
+    def put(self, key, command, value, size, generation=None):
+        """
+        Cache ``value``, the response to ``command``, of ``size`` bytes.
+
+        :param int generation: :meth:`generation` taken before the response
+          was fetched; the response is not cached if a command about the
+          same keys invalidated them since, as it may predate that command
+        """
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl[key[0]]
+        tags = command_keys(command) | response_keys(value)
+        with self._lock:
+            if generation is not None and self._outdated(tags, generation):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, value, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, command):
+        """Drop the cached responses about the same keys as ``command``."""
+        self.invalidate_keys(command_keys(command))
+
+    def invalidate_keys(self, tags):
+        """
+        Drop the cached responses about any of ``tags``, keys as returned by
+        :func:`command_keys`, for a command sent as raw bytes.
+        """
+        with self._lock:
+            self._clock += 1
+            for tag in tags:
+                self._invalidated[tag] = self._clock
+                self._invalidated.move_to_end(tag)
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+            while len(self._invalidated) > 4 * self.maxsize:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+            self._clock += 1
+            self._invalidated.clear()
+            self._floor = self._clock
+
+    def _outdated(self, tags, generation):
+        """Whether any of ``tags`` was invalidated after ``generation``."""
+        if self._floor > generation:
+            return True
+        return any(self._invalidated.get(tag, 0) > generation for tag in tags)
+
+    def _remove(self, key):
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
@@ -1,11 +1,24 @@
+import importlib
+
 from nseapi.types import MACAddress, BaseCommand
-from . import radius
-from . import subscriber
-from . import pms
-from . import network
 
 __all__ = ["radius", "subscriber", "pms", "network", "CACHE_UPDATE"]
 
+# command modules, imported the first time they are used
+_SUBMODULES = ("radius", "subscriber", "pms", "network")
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f"{__name__}.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
+
 
 class CACHE_UPDATE(BaseCommand):
     """
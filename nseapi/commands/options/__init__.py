@@ -1,3 +1,5 @@
+import datetime
+
 from nseapi.types import FixedList, MACAddress
 
 _bandwidth = {
@@ -22,3 +24,20 @@ _expiry_time = {
         "Expiry time. UNITS attribute: Either SECONDS, MINUTES, HOURS or DAYS"
     ),
 }
+
+# response schemas: typed fields of the answer, see nseapi.results
+_subscriber_info = {
+    "MAC_ADDR": MACAddress,
+    "USER_NAME": str,
+    "ROOM_NUMBER": str,
+    "EXPIRY_TIME": datetime.timedelta,
+    "BANDWIDTH_UP": int,
+    "BANDWIDTH_DOWN": int,
+    "BANDWIDTH_MAX_UP": int,
+    "BANDWIDTH_MAX_DOWN": int,
+    "PLAN": int,
+    "PAYMENT": int,
+    "PAYMENT_METHOD": str,
+    "CLASS_NAME": str,
+    "QOS_POLICY": str,
+}
@@ -240,3 +240,6 @@ ROOM_QUERY_ACCESS = "ROOM_QUERY_ACCESS", {
         },
     },
 }
+
+# response schemas, see nseapi.results
+ROOM_QUERY_ACCESS_RESPONSE = {"ROOM_NUMBER": str, "ACCESS_MODE": str}
@@ -1,6 +1,6 @@
 import ipaddress
 from nseapi.types import Char, FixedList, MACAddress
-from nseapi.commands.options import _expiry_time, _subscriber
+from nseapi.commands.options import _expiry_time, _subscriber, _subscriber_info
 
 _ADD = {
     "BANDWIDTH_MAX_DOWN": {
@@ -348,3 +348,8 @@ SUBSCRIBER_QUERY_AUTH = "SUBSCRIBER_QUERY_AUTH", {
 USER_AUTHORIZE = "USER_AUTHORIZE", {
     "attributes": {"MAC_ADDR": {"required": True, **_subscriber}}
 }
+
+# response schemas, see nseapi.results
+USER_QUERY_RESPONSE = _subscriber_info
+SUBSCRIBER_QUERY_CURRENT_RESPONSE = _subscriber_info
+SUBSCRIBER_QUERY_AUTH_RESPONSE = _subscriber_info
@@ -144,6 +144,8 @@ class ROOM_QUERY_ACCESS(BaseCommand):
     """
 
     _type, _spec, *_ = spec.ROOM_QUERY_ACCESS
+    _response = spec.ROOM_QUERY_ACCESS_RESPONSE
+    _readonly = True
 
     def __init__(self, room_number: str):
         self._transform(ROOM_NUMBER=room_number)  # pragma: no cover
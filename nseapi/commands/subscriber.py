@@ -1,7 +1,18 @@
 from nseapi.types import MACAddress, BaseCommand
 from nseapi.commands.options import subscriber as spec
 
-__all__ = ["ADD_USER", "ADD_DEVICE", "ADD_GROUP", "ADD_ACCESS_CODE"]
+__all__ = [
+    "ADD_USER",
+    "ADD_DEVICE",
+    "ADD_GROUP",
+    "ADD_ACCESS_CODE",
+    "USER_DELETE",
+    "DEVICE_DELETE",
+    "USER_QUERY",
+    "USER_AUTHORIZE",
+    "SUBSCRIBER_QUERY_CURRENT",
+    "SUBSCRIBER_QUERY_AUTH",
+]
 
 
 class ADD_USER(BaseCommand):
@@ -108,3 +119,98 @@ class ADD_ACCESS_CODE(BaseCommand):
 
     def __init__(self, mac_addr: MACAddress, *args, **kwargs):
         self._transform(MAC_ADDR=mac_addr, *args, **kwargs)  # pragma: no cover
+
+
+class USER_DELETE(BaseCommand):
+    """
+    Deletes a subscriber from the NSE's MAC authorization table.
+
+    Kwargs:
+        - user: Subscriber's MAC address or username
+        - id_type: MAC_ADDR (default) or USER_NAME, what ``user`` is
+    """
+
+    _type, _spec, *_ = spec.USER_DELETE
+
+    def __init__(self, user: str, id_type: str = "MAC_ADDR"):
+        if str(id_type).upper() == "MAC_ADDR":
+            user = MACAddress(user)
+        self._transform(USER={"VALUE": user, "ID_TYPE": id_type})
+
+
+class DEVICE_DELETE(BaseCommand):
+    """
+    Deletes a device from the NSE's authorized MAC address database.
+
+    Kwargs:
+        - mac_addr: Device's MAC address
+    """
+
+    _type, _spec, *_ = spec.DEVICE_DELETE
+
+    def __init__(self, mac_addr: MACAddress):
+        self._transform(MAC_ADDR=mac_addr)
+
+
+class USER_QUERY(BaseCommand):
+    """
+    Queries the MAC authorization table entry of a subscriber.
+
+    Kwargs:
+        - user: Subscriber's MAC address or username
+        - id_type: MAC_ADDR (default) or USER_NAME, what ``user`` is
+    """
+
+    _type, _spec, *_ = spec.USER_QUERY
+    _response = spec.USER_QUERY_RESPONSE
+    _readonly = True
+
+    def __init__(self, user: str, id_type: str = "MAC_ADDR"):
+        if str(id_type).upper() == "MAC_ADDR":
+            user = MACAddress(user)
+        self._transform(USER={"VALUE": user, "ID_TYPE": id_type})
+
+
+class USER_AUTHORIZE(BaseCommand):
+    """
+    Authorizes a subscriber that is pending in the Current memory table.
+
+    Kwargs:
+        - mac_addr: Subscriber's MAC address
+    """
+
+    _type, _spec, *_ = spec.USER_AUTHORIZE
+
+    def __init__(self, mac_addr: MACAddress):
+        self._transform(MAC_ADDR=mac_addr)
+
+
+class SUBSCRIBER_QUERY_CURRENT(BaseCommand):
+    """
+    Queries the Current (active) memory table entry of a subscriber.
+
+    Kwargs:
+        - mac_addr: Subscriber's MAC address
+    """
+
+    _type, _spec, *_ = spec.SUBSCRIBER_QUERY_CURRENT
+    _response = spec.SUBSCRIBER_QUERY_CURRENT_RESPONSE
+    _readonly = True
+
+    def __init__(self, mac_addr: MACAddress):
+        self._transform(MAC_ADDR=mac_addr)
+
+
+class SUBSCRIBER_QUERY_AUTH(BaseCommand):
+    """
+    Queries the authorization table entry of a subscriber, by MAC address
+    or username.
+
+    Kwargs:
+        - mac_addr (optional): Subscriber's MAC address
+        - user_name (optional): Subscriber's username
+    """
+
+    _type, _spec, *_ = spec.SUBSCRIBER_QUERY_AUTH
+    _response = spec.SUBSCRIBER_QUERY_AUTH_RESPONSE
+    _readonly = True
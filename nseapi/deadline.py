@@ -0,0 +1,59 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# seconds a command may take end to end, per command type; other commands
+# get the device's ``timeout``
+DEFAULT_TIMEOUTS = {
+    # posted to the property management system by the NSE
+    "USER_PAYMENT": 60,
+    "USER_PURCHASE": 60,
+    "PMS_PENDING_TRANSACTION": 60,
+    # answered by the RADIUS server
+    "RADIUS_LOGIN": 15,
+    "RADIUS_LOGOUT": 15,
+    # answered from the NSE memory tables
+    "CACHE_UPDATE": 5,
+    "USER_AUTHORIZE": 5,
+    "SUBSCRIBER_QUERY_CURRENT": 5,
+    "SUBSCRIBER_QUERY_AUTH": 5,
+    "USER_QUERY": 5,
+    "ROOM_QUERY_ACCESS": 5,
+}
+
+_deadline = contextvars.ContextVar("nseapi_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Bound every command executed in the ``with`` block, by any device, to
+    finish within ``seconds`` from now, retries included.
+
+    Nested blocks can only shorten the enclosing deadline. The deadline is
+    a :mod:`contextvars` variable, so it follows asyncio tasks created
+    inside the block.
+
+    :returns: the deadline, as a :func:`time.monotonic` timestamp
+    """
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None and outer < expires:
+        expires = outer
+    token = _deadline.set(expires)
+    try:
+        yield expires
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline():
+    """The deadline of the enclosing :func:`deadline` block, or ``None``."""
+    return _deadline.get()
+
+
+def remaining(expires):
+    """Seconds left until ``expires``, at least 0; ``None`` for no deadline."""
+    if expires is None:
+        return None
+    return max(0.0, expires - time.monotonic())
@@ -1,17 +1,53 @@
-import sys
+import asyncio
+import contextvars
+import http.client
 import logging
 import socket
-import datetime
 import time
-import urllib
-import urllib.request
-import xmltodict
+from concurrent.futures import ThreadPoolExecutor
+from xml.parsers.expat import ExpatError
 
 from nseapi import exceptions as nse_err
+from nseapi import health
+from nseapi.deadline import DEFAULT_TIMEOUTS, current_deadline
+from nseapi.metrics import command_type
+from nseapi.response import decode
+from nseapi.results import Result, result_class
+from nseapi.singleflight import SingleFlight
+from nseapi.stream import RecordParser
+from nseapi.tracing import Span
+from nseapi.tracing import call as trace
+from nseapi.transport import (
+    AsyncConnectionPool,
+    ConnectionPool,
+    PoolTimeoutError,
+    TransportError,
+)
 from nseapi.types import Command
 
 logger = logging.getLogger(__name__)
 
+# failures of a round trip, reported as ConnectError
+_TRANSPORT_ERRORS = (
+    OSError,
+    EOFError,
+    http.client.HTTPException,
+    asyncio.TimeoutError,
+    TransportError,
+    PoolTimeoutError,
+)
+
+
+def _connect_error(dev, error):
+    """The :class:`ConnectError` subclass reporting a transport ``error``."""
+    if isinstance(error, (socket.timeout, asyncio.TimeoutError, PoolTimeoutError)):
+        return nse_err.ConnectTimeoutError(dev, error)
+    if isinstance(error, ConnectionRefusedError):
+        return nse_err.ConnectRefusedError(dev, error)
+    if isinstance(error, socket.gaierror):
+        return nse_err.ConnectUnknownHostError(dev, error)
+    return nse_err.ConnectError(dev, error)
+
 
 class Device:
 
@@ -26,6 +62,34 @@ class Device:
         self._conn_open_timeout = kwargs.get("conn_open_timeout", 30)
         self._auth_user = kwargs.get("user") or kwargs.get("usr")
         self._auth_password = kwargs.get("password") or kwargs.get("passwd")
+        self._timeout = kwargs.get("timeout", 30)
+        # end-to-end timeouts per command type, over DEFAULT_TIMEOUTS
+        self._command_timeouts = {
+            **DEFAULT_TIMEOUTS,
+            **(kwargs.get("command_timeouts") or {}),
+        }
+
+        # opt-in nseapi.limiter.AdaptiveLimiter for commands in flight
+        self._limiter = kwargs.get("limiter")
+        # opt-in nseapi.retry.RetryPolicy and nseapi.breaker.CircuitBreaker
+        self._retry = kwargs.get("retry")
+        self._breaker = kwargs.get("breaker")
+        # opt-in nseapi.metrics.Metrics, labelled with the gateway address
+        self._metrics = kwargs.get("metrics")
+        self._gateway = "%s:%s" % (self._hostname, self._port)
+        # opt-in nseapi.tracing.Tracer called around every round trip
+        self._tracer = kwargs.get("tracer")
+
+        # connection pool settings
+        default_size = self._limiter.max_limit if self._limiter else 4
+        self._pool_size = kwargs.get("pool_size", default_size)
+        self._pool_timeout = kwargs.get("pool_timeout")
+        self._idle_timeout = kwargs.get("idle_timeout", 60)
+
+        # opt-in nseapi.cache.ResponseCache for query commands
+        self._cache = kwargs.get("cache")
+        # share one round trip between identical in-flight queries
+        self._flights = SingleFlight() if kwargs.get("coalesce", True) else None
 
         # initialize instance variables
         self._conn = None
@@ -78,6 +142,65 @@ class Device:
                 "could not convert timeout value of %s to an " "integer" % (value)
             )
 
+    @property
+    def cache(self):
+        """
+        :returns: the :class:`ResponseCache` of the device, if any
+        """
+        return self._cache
+
+    @property
+    def limiter(self):
+        """
+        :returns: the :class:`AdaptiveLimiter` of the device, if any
+        """
+        return self._limiter
+
+    @property
+    def concurrency_limit(self):
+        """
+        :returns: the number of commands (int) currently allowed in flight
+        """
+        if self._limiter is not None:
+            return self._limiter.limit
+        return self._pool_size
+
+    @property
+    def retry(self):
+        """
+        :returns: the :class:`RetryPolicy` of the device, if any
+        """
+        return self._retry
+
+    @property
+    def breaker(self):
+        """
+        :returns: the :class:`CircuitBreaker` of the device, if any
+        """
+        return self._breaker
+
+    @property
+    def metrics(self):
+        """
+        :returns: the :class:`Metrics` recording the commands, if any
+        """
+        return self._metrics
+
+    @property
+    def tracer(self):
+        """
+        :returns: the :class:`Tracer` called around the round trips, if any
+        """
+        return self._tracer
+
+    @property
+    def flights(self):
+        """
+        :returns: the :class:`SingleFlight` coalescing identical in-flight
+          queries, ``None`` if created with ``coalesce=False``
+        """
+        return self._flights
+
     @property
     def user(self):
         """
@@ -116,33 +239,15 @@ class Device:
           connectivity within this timeout (seconds)
 
         :param int intvtimeout:
-          Timeout interval on the socket connection. Generally you should not
-          change this value, but you can if you want to twiddle the frequency
-          of the socket attempts on the connection
+          Timeout of a single connection attempt. Failed attempts are
+          repeated at short, growing intervals until ``timeout``
 
         :returns: ``True`` if probe is successful, ``False`` otherwise
         """
-        start = datetime.datetime.now()
-        end = start + datetime.timedelta(seconds=timeout)
-        probe_ok = True
-
-        while datetime.datetime.now() < end:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(intvtimeout)
-            try:
-                s.connect((self.hostname, int(self._port)))
-                s.shutdown(socket.SHUT_RDWR)
-                s.close()
-                break
-            except socket.timeout:
-                time.sleep(1)
-            except Exception as e:
-                print(f"An error occurred: {e}")
-                time.sleep(1)
-        else:
-            probe_ok = False
-
-        return probe_ok
+        status = health.check(self._hostname, self._port, timeout, True, intvtimeout)
+        if not status.ok:
+            logger.debug("probe of %s failed: %s", self._gateway, status.error)
+        return status.ok
 
     def open(self, **kwargs):
         """
@@ -150,12 +255,19 @@ class Device:
         information.
         """
         auto_probe = kwargs.get("auto_probe", self._auto_probe)
-        if auto_probe and not self.probe(auto_probe):
-            raise nse_err.ProbeError(self)
+        if auto_probe:
+            status = health.check(self._hostname, self._port, auto_probe, True)
+            if not status.ok:
+                raise nse_err.ProbeError(self, status.error)
 
-        url = f"http://{self.hostname}:{str(self._port)}/usg/command.xml"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        self._req = urllib.request.Request(url, headers=headers, method="POST")
+        self._conn = ConnectionPool(
+            self.hostname,
+            self._port,
+            maxsize=self._pool_size,
+            pool_timeout=self._pool_timeout,
+            idle_timeout=self._idle_timeout,
+            timeout=self.timeout,
+        )
         self.connected = True
         return self
 
@@ -164,31 +276,320 @@ class Device:
         Closes the connection to the device only if connected.
         """
         if self.connected is True:
+            self._conn.close()
+            if self._cache is not None:
+                self._cache.clear()
             self.connected = False
 
     def __repr__(self):
         return "NSE(%s)" % self.hostname
 
-    def execute(self, xml):
-        encode = None if sys.version < "3" else "unicode"
+    def execute(self, xml, timeout=None):
+        """
+        Send a command to the device and return the parsed ``USG`` response,
+        a :class:`nseapi.results.Result` typed for the command.
+
+        :param float timeout: seconds the command may take end to end,
+          retries included; defaults to the timeout of the command type
+          (see ``command_timeouts``), else the device ``timeout``. An
+          enclosing :func:`nseapi.deadline.deadline` can only shorten it.
+
+        Safe to call from several threads at once: every call borrows its own
+        connection from the pool and keeps its request state local.
+
+        Identical read-only queries issued while one is already in flight
+        wait for it and share its response, which must not be modified.
+
+        :raises USGError: the NSE answered with an error
+        :raises ConnectError: the NSE could not be reached or its answer not
+          be read, once retries (if any) are exhausted
+        :raises DeadlineExceededError: the time budget ran out
+        """
+        return self._execute(xml, self._serialize(xml), timeout)
+
+    def _execute(self, xml, body, timeout=None):
+        """:meth:`execute` of ``xml`` already rendered to ``body``."""
+        if not self.connected:
+            raise nse_err.ConnectClosedError(self)
+        expires = self._deadline(xml, timeout)
+        if not isinstance(xml, Command):
+            return self._fetch(body, False, expires, Result)[0]
+
+        result = result_class(type(xml))
+        cache = self._cache
+        key = cache.key(xml, body) if cache is not None else None
+        if key is None and not xml._readonly:
+            try:
+                return self._fetch(body, False, expires, result)[0]
+            finally:
+                if cache is not None:
+                    cache.invalidate(xml)
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                return data
+            generation = cache.generation()
+
+        def fetch():
+            data, size = self._fetch(body, True, expires, result)
+            if key is not None:
+                cache.put(key, xml, data, size, generation)
+            return data
+
+        if self._flights is None:
+            return fetch()
+        try:
+            return self._flights.do(body, fetch, expires)
+        except TimeoutError as e:
+            raise nse_err.DeadlineExceededError(self, e) from e
+
+    def _deadline(self, xml, timeout):
+        """The :func:`time.monotonic` time ``xml`` must be done by, if any."""
+        if timeout is None:
+            timeout = self._command_timeouts.get(
+                getattr(xml, "_type", None), self._timeout
+            )
+        expires = None if timeout is None else time.monotonic() + timeout
+        outer = current_deadline()
+        if outer is not None and (expires is None or outer < expires):
+            expires = outer
+        return expires
+
+    def _retry_delay(self, attempt, error, readonly, deadline):
+        """Seconds to wait before the next attempt, ``None`` to give up."""
+        if self._retry is None:
+            return None
+        delay = self._retry.delay(attempt, error, readonly)
+        if delay is not None and deadline is not None:
+            if time.monotonic() + delay >= deadline:
+                return None
+        return delay
+
+    def _check_error(self, error, deadline):
+        """The exception to raise for a failed round trip."""
+        breaker = self._breaker
+        if breaker is not None and not isinstance(error, PoolTimeoutError):
+            breaker.record_failure()
+        if deadline is not None and time.monotonic() >= deadline:
+            return nse_err.DeadlineExceededError(self, error)
+        return _connect_error(self, error)
+
+    def _fetch(self, body, readonly=False, deadline=None, result=Result):
+        """
+        Round trip retried per the retry policy: the parsed response, as a
+        ``result`` instance, and its size in bytes.
+        """
+        kind = span = None
+        if self._metrics is not None or self._tracer is not None:
+            kind = command_type(body)
+        if self._tracer is not None:
+            span = Span(kind, self._hostname, self._port, len(body))
+        attempt = 0
+        while True:
+            try:
+                if span is not None:
+                    self._before_send(span, attempt)
+                rsp = self._send(body, deadline, kind)
+            except nse_err.ConnectError as e:
+                if self._metrics is not None:
+                    self._metrics.count_error(self._gateway, kind, e)
+                delay = self._retry_delay(attempt, e, readonly, deadline)
+                if span is not None:
+                    self._on_error(span, e, delay)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+            else:
+                if span is None:
+                    return result(self._parse(rsp, kind)), len(rsp)
+                return self._traced_parse(span, rsp, result), len(rsp)
+
+    def _send(self, body, deadline=None, kind=None):
+        """One round trip through the circuit breaker and the limiter."""
+        if deadline is not None and time.monotonic() >= deadline:
+            raise nse_err.DeadlineExceededError(self, "no time left")
+        breaker = self._breaker
+        if breaker is not None:
+            breaker.before_call(self)
+        try:
+            if self._limiter is None:
+                rsp = self._request(body, deadline, kind)
+            else:
+                with self._limiter.slot(deadline):
+                    rsp = self._request(body, deadline, kind)
+        except _TRANSPORT_ERRORS as e:
+            raise self._check_error(e, deadline) from e
+        if breaker is not None:
+            breaker.record_success()
+        return rsp
+
+    def _before_send(self, span, attempt):
+        span.attempt = attempt
+        span.start = time.perf_counter()
+        span.seconds = span.response_bytes = span.error = None
+        trace(self._tracer.before_send, span)
+
+    def _on_error(self, span, error, delay=None):
+        if span.seconds is None:
+            span.seconds = time.perf_counter() - span.start
+        span.error = error
+        span.retry_delay = delay
+        trace(self._tracer.on_error, span)
+
+    def _traced_parse(self, span, rsp, result):
+        """:meth:`_parse` of a response, with the tracer told about it."""
+        span.seconds = time.perf_counter() - span.start
+        span.response_bytes = len(rsp)
+        trace(self._tracer.after_send, span)
+        try:
+            data = result(self._parse(rsp, span.command))
+        except (nse_err.USGError, nse_err.ConnectError) as e:
+            self._on_error(span, e)
+            raise
+        span.result = data
+        trace(self._tracer.on_parse, span)
+        return data
+
+    def _request(self, body, deadline, kind):
+        """
+        A request on the pool, timed if metrics are recorded: the wait for
+        a connection and the round trip on it separately.
+        """
+        metrics = self._metrics
+        if metrics is None:
+            return self._conn.request(body, deadline)
+        start = time.perf_counter()
+        marks = []
+        try:
+            rsp = self._conn.request(body, deadline, marks)
+        finally:
+            self._observe_wait(kind, start, marks)
+        self._observe_wire(kind, marks, body, rsp)
+        return rsp
+
+    def _observe_wait(self, kind, start, marks):
+        """Record the wait for a pooled connection, if one was acquired."""
+        if marks:
+            self._metrics.observe_pool_wait(self._gateway, kind, marks[0] - start)
+
+    def _observe_wire(self, kind, marks, body, rsp):
+        """Record the round trip, from acquiring the connection on."""
+        elapsed = time.perf_counter() - marks[0]
+        self._metrics.observe_wire(self._gateway, kind, elapsed, len(body), len(rsp))
+
+    def _serialize(self, xml):
+        """:meth:`_render`, timed if metrics are recorded."""
+        metrics = self._metrics
+        if metrics is None or not isinstance(xml, Command):
+            return self._render(xml)
+        start = time.perf_counter()
+        body = xml.to_bytes()
+        elapsed = time.perf_counter() - start
+        metrics.observe_serialize(self._gateway, xml._type, elapsed)
+        return body
+
+    @staticmethod
+    def _render(xml):
+        """Request body for a :class:`Command`, XML string or bytes."""
         # check if xml is a Command instance
         if isinstance(xml, Command):
-            xml = xml.to_xml()
-        self._req.data = xml.encode(encode)
+            return xml.to_bytes()
+        if isinstance(xml, str):
+            return xml.encode("utf-8")
+        return xml
+
+    def _parse(self, rsp, kind=None):
+        """Parse a response body, raising :class:`USGError` for RESULT=ERROR."""
+        metrics = self._metrics
+        if metrics is None:
+            return self._decode(rsp)
+        start = time.perf_counter()
+        try:
+            return self._decode(rsp)
+        except (nse_err.USGError, nse_err.ConnectError) as e:
+            metrics.count_error(self._gateway, kind, e)
+            raise
+        finally:
+            metrics.observe_parse(self._gateway, kind, time.perf_counter() - start)
+
+    def _decode(self, rsp):
+        try:
+            return decode(rsp)
+        except (ExpatError, ValueError):
+            raise nse_err.ParseError(self, rsp.decode("utf-8", "replace"))
+
+    def stream(self, xml, timeout=None, depth=1, chunk_size=65536):
+        """
+        Send a command and yield the records of its response as they
+        arrive, for responses too large to hold in memory at once.
+
+        :param float timeout: as for :meth:`execute`, for the whole stream
+        :param int depth: level of the record elements below ``<USG>``,
+          see :class:`~nseapi.stream.RecordParser`
+        :param int chunk_size: bytes read from the socket at a time
+
+        :returns: generator of ``(tag, record)`` tuples
+
+        Streams are not cached, coalesced nor retried. Closing the generator
+        before the end closes the connection.
+        """
+        body = self._render(xml)
+        if not self.connected:
+            raise nse_err.ConnectClosedError(self)
+        expires = self._deadline(xml, timeout)
+        if expires is not None and time.monotonic() >= expires:
+            raise nse_err.DeadlineExceededError(self, "no time left")
+        breaker = self._breaker
+        if breaker is not None:
+            breaker.before_call(self)
+
+        parser = RecordParser(depth)
+        chunks = self._conn.stream(body, expires, chunk_size)
         try:
-            with urllib.request.urlopen(self._req, timeout=self.timeout) as rsp:
-                _rsp = rsp.read().decode(encode)
-                try:
-                    _data = xmltodict.parse(_rsp)
-                except xmltodict.expat.ExpatError:
-                    raise nse_err.ParseError(self, _rsp)
-                else:
-                    data = _data.get("USG")
-                    if data["@RESULT"] == "ERROR":
-                        raise nse_err.USGError("Execute request failed", data)
-                    return data
-        except Exception as e:
-            raise nse_err.ConnectError(self, e)
+            for chunk in chunks:
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        except _TRANSPORT_ERRORS as e:
+            raise self._check_error(e, expires) from e
+        except ExpatError as e:
+            raise nse_err.ParseError(self, e) from e
+        finally:
+            chunks.close()
+        if breaker is not None:
+            breaker.record_success()
+
+    def execute_many(self, commands, max_workers=None):
+        """
+        Execute a batch of commands concurrently over a thread pool.
+
+        :param commands: iterable of :class:`Command` instances or XML strings
+        :param int max_workers: number of worker threads, defaults to the
+          connection pool size
+
+        :returns: list of results in the same order as ``commands``; a
+          command that failed has its exception in its place instead
+
+        The commands run in copies of the caller's context, so an enclosing
+        :func:`nseapi.deadline.deadline` applies to them.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+
+        def _execute(cmd):
+            try:
+                return self.execute(cmd)
+            except Exception as e:
+                return e
+
+        workers = min(max_workers or self._pool_size, len(commands))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, _execute, cmd)
+                for cmd in commands
+            ]
+            return [future.result() for future in futures]
 
     # -----------------------------------------------------------------------
     # Context Manager
@@ -205,3 +606,236 @@ class Device:
             except Exception as ex:
                 # exit should not raise any exception
                 logger.error("Close in context manager hit exception: {}".format(ex))
+
+
+class AsyncDevice(Device):
+    """
+    asyncio-native :class:`Device`.
+
+    Takes the same arguments as :class:`Device`; ``pool_size`` is the
+    number of kept-alive connections and also the maximum number of
+    commands in flight to this gateway at once. Use it as
+    ``async with AsyncDevice(host) as dev: await dev.execute(cmd)``.
+    """
+
+    async def probe(self, timeout=5, intvtimeout=1):
+        """
+        Probe the device without blocking the event loop; see
+        :meth:`Device.probe`.
+        """
+        status = await health.check_async(
+            self._hostname, self._port, timeout, True, intvtimeout
+        )
+        if not status.ok:
+            logger.debug("probe of %s failed: %s", self._gateway, status.error)
+        return status.ok
+
+    async def open(self, **kwargs):
+        """
+        Opens a connection to the device using existing login/auth
+        information.
+        """
+        auto_probe = kwargs.get("auto_probe", self._auto_probe)
+        if auto_probe:
+            status = await health.check_async(
+                self._hostname, self._port, auto_probe, True
+            )
+            if not status.ok:
+                raise nse_err.ProbeError(self, status.error)
+
+        self._conn = AsyncConnectionPool(
+            self.hostname,
+            self._port,
+            maxsize=self._pool_size,
+            idle_timeout=self._idle_timeout,
+            timeout=self.timeout,
+        )
+        self.connected = True
+        return self
+
+    async def close(self):
+        """
+        Closes the connection to the device only if connected.
+        """
+        if self.connected is True:
+            self.connected = False
+            if self._cache is not None:
+                self._cache.clear()
+            await self._conn.close()
+
+    async def execute(self, xml, timeout=None):
+        """
+        Send a command to the device and return the parsed ``USG`` response,
+        a :class:`nseapi.results.Result` typed for the command.
+
+        Cancelling the calling task aborts the request and propagates
+        :class:`asyncio.CancelledError`; a query shared with other callers
+        keeps running for them. ``timeout`` is as for :meth:`Device.execute`.
+        """
+        return await self._execute(xml, self._serialize(xml), timeout)
+
+    async def _execute(self, xml, body, timeout=None):
+        """:meth:`execute` of ``xml`` already rendered to ``body``."""
+        if not self.connected:
+            raise nse_err.ConnectClosedError(self)
+        expires = self._deadline(xml, timeout)
+        if not isinstance(xml, Command):
+            return (await self._fetch(body, False, expires, Result))[0]
+
+        result = result_class(type(xml))
+        cache = self._cache
+        key = cache.key(xml, body) if cache is not None else None
+        if key is None and not xml._readonly:
+            try:
+                return (await self._fetch(body, False, expires, result))[0]
+            finally:
+                if cache is not None:
+                    cache.invalidate(xml)
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                return data
+            generation = cache.generation()
+
+        async def fetch():
+            data, size = await self._fetch(body, True, expires, result)
+            if key is not None:
+                cache.put(key, xml, data, size, generation)
+            return data
+
+        if self._flights is None:
+            return await fetch()
+        try:
+            return await self._flights.do_async(body, fetch, expires)
+        except asyncio.TimeoutError as e:
+            raise nse_err.DeadlineExceededError(self, e) from e
+
+    async def _fetch(self, body, readonly=False, deadline=None, result=Result):
+        """
+        Round trip retried per the retry policy: the parsed response, as a
+        ``result`` instance, and its size in bytes.
+        """
+        kind = span = None
+        if self._metrics is not None or self._tracer is not None:
+            kind = command_type(body)
+        if self._tracer is not None:
+            span = Span(kind, self._hostname, self._port, len(body))
+        attempt = 0
+        while True:
+            try:
+                if span is not None:
+                    self._before_send(span, attempt)
+                rsp = await self._send(body, deadline, kind)
+            except nse_err.ConnectError as e:
+                if self._metrics is not None:
+                    self._metrics.count_error(self._gateway, kind, e)
+                delay = self._retry_delay(attempt, e, readonly, deadline)
+                if span is not None:
+                    self._on_error(span, e, delay)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+            else:
+                if span is None:
+                    return result(self._parse(rsp, kind)), len(rsp)
+                return self._traced_parse(span, rsp, result), len(rsp)
+
+    async def _send(self, body, deadline=None, kind=None):
+        """One round trip through the circuit breaker and the limiter."""
+        if deadline is not None and time.monotonic() >= deadline:
+            raise nse_err.DeadlineExceededError(self, "no time left")
+        breaker = self._breaker
+        if breaker is not None:
+            breaker.before_call(self)
+        try:
+            if self._limiter is None:
+                rsp = await self._request(body, deadline, kind)
+            else:
+                async with self._limiter.async_slot(deadline):
+                    rsp = await self._request(body, deadline, kind)
+        except _TRANSPORT_ERRORS as e:
+            raise self._check_error(e, deadline) from e
+        if breaker is not None:
+            breaker.record_success()
+        return rsp
+
+    async def _request(self, body, deadline, kind):
+        """A request on the pool, timed if metrics are recorded."""
+        metrics = self._metrics
+        if metrics is None:
+            return await self._conn.request(body, deadline)
+        start = time.perf_counter()
+        marks = []
+        try:
+            rsp = await self._conn.request(body, deadline, marks)
+        finally:
+            self._observe_wait(kind, start, marks)
+        self._observe_wire(kind, marks, body, rsp)
+        return rsp
+
+    async def stream(self, xml, timeout=None, depth=1, chunk_size=65536):
+        """
+        Send a command and yield the records of its response as they
+        arrive; see :meth:`Device.stream`. Use it as ``async for tag, record
+        in dev.stream(cmd)``.
+        """
+        body = self._render(xml)
+        if not self.connected:
+            raise nse_err.ConnectClosedError(self)
+        expires = self._deadline(xml, timeout)
+        if expires is not None and time.monotonic() >= expires:
+            raise nse_err.DeadlineExceededError(self, "no time left")
+        breaker = self._breaker
+        if breaker is not None:
+            breaker.before_call(self)
+
+        parser = RecordParser(depth)
+        chunks = self._conn.stream(body, expires, chunk_size)
+        try:
+            async for chunk in chunks:
+                for record in parser.feed(chunk):
+                    yield record
+            for record in parser.close():
+                yield record
+        except _TRANSPORT_ERRORS as e:
+            raise self._check_error(e, expires) from e
+        except ExpatError as e:
+            raise nse_err.ParseError(self, e) from e
+        finally:
+            await chunks.aclose()
+        if breaker is not None:
+            breaker.record_success()
+
+    async def execute_many(self, commands):
+        """
+        Execute a batch of commands concurrently, at most ``pool_size`` at a
+        time.
+
+        :returns: list of results in the same order as ``commands``; a
+          command that failed has its exception in its place instead
+        """
+        return await asyncio.gather(
+            *(self.execute(cmd) for cmd in commands), return_exceptions=True
+        )
+
+    # -----------------------------------------------------------------------
+    # Context Manager
+    # -----------------------------------------------------------------------
+
+    def __enter__(self):
+        raise TypeError("AsyncDevice must be used with 'async with'")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):  # pragma: no cover
+        pass
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.connected:
+            try:
+                await self.close()
+            except Exception as ex:
+                # exit should not raise any exception
+                logger.error("Close in context manager hit exception: {}".format(ex))
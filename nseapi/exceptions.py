@@ -1,10 +1,45 @@
+# USG error numbers and what they mean
+ERROR_DESCRIPTIONS = {
+    100: "Parsing error",
+    101: "Unrecognized command",
+    102: "Required attribute is missing",
+    103: "Required data is missing",
+    200: "Unknown room number",
+    201: "Unknown user name",
+    202: "Unknown user MAC address",
+    203: "Wrong password",
+    204: "User name already used",
+    205: "Too many subscribers",
+    206: "Unable to provide all requested data",
+    207: "AAA internal error (when AAA is not configured correctly for the command request)",
+    208: "Wrong Plan Number",
+    209: "User is already valid",
+    210: "Specified valid-until time is invalid",
+    211: "Specified DHCP subnet does not exist",
+    300: "User RADIUS account not found",
+    301: "User RADIUS authorization denied",
+    302: "User PMS authorization denied",
+    303: "Unsupported payment method",
+    304: "MAC Address does not belong to room location",
+}
+
+
 class USGError(Exception):
     """Base class for USG-related errors."""
 
     def __init__(self, message, rsp):
         super().__init__(message)
-        self._error_num = int(rsp.get("ERROR_NUM"))
-        self._error_desc = rsp.get("ERROR_DESC") or self.get_error_description()
+        # parsed responses carry the error as attributes ("@ERROR_NUM")
+        self._error_num = int(rsp.get("@ERROR_NUM", rsp.get("ERROR_NUM", 0)))
+        self._error_desc = (
+            rsp.get("@ERROR_DESC")
+            or rsp.get("ERROR_DESC")
+            or self.get_error_description()
+        )
+
+    @property
+    def error_num(self):
+        return self._error_num
 
     @property
     def error_desc(self):
@@ -17,30 +52,7 @@ class USGError(Exception):
         return f"<USGError {self._error_num}: {self.error_desc}>"
 
     def get_error_description(self):
-        error_descriptions = {
-            100: "Parsing error",
-            101: "Unrecognized command",
-            102: "Required attribute is missing",
-            103: "Required data is missing",
-            200: "Unknown room number",
-            201: "Unknown user name",
-            202: "Unknown user MAC address",
-            203: "Wrong password",
-            204: "User name already used",
-            205: "Too many subscribers",
-            206: "Unable to provide all requested data",
-            207: "AAA internal error (when AAA is not configured correctly for the command request)",
-            208: "Wrong Plan Number",
-            209: "User is already valid",
-            210: "Specified valid-until time is invalid",
-            211: "Specified DHCP subnet does not exist",
-            300: "User RADIUS account not found",
-            301: "User RADIUS authorization denied",
-            302: "User PMS authorization denied",
-            303: "Unsupported payment method",
-            304: "MAC Address does not belong to room location",
-        }
-        return error_descriptions.get(self._error_num, "Unknown error")
+        return ERROR_DESCRIPTIONS.get(self._error_num, "Unknown error")
 
 
 class ConnectError(Exception):
@@ -115,3 +127,30 @@ class ConnectRefusedError(ConnectError):
     be that the services is not enabled, or the host has
     too many connections already.
     """
+
+
+class ConnectClosedError(ConnectError):
+    """
+    Generated if a command is executed before :meth:`Device.open` or after
+    :meth:`Device.close`
+    """
+
+
+class ParseError(ConnectError):
+    """
+    Generated if the NSE response is not a valid XML document
+    """
+
+
+class CircuitOpenError(ConnectError):
+    """
+    Generated if the circuit breaker of the device is open: the gateway
+    failed repeatedly and is not tried again until its reset timeout expires
+    """
+
+
+class DeadlineExceededError(ConnectTimeoutError):
+    """
+    Generated if the time budget of a command ran out before the NSE
+    answered; see :func:`nseapi.deadline.deadline`
+    """
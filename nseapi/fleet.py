@@ -0,0 +1,207 @@
+import contextvars
+import functools
+import logging
+import queue
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from nseapi import health
+from nseapi.device import Device
+from nseapi.types import Command
+
+logger = logging.getLogger(__name__)
+
+
+class FleetResult(namedtuple("FleetResult", "device command result error")):
+    """
+    Outcome of one command on one gateway; ``error`` holds the exception
+    of a failed command and ``result`` the parsed response otherwise, a
+    :class:`~nseapi.results.Result` typed for the command as returned by
+    :meth:`Device.execute`.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class Fleet:
+    """
+    A group of NSE gateways that commands can be fanned out to in parallel.
+
+    :param devices: iterable of :class:`Device` instances
+    :param int max_workers: maximum number of commands in flight across
+      the whole fleet
+    :param int per_host: maximum number of commands in flight to a single
+      gateway, defaults to each device's :attr:`~Device.concurrency_limit`
+    """
+
+    def __init__(self, devices, max_workers=32, per_host=None):
+        self._devices = {}
+        for dev in devices:
+            key = (dev.hostname, int(dev.port))
+            if key in self._devices:
+                raise ValueError("Duplicate device %s:%s" % key)
+            self._devices[key] = dev
+        self.max_workers = max_workers
+        self.per_host = per_host
+
+    def __repr__(self):
+        return "Fleet(%d devices)" % len(self._devices)
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(self._devices.values())
+
+    def __getitem__(self, host):
+        """
+        Look a device up by :class:`Device`, ``(host, port)`` tuple or host
+        name; a bare host name must match a single device.
+        """
+        if isinstance(host, Device):
+            host = (host.hostname, int(host.port))
+        if isinstance(host, tuple):
+            return self._devices[host]
+        matches = [dev for (name, _), dev in self._devices.items() if name == host]
+        if len(matches) != 1:
+            raise KeyError(host)
+        return matches[0]
+
+    def open(self, **kwargs):
+        """Open every device of the fleet."""
+        for dev in self:
+            if not dev.connected:
+                dev.open(**kwargs)
+        return self
+
+    def close(self):
+        """Close every device of the fleet."""
+        for dev in self:
+            dev.close()
+
+    def probe(self, timeout=5, concurrency=1000, fresh=30):
+        """
+        Check every gateway of the fleet at once, blocking; see
+        :func:`nseapi.health.check_all`. Use :meth:`probe_async` from a
+        running event loop.
+
+        :returns: dict of :class:`~nseapi.health.HealthStatus` by device
+        """
+        devices = list(self)
+        statuses = health.check_all(devices, timeout, concurrency, fresh)
+        return dict(zip(devices, statuses))
+
+    async def probe_async(self, timeout=5, concurrency=1000, fresh=30):
+        """:meth:`probe` without blocking the event loop."""
+        devices = list(self)
+        statuses = await health.check_many(devices, timeout, concurrency, fresh)
+        return dict(zip(devices, statuses))
+
+    def execute(self, command):
+        """
+        Run ``command`` on every gateway of the fleet.
+
+        :returns: iterator of :class:`FleetResult`, in completion order
+        """
+        return self.execute_map({key: command for key in self._devices})
+
+    def execute_map(self, commands):
+        """
+        Run a different command, or list of commands, on each gateway.
+
+        The commands are handed to the workers when this is called, and
+        every one of them runs whether or not the results are read. They run
+        in copies of the caller's context, so an enclosing
+        :func:`nseapi.deadline.deadline` applies to them.
+
+        :param dict commands: maps a host (anything :meth:`__getitem__`
+          accepts) to a command or a list of commands; hosts that are left
+          out are skipped
+
+        :returns: iterator of :class:`FleetResult`, in completion order
+        """
+        queues = {}
+        for host, cmds in commands.items():
+            dev = self[host]
+            if isinstance(cmds, (Command, str, bytes)):
+                cmds = [cmds]
+            queues[dev] = deque(cmds)
+        return self._run(queues)
+
+    def _run(self, queues):
+        # one serialization per command object, however many hosts it goes to,
+        # timed in the metrics of the first; the devices get the command
+        # along with it to cache and coalesce
+        rendered = {}
+
+        def _render(dev, cmd):
+            if not isinstance(cmd, Command):
+                return Device._render(cmd)
+            if id(cmd) not in rendered:
+                rendered[id(cmd)] = dev._serialize(cmd)
+            return rendered[id(cmd)]
+
+        context = contextvars.copy_context()
+        results = queue.SimpleQueue()
+        total = left = sum(len(cmds) for cmds in queues.values())
+        running = dict.fromkeys(queues, 0)
+        # reentrant: a future done before add_done_callback runs it at once
+        lock = threading.RLock()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def _submit(dev):
+            nonlocal left
+            limit = self.per_host or dev.concurrency_limit
+            cmds = queues[dev]
+            while cmds and running[dev] < limit:
+                cmd = cmds.popleft()
+                left -= 1
+                try:
+                    body = _render(dev, cmd)
+                except Exception as e:
+                    results.put(FleetResult(dev, cmd, None, e))
+                    continue
+                running[dev] += 1
+                future = pool.submit(context.copy().run, dev._execute, cmd, body)
+                future.add_done_callback(functools.partial(_done, dev, cmd))
+            if not left:
+                # everything is submitted; the workers exit once done
+                pool.shutdown(wait=False)
+
+        def _done(dev, cmd, future):
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            results.put(FleetResult(dev, cmd, result, error))
+            with lock:
+                running[dev] -= 1
+                _submit(dev)
+
+        with lock:
+            for dev in queues:
+                _submit(dev)
+            if not queues:
+                pool.shutdown(wait=False)
+        return (results.get() for _ in range(total))
+
+    # -----------------------------------------------------------------------
+    # Context Manager
+    # -----------------------------------------------------------------------
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for dev in self:
+            try:
+                dev.close()
+            except Exception as ex:
+                # exit should not raise any exception
+                logger.error("Close in context manager hit exception: {}".format(ex))
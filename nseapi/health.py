@@ -0,0 +1,156 @@
+import asyncio
+import socket
+import time
+from collections import namedtuple
+
+# seconds between connection attempts to a gateway that is not up yet,
+# doubled after every attempt up to RETRY_MAX
+RETRY_INTERVAL = 0.05
+RETRY_MAX = 1.0
+
+
+class HealthStatus(namedtuple("HealthStatus", "host port ok rtt error pooled")):
+    """
+    Reachability of one NSE.
+
+    ``ok`` if it accepted a TCP connection, ``rtt`` being the seconds the
+    connection took, or if ``pooled``: a pooled connection of its device
+    got a response recently, which is taken as evidence enough and leaves
+    ``rtt`` at ``None``. ``error`` holds the exception of a failed check.
+    """
+
+    __slots__ = ()
+
+    @property
+    def address(self):
+        return "%s:%s" % (self.host, self.port)
+
+
+def _target(target, default_port=1111):
+    """
+    ``(host, port, pool)`` of a device, ``(host, port)``, ``"host:port"``
+    or ``"[v6]:port"``; a bare IPv6 address gets ``default_port``.
+    """
+    if isinstance(target, tuple):
+        return target[0], int(target[1]), None
+    if isinstance(target, str):
+        if target.startswith("["):
+            host, _, port = target[1:].partition("]")
+            port = port[1:] if port.startswith(":") else ""
+        elif target.count(":") == 1:
+            host, _, port = target.partition(":")
+        else:
+            host, port = target, ""
+        if not host or not port.isdigit():
+            return host or target, default_port, None
+        return host, int(port), None
+    pool = target._conn if target.connected else None
+    return target._hostname, int(target.port), pool
+
+
+def _recent(pool, fresh):
+    """Whether ``pool`` read a response in the last ``fresh`` seconds."""
+    last = getattr(pool, "last_response", None)
+    return last is not None and time.monotonic() - last <= fresh
+
+
+def check(host, port, timeout=5, retry=False, connect_timeout=None):
+    """
+    Time a TCP connection to ``host``:``port``, blocking.
+
+    :param float timeout: seconds to wait for the check to succeed
+    :param bool retry: try again on failure, at short and growing
+      intervals, until ``timeout`` (for a gateway that is booting)
+    :param float connect_timeout: seconds one connection attempt may take,
+      at most the time left of ``timeout``
+
+    :returns: :class:`HealthStatus`
+    """
+    deadline = time.monotonic() + timeout
+    interval = RETRY_INTERVAL
+    while True:
+        left = max(0.0, deadline - time.monotonic())
+        if connect_timeout is not None:
+            left = min(left, connect_timeout)
+        start = time.perf_counter()
+        try:
+            sock = socket.create_connection((host, port), left)
+        except OSError as e:
+            if not retry or time.monotonic() + interval >= deadline:
+                return HealthStatus(host, port, False, None, e, False)
+            time.sleep(interval)
+            interval = min(interval * 2, RETRY_MAX)
+            continue
+        rtt = time.perf_counter() - start
+        sock.close()
+        return HealthStatus(host, port, True, rtt, None, False)
+
+
+async def check_async(host, port, timeout=5, retry=False, connect_timeout=None):
+    """:func:`check` without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout
+    interval = RETRY_INTERVAL
+    while True:
+        left = max(0.0, deadline - time.monotonic())
+        if connect_timeout is not None:
+            left = min(left, connect_timeout)
+        start = time.perf_counter()
+        try:
+            transport, _ = await asyncio.wait_for(
+                loop.create_connection(asyncio.Protocol, host, port), left
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = socket.timeout("no connection within %gs" % left)
+            if not retry or time.monotonic() + interval >= deadline:
+                return HealthStatus(host, port, False, None, e, False)
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, RETRY_MAX)
+            continue
+        rtt = time.perf_counter() - start
+        transport.close()
+        return HealthStatus(host, port, True, rtt, None, False)
+
+
+async def check_many(targets, timeout=5, concurrency=1000, fresh=30):
+    """
+    Check many gateways at once, each with one connection attempt.
+
+    :param targets: iterable of :class:`Device` instances, ``(host, port)``
+      tuples or ``"host:port"`` strings, ``"[v6]:port"`` for IPv6
+    :param float timeout: seconds one connection attempt may take
+    :param int concurrency: maximum number of connections being opened at
+      the same time, to stay clear of the open files limit
+    :param float fresh: an open device whose connection pool read a
+      response in the last ``fresh`` seconds is reported up without a new
+      connection; ``None`` always connects
+
+    :returns: list of :class:`HealthStatus`, in the order of ``targets``
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(target):
+        host, port, pool = _target(target)
+        if fresh is not None and _recent(pool, fresh):
+            return HealthStatus(host, port, True, None, None, True)
+        async with slots:
+            return await check_async(host, port, timeout)
+
+    return await asyncio.gather(*(one(target) for target in targets))
+
+
+def check_all(targets, timeout=5, concurrency=1000, fresh=30):
+    """
+    :func:`check_many` for callers outside of an event loop.
+
+    :raises RuntimeError: called from a running event loop, where
+      ``await check_many(...)`` is to be used instead
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(check_many(targets, timeout, concurrency, fresh))
+    raise RuntimeError(
+        "check_all() cannot run inside an event loop, await check_many() instead"
+    )
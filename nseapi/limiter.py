@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from nseapi.transport import PoolTimeoutError
+
+_TIMEOUT_ERRORS = (socket.timeout, asyncio.TimeoutError)
+
+
+class AdaptiveLimiter:
+    """
+    Adaptive limit on the number of commands in flight to one NSE, for use
+    as ``Device(limiter=...)``.
+
+    The limit follows AIMD: it grows by one per window of successful round
+    trips that keep the gateway busy, and is cut by ``backoff`` when a round
+    trip fails (connection error, timeout) or the smoothed latency exceeds
+    ``tolerance`` times the gateway's unloaded latency. Failures from the
+    same window only cut it once.
+
+    :param int initial: starting limit
+    :param int min_limit: the limit never drops below this
+    :param int max_limit: the limit never grows above this
+    :param float tolerance: latency over baseline ratio seen as overload
+    :param float backoff: factor applied to the limit on overload
+
+    A limiter gates either threads (:meth:`slot`) or the tasks of a single
+    event loop (:meth:`async_slot`), not both.
+    """
+
+    def __init__(
+        self, initial=4, min_limit=1, max_limit=64, tolerance=2.0, backoff=0.5
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._limit = float(initial)
+        self._cond = threading.Condition()
+        self._waiters = collections.deque()  # asyncio futures
+        self._drop_until = 0.0
+        self.inflight = 0
+        self.rtt = None  # smoothed latency, seconds
+        self.baseline = None  # unloaded latency, seconds
+        # counters
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.drops = 0
+
+    def __repr__(self):
+        return "AdaptiveLimiter(limit=%d, inflight=%d)" % (self.limit, self.inflight)
+
+    @property
+    def limit(self):
+        """The number of commands currently allowed in flight."""
+        return int(self._limit)
+
+    def stats(self):
+        """Current limit, latencies and counters, for monitoring."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "inflight": self.inflight,
+                "rtt": self.rtt,
+                "baseline": self.baseline,
+                "successes": self.successes,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "drops": self.drops,
+            }
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """
+        Hold one of the allowed slots while sending a command.
+
+        :param float deadline: :func:`time.monotonic` time to give up
+          waiting for a slot at, raising :class:`PoolTimeoutError`
+        """
+        with self._cond:
+            while self.inflight >= self.limit:
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise PoolTimeoutError("no slot available before the deadline")
+                self._cond.wait(left)
+            self.inflight += 1
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(start, e)
+            raise
+        self._release(start, None)
+
+    @asynccontextmanager
+    async def async_slot(self, deadline=None):
+        """Hold one of the allowed slots while sending a command (asyncio)."""
+        with self._cond:
+            if self.inflight < self.limit and not self._waiters:
+                self.inflight += 1
+                waiter = None
+            else:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+        if waiter is not None:
+            try:
+                # _wake() counts us in flight before waking us up
+                if deadline is None:
+                    await waiter
+                else:
+                    left = max(0.0, deadline - time.monotonic())
+                    await asyncio.wait_for(waiter, left)
+            except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+                with self._cond:
+                    if waiter.cancelled():
+                        if waiter in self._waiters:
+                            self._waiters.remove(waiter)
+                    else:
+                        self.inflight -= 1
+                        self._wake()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise PoolTimeoutError("no slot available before the deadline")
+                raise
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(start, e)
+            raise
+        self._release(start, None)
+
+    def _release(self, start, error):
+        rtt = time.monotonic() - start
+        with self._cond:
+            busy = self.inflight * 2 >= self.limit
+            self.inflight -= 1
+            if error is None:
+                self.successes += 1
+                self._on_success(rtt, busy)
+            elif isinstance(error, Exception) and not isinstance(
+                error, PoolTimeoutError
+            ):
+                self.errors += 1
+                if isinstance(error, _TIMEOUT_ERRORS):
+                    self.timeouts += 1
+                self._decrease()
+            self._wake()
+
+    def _on_success(self, rtt, busy):
+        # the baseline follows latency drops at once and rises only slowly,
+        # so it tracks the unloaded latency of the gateway
+        if self.baseline is None or rtt < self.baseline:
+            self.baseline = rtt
+        else:
+            self.baseline += (rtt - self.baseline) * 0.01
+        self.rtt = rtt if self.rtt is None else self.rtt + (rtt - self.rtt) * 0.2
+
+        if self.rtt > self.baseline * self.tolerance:
+            self._decrease()
+        elif busy:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now < self._drop_until:
+            return
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        self._drop_until = now + (self.rtt or 0)
+        self.drops += 1
+
+    def _wake(self):
+        while self._waiters and self.inflight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.cancelled():
+                self.inflight += 1
+                waiter.set_result(None)
+        self._cond.notify_all()
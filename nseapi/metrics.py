@@ -0,0 +1,280 @@
+import re
+import threading
+from bisect import bisect_left
+
+from nseapi import exceptions as nse_err
+
+# upper bounds of the histogram buckets, the last one is +Inf
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+SIZE_BUCKETS = tuple(64 * 4**i for i in range(10))  # 64 bytes to 16 MiB
+
+_COMMAND = re.compile(rb'COMMAND\s*=\s*"([^"]*)"')
+
+# histograms of a series: (name, help, bucket kind)
+_HISTOGRAMS = (
+    ("serialize_seconds", "Time to render a command to XML.", "latency"),
+    ("pool_wait_seconds", "Time waiting for a pooled connection.", "latency"),
+    ("wire_seconds", "Time of a round trip to the NSE.", "latency"),
+    ("parse_seconds", "Time to decode a response.", "latency"),
+    ("request_bytes", "Size of a request body.", "size"),
+    ("response_bytes", "Size of a response body.", "size"),
+)
+
+
+def command_type(body):
+    """The ``COMMAND`` of a request body, ``"UNKNOWN"`` if it has none."""
+    match = _COMMAND.search(body)
+    return match.group(1).decode("utf-8", "replace") if match else "UNKNOWN"
+
+
+class Histogram:
+    """
+    Counts of observed values in fixed buckets, with their sum.
+
+    Recording a value is a binary search and two additions; quantiles are
+    estimated from the buckets when asked for.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def __repr__(self):
+        return "Histogram(count=%d, sum=%g)" % (self.count, self.sum)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estimate of the ``q`` quantile (0.99 for p99), interpolated within
+        its bucket; ``None`` if nothing was observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+    def snapshot(self):
+        """``count``, ``sum``, p50/p99 estimates and cumulative buckets."""
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets[bound] = total
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _Series:
+    """The metrics of one gateway and command type."""
+
+    __slots__ = tuple(name for name, _, _ in _HISTOGRAMS) + (
+        "usg_errors",
+        "connect_errors",
+    )
+
+    def __init__(self, latency_buckets, size_buckets):
+        for name, _, kind in _HISTOGRAMS:
+            bounds = latency_buckets if kind == "latency" else size_buckets
+            setattr(self, name, Histogram(bounds))
+        self.usg_errors = {}  # error number -> count
+        self.connect_errors = {}  # ConnectError subclass name -> count
+
+
+class Metrics:
+    """
+    Latency and size histograms and error counts of :meth:`Device.execute`,
+    per gateway and command type (``Command._type``).
+
+    Pass one to a device as ``metrics=`` (several devices can share it):
+
+    - ``serialize_seconds``: rendering the command to XML
+    - ``pool_wait_seconds``: waiting for a connection from the pool,
+      when all of them are busy
+    - ``wire_seconds``: the HTTP round trip, from acquiring a connection
+      to reading the whole response; waits for a connection or a limiter
+      slot are not included
+    - ``parse_seconds``: decoding the response
+    - ``request_bytes`` and ``response_bytes``
+    - ``usg_errors``: :class:`USGError` answers, by error number
+    - ``connect_errors``: failed round trips by :class:`ConnectError`
+      subclass, every attempt of a retried command included
+
+    Read them with :meth:`snapshot`, or :meth:`prometheus` for the
+    Prometheus text exposition format. Commands sent as XML text are
+    labelled with the ``COMMAND`` attribute they carry.
+
+    :param latency_buckets: upper bounds (seconds) of the time histograms
+    :param size_buckets: upper bounds (bytes) of the size histograms
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self._series = {}  # (gateway, command) -> _Series
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "Metrics(%d series)" % len(self._series)
+
+    def _get(self, gateway, command):
+        key = (gateway, command)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(
+                key, _Series(self.latency_buckets, self.size_buckets)
+            )
+        return series
+
+    def observe_serialize(self, gateway, command, seconds):
+        with self._lock:
+            self._get(gateway, command).serialize_seconds.observe(seconds)
+
+    def observe_pool_wait(self, gateway, command, seconds):
+        with self._lock:
+            self._get(gateway, command).pool_wait_seconds.observe(seconds)
+
+    def observe_wire(self, gateway, command, seconds, sent, received):
+        with self._lock:
+            series = self._get(gateway, command)
+            series.wire_seconds.observe(seconds)
+            series.request_bytes.observe(sent)
+            series.response_bytes.observe(received)
+
+    def observe_parse(self, gateway, command, seconds):
+        with self._lock:
+            self._get(gateway, command).parse_seconds.observe(seconds)
+
+    def count_error(self, gateway, command, error):
+        """Count a :class:`USGError` or :class:`ConnectError`."""
+        with self._lock:
+            series = self._get(gateway, command)
+            if isinstance(error, nse_err.USGError):
+                counts, key = series.usg_errors, error.error_num
+            else:
+                counts, key = series.connect_errors, type(error).__name__
+            counts[key] = counts.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self):
+        """
+        Everything recorded so far, as
+        ``{gateway: {command: {metric: value}}}``; histograms are given as
+        in :meth:`Histogram.snapshot`, error counts as dicts.
+        """
+        with self._lock:
+            snapshot = {}
+            for (gateway, command), series in self._series.items():
+                metrics = {
+                    name: getattr(series, name).snapshot() for name, _, _ in _HISTOGRAMS
+                }
+                metrics["usg_errors"] = dict(series.usg_errors)
+                metrics["connect_errors"] = dict(series.connect_errors)
+                snapshot.setdefault(gateway, {})[command] = metrics
+            return snapshot
+
+    def prometheus(self, prefix="nseapi"):
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            lines = []
+            for name, text, _ in _HISTOGRAMS:
+                metric = f"{prefix}_{name}"
+                lines.append(f"# HELP {metric} {text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (gateway, command), values in series:
+                    histogram = getattr(values, name)
+                    total = 0
+                    for bound, count in zip(
+                        histogram.bounds + ("+Inf",), histogram.counts
+                    ):
+                        total += count
+                        bucket = _labels(
+                            gateway=gateway, command=command, le=_number(bound)
+                        )
+                        lines.append(f"{metric}_bucket{bucket} {total}")
+                    labels = _labels(gateway=gateway, command=command)
+                    lines.append(f"{metric}_sum{labels} {_number(histogram.sum)}")
+                    lines.append(f"{metric}_count{labels} {histogram.count}")
+            for name, label, text in (
+                ("usg_errors", "error_num", "USG error answers by error number."),
+                ("connect_errors", "error", "Failed round trips by error class."),
+            ):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# HELP {metric} {text}")
+                lines.append(f"# TYPE {metric} counter")
+                for (gateway, command), values in series:
+                    for key, count in sorted(getattr(values, name).items()):
+                        labels = _labels(
+                            gateway=gateway, command=command, **{label: key}
+                        )
+                        lines.append(f"{metric}{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(**labels):
+    """``{name="value",...}`` with the values escaped."""
+    return (
+        "{"
+        + ",".join(
+            '%s="%s"'
+            % (
+                key,
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for key, value in labels.items()
+        )
+        + "}"
+    )
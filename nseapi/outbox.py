@@ -0,0 +1,391 @@
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from nseapi import exceptions as nse_err
+from nseapi.cache import command_keys
+from nseapi.commands.pms import USER_PAYMENT, USER_PURCHASE
+
+logger = logging.getLogger(__name__)
+
+# item states
+PENDING = "pending"  # waiting for a worker, or for its next attempt
+SENDING = "sending"  # on its way to the gateway
+SENT = "sent"  # answered with RESULT="OK"
+FAILED = "failed"  # rejected by the NSE, or out of attempts
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    gateway TEXT NOT NULL,
+    trans_id INTEGER NOT NULL,
+    command TEXT NOT NULL,
+    body BLOB NOT NULL,
+    keys TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    error TEXT,
+    error_num INTEGER,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (gateway, trans_id)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (gateway, status, next_attempt);
+"""
+
+_COLUMNS = (
+    "gateway, trans_id, command, status, attempts, error, error_num, created, updated"
+)
+
+
+class OutboxItem(
+    namedtuple(
+        "OutboxItem",
+        "gateway trans_id command status attempts error error_num created updated",
+    )
+):
+    """
+    State of one billing command in an :class:`Outbox`; ``created`` and
+    ``updated`` are :func:`time.time` timestamps, ``error`` and
+    ``error_num`` describe the last failed attempt.
+    """
+
+    __slots__ = ()
+
+    @property
+    def done(self):
+        return self.status in (SENT, FAILED)
+
+
+def _gateway(device):
+    return device if isinstance(device, str) else device._gateway
+
+
+class Outbox:
+    """
+    Durable queue of PMS billing commands (``USER_PAYMENT`` and
+    ``USER_PURCHASE``), kept in a SQLite database and sent to their
+    gateways in the background.
+
+    :meth:`submit` only writes the command to the database, so the portal
+    can answer the guest at once; ``workers`` threads per device then send
+    the queued commands one at a time each, so the billing throughput
+    follows what the gateway accepts. Commands are deduplicated on their
+    gateway and ``TRANS_ID``, which every command must carry: submitting
+    the same charge twice queues it once.
+
+    A command the NSE answers with an error is failed; one that failed
+    with a :class:`ConnectError` is tried again after a growing delay,
+    until ``attempts`` is reached. One for a device closed while the
+    outbox runs waits for it to be opened again, using up no attempt. A
+    charge that reached the NSE without its answer coming back is sent
+    again with the same ``TRANS_ID``; items that were on their way when
+    the process stopped are sent again on the next :meth:`start`. A
+    command sent drops the cached responses of its device about the same
+    subscriber and room, as :meth:`Device.execute` does.
+
+    :param str path: SQLite database file, created if needed; one process
+      at a time may use it
+    :param devices: :class:`Device` instances to send the commands to;
+      :meth:`start` opens those that are not, and :meth:`close` closes
+      them again
+    :param int workers: commands in flight at once per device
+    :param int attempts: maximum number of attempts of a command
+    :param float backoff: delay before the second attempt, in seconds,
+      doubled for every further attempt
+    :param float max_backoff: upper bound of the delay
+    :param bool jitter: draw each delay uniformly between 0 and its bound
+    :param float poll_interval: seconds an idle worker waits at most before
+      looking for commands again
+    """
+
+    commands = (USER_PAYMENT, USER_PURCHASE)
+
+    def __init__(
+        self,
+        path,
+        devices=(),
+        workers=2,
+        attempts=10,
+        backoff=1.0,
+        max_backoff=300.0,
+        jitter=True,
+        poll_interval=0.5,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.path = path
+        self.devices = {_gateway(dev): dev for dev in devices}
+        self.workers = workers
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.poll_interval = poll_interval
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        # guards the database; notified when items are added or finished
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self._opened = []  # devices opened by start()
+
+    def __repr__(self):
+        return "Outbox(%s, %d devices)" % (self.path, len(self.devices))
+
+    def submit(self, device, command):
+        """
+        Queue ``command`` for ``device`` (a :class:`Device` or its
+        ``"host:port"``).
+
+        :returns: the :class:`OutboxItem` of the command, the one queued
+          earlier if its ``TRANS_ID`` was already submitted
+        :raises TypeError: ``command`` is not a PMS billing command, or is
+          invalid
+        :raises ValueError: ``command`` has no ``TRANS_ID``
+        """
+        if not isinstance(command, self.commands):
+            raise TypeError(
+                "Outbox takes %s commands, not %r"
+                % (" and ".join(cls._type for cls in self.commands), command)
+            )
+        body = command.to_bytes()
+        trans_id = command._input_data.get("TRANS_ID")
+        if isinstance(trans_id, dict):
+            trans_id = trans_id.get("VALUE")
+        if trans_id is None:
+            raise ValueError("%s needs a TRANS_ID to be deduplicated" % command._type)
+        gateway = _gateway(device)
+        # what the device's response cache must drop once it is sent
+        keys = json.dumps(sorted(command_keys(command)))
+        now = time.time()
+        with self._cond:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO outbox (gateway, trans_id, command, body,"
+                    " keys, status, next_attempt, created, updated)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        gateway,
+                        trans_id,
+                        command._type,
+                        body,
+                        keys,
+                        PENDING,
+                        now,
+                        now,
+                        now,
+                    ),
+                )
+            self._cond.notify_all()
+            return self._item(gateway, trans_id)
+
+    def status(self, device, trans_id):
+        """:returns: the :class:`OutboxItem` of a command, ``None`` if unknown"""
+        with self._cond:
+            return self._item(_gateway(device), trans_id)
+
+    def items(self, status=None):
+        """:returns: list of every :class:`OutboxItem`, or those in ``status``"""
+        query = "SELECT %s FROM outbox" % _COLUMNS
+        args = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            args = (status,)
+        with self._cond:
+            rows = self._db.execute(query + " ORDER BY id", args).fetchall()
+        return [OutboxItem(*row) for row in rows]
+
+    def stats(self):
+        """Number of items in every state, for monitoring."""
+        with self._cond:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        return {PENDING: 0, SENDING: 0, SENT: 0, FAILED: 0, **dict(rows)}
+
+    def drain(self, timeout=None):
+        """
+        Wait for every queued command of the devices to be sent or failed.
+
+        :returns: ``True`` if none is left, ``False`` at ``timeout``
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._unfinished():
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(1.0 if left is None else min(left, 1.0))
+            return True
+
+    def start(self):
+        """
+        Open the devices that are not and start the workers; items left on
+        their way are sent again.
+        """
+        if self._threads:
+            return self
+        for dev in self.devices.values():
+            if not dev.connected:
+                dev.open()
+                self._opened.append(dev)
+        with self._cond:
+            with self._db:
+                self._db.execute(
+                    "UPDATE outbox SET status = ? WHERE status = ?", (PENDING, SENDING)
+                )
+        self._stopping = False
+        for gateway, dev in self.devices.items():
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(gateway, dev),
+                    name="nseapi-outbox-%s-%d" % (gateway, i),
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop the workers once the commands they are sending are done."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def close(self):
+        """Stop the workers and close the devices :meth:`start` opened and
+        the database."""
+        self.stop()
+        for dev in self._opened:
+            dev.close()
+        self._opened = []
+        self._db.close()
+
+    def _item(self, gateway, trans_id):
+        row = self._db.execute(
+            "SELECT %s FROM outbox WHERE gateway = ? AND trans_id = ?" % _COLUMNS,
+            (gateway, trans_id),
+        ).fetchone()
+        return None if row is None else OutboxItem(*row)
+
+    def _unfinished(self):
+        gateways = list(self.devices)
+        return self._db.execute(
+            "SELECT COUNT(*) FROM outbox WHERE status IN (?, ?) AND gateway IN (%s)"
+            % ",".join("?" * len(gateways)),
+            (PENDING, SENDING, *gateways),
+        ).fetchone()[0]
+
+    def _claim(self, gateway):
+        """Mark the oldest command due for ``gateway`` as sending and return it."""
+        now = time.time()
+        row = self._db.execute(
+            "SELECT id, command, body, keys, attempts FROM outbox"
+            " WHERE gateway = ? AND status = ? AND next_attempt <= ?"
+            " ORDER BY id LIMIT 1",
+            (gateway, PENDING, now),
+        ).fetchone()
+        if row is not None:
+            with self._db:
+                self._db.execute(
+                    "UPDATE outbox SET status = ?, updated = ? WHERE id = ?",
+                    (SENDING, now, row[0]),
+                )
+        return row
+
+    def _idle_wait(self, gateway):
+        """Seconds until the next attempt due for ``gateway``, at most polling."""
+        due = self._db.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE gateway = ? AND status = ?",
+            (gateway, PENDING),
+        ).fetchone()[0]
+        if due is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, due - time.time()))
+
+    def _delay(self, attempt):
+        """Seconds to wait after the failed ``attempt`` (from 0)."""
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def _work(self, gateway, dev):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                item = self._claim(gateway)
+                if item is None:
+                    self._cond.wait(self._idle_wait(gateway))
+                    continue
+            self._send(dev, *item)
+
+    def _send(self, dev, item_id, command, body, keys, attempts):
+        status, next_attempt, error, error_num = SENT, 0, None, None
+        tried = attempts + 1
+        try:
+            try:
+                dev.execute(body, dev._command_timeouts.get(command))
+            finally:
+                # as Device.execute does for the command object
+                if dev.cache is not None:
+                    dev.cache.invalidate_keys(tuple(key) for key in json.loads(keys))
+        except nse_err.USGError as e:
+            status, error, error_num = FAILED, str(e), e.error_num
+        except nse_err.ConnectClosedError as e:
+            # the device was closed under the outbox: nothing was sent, so
+            # wait for it to be opened again without using up an attempt
+            status, error, tried = PENDING, str(e), attempts
+            next_attempt = time.time() + self.poll_interval
+        except nse_err.ConnectError as e:
+            error = str(e)
+            if tried >= self.attempts:
+                status = FAILED
+            else:
+                status = PENDING
+                next_attempt = time.time() + self._delay(attempts)
+            logger.debug("%s %d on %s failed: %s", command, item_id, dev, e)
+        except Exception as e:
+            logger.exception("%s %d on %s failed", command, item_id, dev)
+            status, error = FAILED, repr(e)
+        with self._cond:
+            with self._db:
+                self._db.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?,"
+                    " error = ?, error_num = ?, updated = ? WHERE id = ?",
+                    (
+                        status,
+                        tried,
+                        next_attempt,
+                        error,
+                        error_num,
+                        time.time(),
+                        item_id,
+                    ),
+                )
+            self._cond.notify_all()
+
+    # -----------------------------------------------------------------------
+    # Context Manager
+    # -----------------------------------------------------------------------
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.close()
+        except Exception as ex:
+            # exit should not raise any exception
+            logger.error("Close in context manager hit exception: {}".format(ex))
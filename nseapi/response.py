@@ -0,0 +1,106 @@
+import re
+from xml.parsers import expat
+
+from nseapi import exceptions as nse_err
+
+# a <USG .../> document with attributes only, which nearly every answer is;
+# values holding entities, single quotes or whitespace that XML normalizes
+# to spaces take the expat path instead, as do documents declaring an
+# encoding other than UTF-8
+_FLAT = re.compile(
+    rb"\s*(?:<\?xml(?:(?!encoding)[^>])*"
+    rb"""(?:encoding\s*=\s*["'](?i:utf-8)["'][^>]*)?\?>\s*)?"""
+    rb'<USG((?:\s+[\w.:-]+\s*=\s*"[^"<&\t\n\r]*")*)\s*/>\s*\Z'
+)
+_ATTR = re.compile(rb'([\w.:-]+)\s*=\s*"([^"]*)"')
+
+_keys = {}  # attribute name -> "@name", shared by all responses
+
+
+def _key(name):
+    key = _keys.get(name)
+    if key is None:
+        key = _keys[name] = "@" + name.decode("utf-8")
+    return key
+
+
+def decode(body):
+    """
+    Decode an NSE response body into the dict :func:`xmltodict.parse` builds
+    for its ``<USG>`` element: ``@``-prefixed attributes, child elements by
+    tag (a list when repeated) and element text as ``#text``, or the bare
+    text of an element without attributes or children.
+
+    Responses made of a bare ``<USG>`` tag are decoded without an XML
+    parser; others go through expat, straight from bytes, with handlers
+    that build the dicts directly.
+
+    :raises USGError: the response reads ``RESULT="ERROR"``
+    :raises ValueError: the document element is not ``<USG>``, or holds
+      text only
+    :raises xml.parsers.expat.ExpatError: the response is not well-formed
+    """
+    match = _FLAT.match(body)
+    if match is not None:
+        try:
+            data = {
+                _key(name): value.decode("utf-8")
+                for name, value in _ATTR.findall(match.group(1))
+            }
+        except UnicodeDecodeError:
+            data = None  # expat reports where the document is malformed
+        if data is not None:
+            if data.get("@RESULT") == "ERROR":
+                raise nse_err.USGError("Execute request failed", data)
+            return data
+
+    tag, data = _parse_tree(body)
+    if tag != "USG":
+        raise ValueError("not an NSE response: <%s>" % tag)
+    if data is None:
+        data = {}
+    elif not isinstance(data, dict):
+        raise ValueError("not an NSE response: <USG> holds text only")
+    if data.get("@RESULT") == "ERROR":
+        raise nse_err.USGError("Execute request failed", data)
+    return data
+
+
+def _parse_tree(body):
+    """The ``(tag, record)`` of the document element, built with expat."""
+    stack = []  # (tag, record, text parts) of the open elements
+    root = []
+
+    def start(tag, attrs):
+        record = {"@" + key: value for key, value in attrs.items()} if attrs else {}
+        stack.append((tag, record, []))
+
+    def end(_):
+        tag, record, parts = stack.pop()
+        text = "".join(parts).strip() if parts else ""
+        if not record:
+            record = text or None
+        elif text:
+            record["#text"] = text
+        if not stack:
+            root.append((tag, record))
+            return
+        parent = stack[-1][1]
+        if tag not in parent:
+            parent[tag] = record
+        elif type(parent[tag]) is list:
+            parent[tag].append(record)
+        else:
+            parent[tag] = [parent[tag], record]
+
+    def text(data):
+        if stack:
+            stack[-1][2].append(data)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+    parser.Parse(body, True)
+    return root[0]
@@ -0,0 +1,159 @@
+import datetime
+from collections.abc import Mapping
+
+from nseapi.types import MACAddress
+
+_UNITS = {
+    "SECONDS": "seconds",
+    "MINUTES": "minutes",
+    "HOURS": "hours",
+    "DAYS": "days",
+}
+
+
+def _text(value):
+    return value.get("#text") if isinstance(value, dict) else value
+
+
+def to_timedelta(value):
+    """An ``EXPIRY_TIME``-style value, seconds unless a ``UNITS`` says otherwise."""
+    units = "SECONDS"
+    if isinstance(value, dict):
+        units = str(value.get("@UNITS", units)).upper()
+    return datetime.timedelta(**{_UNITS.get(units, "seconds"): int(_text(value))})
+
+
+# how a response schema type is made from the response text
+CONVERTERS = {
+    datetime.timedelta: to_timedelta,
+    int: lambda value: int(_text(value)),
+    str: _text,
+    MACAddress: lambda value: MACAddress(_text(value)),
+}
+
+
+class Field:
+    """
+    A typed field of a :class:`Result`, converted from the response the
+    first time it is read.
+    """
+
+    __slots__ = ("name", "key", "convert")
+
+    def __init__(self, key, _type):
+        self.name = key.lower()
+        self.key = key
+        self.convert = CONVERTERS.get(_type, _type)
+
+    def __repr__(self):
+        return "Field(%s)" % self.key
+
+    def __get__(self, result, owner=None):
+        if result is None:
+            return self
+        typed = result._typed
+        if typed is None:
+            typed = result._typed = {}
+        try:
+            return typed[self.name]
+        except KeyError:
+            pass
+        value = result._lookup(self.key)
+        if value is not None:
+            value = self.convert(value)
+        typed[self.name] = value
+        return value
+
+
+class Result(Mapping):
+    """
+    Response of the NSE to a command.
+
+    Reads like the ``USG`` element dict of the response (``result["@RESULT"]``),
+    which it keeps as is. The subclass of each command type with a response
+    schema adds its fields as typed attributes, converted when first read,
+    e.g. ``result.mac_addr`` (:class:`MACAddress`) or ``result.expiry_time``
+    (:class:`datetime.timedelta`); a field missing from the response reads
+    ``None``.
+
+    Fields are looked up among the attributes and elements of ``<USG>``,
+    then of its child elements.
+    """
+
+    __slots__ = ("_raw", "_typed")
+
+    _type = None
+    _fields = ()
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._typed = None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self._raw)
+
+    def __getitem__(self, key):
+        return self._raw[key]
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    @property
+    def raw(self):
+        """The ``USG`` element dict of the response."""
+        return self._raw
+
+    @property
+    def result(self):
+        """The ``RESULT`` attribute, ``"OK"`` for a successful command."""
+        return self._raw.get("@RESULT")
+
+    @property
+    def ok(self):
+        return self._raw.get("@RESULT") == "OK"
+
+    def typed(self):
+        """Every field of the response schema, as a ``{name: value}`` dict."""
+        return {name: getattr(self, name) for name in self._fields}
+
+    def _lookup(self, key):
+        raw = self._raw
+        attr = "@" + key
+        if attr in raw:
+            return raw[attr]
+        if key in raw:
+            return raw[key]
+        for value in raw.values():
+            if isinstance(value, dict):
+                if attr in value:
+                    return value[attr]
+                if key in value:
+                    return value[key]
+        return None
+
+
+_classes = {}  # command class -> result class
+
+
+def result_class(command_cls):
+    """The :class:`Result` subclass for responses to ``command_cls``."""
+    try:
+        return _classes[command_cls]
+    except KeyError:
+        pass
+    schema = getattr(command_cls, "_response", None)
+    if not schema:
+        cls = Result
+    else:
+        fields = [Field(key, _type) for key, _type in schema.items()]
+        namespace = {field.name: field for field in fields}
+        namespace["__slots__"] = ()
+        namespace["_type"] = command_cls._type
+        namespace["_fields"] = tuple(field.name for field in fields)
+        name = command_cls._type.title().replace("_", "") + "Result"
+        cls = type(name, (Result,), namespace)
+    _classes[command_cls] = cls
+    return cls
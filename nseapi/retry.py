@@ -0,0 +1,87 @@
+import random
+import threading
+
+from nseapi import exceptions as nse_err
+
+# failures no retry can help with
+_PERMANENT_ERRORS = (
+    nse_err.CircuitOpenError,
+    nse_err.ConnectClosedError,
+    nse_err.DeadlineExceededError,
+    nse_err.ParseError,
+    nse_err.ProbeError,
+)
+
+# failures before the request reached the NSE, always safe to retry
+_NOT_SENT_ERRORS = (nse_err.ConnectRefusedError, nse_err.ConnectUnknownHostError)
+
+
+class RetryPolicy:
+    """
+    Retries of failed round trips, for use as ``Device(retry=...)``.
+
+    Only connection failures (:class:`ConnectError`) are retried, never
+    :class:`USGError` answers. Query commands are retried after any
+    connection failure; other commands only when the request cannot have
+    reached the NSE (connection refused, unknown host), since the gateway
+    may have applied a request it failed to answer.
+
+    :param int attempts: maximum number of attempts, the first included
+    :param float backoff: delay before the first retry, in seconds, doubled
+      for every further retry
+    :param float max_backoff: upper bound of the delay
+    :param bool jitter: draw each delay uniformly between 0 and its bound,
+      so that clients failing together do not retry together
+    :param bool retry_mutations: retry every command like a query
+    """
+
+    def __init__(
+        self,
+        attempts=3,
+        backoff=0.1,
+        max_backoff=2.0,
+        jitter=True,
+        retry_mutations=False,
+    ):
+        if attempts < 1:
+            raise ValueError("attempts must be at least 1")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_mutations = retry_mutations
+        self._lock = threading.Lock()
+        # counters
+        self.retries = 0
+
+    def __repr__(self):
+        return "RetryPolicy(attempts=%d, backoff=%s)" % (self.attempts, self.backoff)
+
+    def stats(self):
+        with self._lock:
+            return {"retries": self.retries}
+
+    def delay(self, attempt, error, readonly=False):
+        """
+        Seconds to wait before retrying after ``error``.
+
+        :param int attempt: number of the failed attempt, from 0
+        :param error: exception the attempt failed with
+        :param bool readonly: whether the command is a query
+
+        :returns: the delay, or ``None`` if the command must not be retried
+        """
+        if attempt + 1 >= self.attempts:
+            return None
+        if not isinstance(error, nse_err.ConnectError):
+            return None
+        if isinstance(error, _PERMANENT_ERRORS):
+            return None
+        if not (readonly or self.retry_mutations) and not isinstance(
+            error, _NOT_SENT_ERRORS
+        ):
+            return None
+        with self._lock:
+            self.retries += 1
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        return random.uniform(0, delay) if self.jitter else delay
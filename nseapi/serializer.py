@@ -0,0 +1,112 @@
+import re
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>\n'
+
+_NEEDS_ESCAPE = re.compile(r'[&<>"\n\r\t]')
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans(
+    {
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        '"': "&quot;",
+        "\n": "&#10;",
+        "\r": "&#13;",
+        "\t": "&#9;",
+    }
+)
+
+
+def escape_text(value):
+    """Escape ``value`` for use as element text."""
+    value = str(value)
+    if _NEEDS_ESCAPE.search(value) is None:
+        return value
+    return value.translate(_TEXT_ESCAPES)
+
+
+def escape_attr(value):
+    """Escape ``value`` for use inside a double-quoted attribute."""
+    value = str(value)
+    if _NEEDS_ESCAPE.search(value) is None:
+        return value
+    return value.translate(_ATTR_ESCAPES)
+
+
+def spec_fields(spec):
+    """
+    Field layout of a command spec: attribute names, then element names.
+
+    This is also the order positional command arguments are mapped in.
+    """
+    return tuple(
+        dict.fromkeys(
+            [*spec.get("attributes", {}), *spec.get("elements", {})],
+        )
+    )
+
+
+def compile_spec(_type, spec):
+    """
+    Compile a command spec into a serializer.
+
+    Everything that only depends on the spec (tag names, attribute
+    prefixes, fixed attribute values) is rendered once here, so the
+    returned function only has to escape the input values.
+
+    :param str _type: the command name (``COMMAND`` attribute)
+    :param dict spec: the command spec, see ``nseapi.commands.options``
+
+    :returns: function taking the validated input values of a command, laid
+      out as :func:`spec_fields` with ``None`` for unset fields, and
+      returning the compact UTF-8 encoded ``<USG>`` document
+    """
+    index = {key: i for i, key in enumerate(spec_fields(spec))}
+    head = f'{XML_DECLARATION}<USG COMMAND="{escape_attr(_type)}"'
+
+    attributes = []
+    for key, attr_spec in spec.get("attributes", {}).items():
+        if "value" in attr_spec:
+            fixed = f' {key}="{escape_attr(attr_spec["value"])}"'
+        else:
+            fixed = None
+        attributes.append((index[key], f' {key}="', fixed))
+
+    elements = []
+    for key, elem_spec in spec.get("elements", {}).items():
+        sub_keys = tuple(elem_spec.get("attributes", {}))
+        elements.append((index[key], f"<{key}", f"</{key}>", sub_keys))
+
+    def serialize(values):
+        parts = [head]
+        append = parts.append
+        for i, prefix, fixed in attributes:
+            value = values[i]
+            if value is not None:
+                append(prefix)
+                append(escape_attr(value))
+                append('"')
+            elif fixed is not None:
+                append(fixed)
+        append(">")
+        for i, open_tag, close_tag, sub_keys in elements:
+            value = values[i]
+            if value is None:
+                continue
+            append(open_tag)
+            if isinstance(value, dict):
+                # spec attributes first, then any extra ones in input order
+                for attr_key in sub_keys:
+                    if attr_key in value:
+                        append(f' {attr_key}="{escape_attr(value[attr_key])}"')
+                for attr_key, attr_value in value.items():
+                    if attr_key != "VALUE" and attr_key not in sub_keys:
+                        append(f' {attr_key}="{escape_attr(attr_value)}"')
+                value = value.get("VALUE", "")
+            append(">")
+            append(escape_text(value))
+            append(close_tag)
+        append("</USG>")
+        return "".join(parts).encode("utf-8")
+
+    return serialize
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls: while a call for a key is in
+    flight, callers asking for the same key wait for it and share its
+    result (or its exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        # counters
+        self.calls = 0
+        self.deduplicated = 0
+
+    def __repr__(self):
+        return "SingleFlight(%d in flight)" % (len(self._calls) + len(self._tasks))
+
+    def stats(self):
+        """Calls made and calls saved by sharing, for monitoring."""
+        with self._lock:
+            return {"calls": self.calls, "deduplicated": self.deduplicated}
+
+    def do(self, key, fn, deadline=None):
+        """
+        Return ``fn()``, shared with concurrent ``do()`` calls for ``key``.
+
+        :param float deadline: :func:`time.monotonic` time to stop waiting
+          for a shared call at, raising :class:`TimeoutError`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            left = None if deadline is None else deadline - time.monotonic()
+            if not call.done.wait(left):
+                raise TimeoutError("shared call still running at the deadline")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coro_fn, deadline=None):
+        """
+        Return ``await coro_fn()``, shared with concurrent ``do_async()`` calls
+        for ``key``.
+
+        The shared call runs in its own task, so cancelling one of the
+        waiting callers, or its ``deadline`` passing (raising
+        :class:`asyncio.TimeoutError`), does not cancel it for the others.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(coro_fn())
+                task.add_done_callback(lambda _: self._tasks.pop(key, None))
+                self.calls += 1
+            else:
+                self.deduplicated += 1
+        if deadline is None:
+            return await asyncio.shield(task)
+        left = max(0.0, deadline - time.monotonic())
+        return await asyncio.wait_for(asyncio.shield(task), left)
@@ -0,0 +1,109 @@
+from xml.parsers import expat
+
+from nseapi import exceptions as nse_err
+
+
+def merge(attributes, records):
+    """
+    Build the dict of an element from its attributes and its child
+    ``(tag, record)`` tuples, the way :func:`xmltodict.parse` does.
+    """
+    data = {"@" + key: value for key, value in attributes.items()}
+    for tag, record in records:
+        if tag not in data:
+            data[tag] = record
+        elif isinstance(data[tag], list):
+            data[tag].append(record)
+        else:
+            data[tag] = [data[tag], record]
+    return data
+
+
+class RecordParser:
+    """
+    Incremental parser splitting a ``<USG>`` response into records.
+
+    Feed it the response body in chunks; every element at ``depth`` below
+    ``<USG>`` (1: its children) is returned as a ``(tag, record)`` tuple as
+    soon as its end tag was parsed, then forgotten. Records have the shape
+    :meth:`Device.execute` results have: ``@``-prefixed attributes, child
+    elements by tag (a list when repeated) and text as ``#text``, or the
+    bare text for an element without attributes or children.
+
+    Only the element being built is held in memory, so memory use does not
+    grow with the size of the response.
+
+    :raises USGError: at :meth:`close` if the response reads
+      ``RESULT="ERROR"``; its records are held back until then
+    :raises xml.parsers.expat.ExpatError: the response is not well-formed
+    """
+
+    def __init__(self, depth=1):
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.depth = depth
+        self.tag = None  # of the document element, <USG>
+        self.attributes = None
+        self.error = False
+        self._level = 0
+        self._stack = []  # [tag, record, text parts] of the open elements
+        self._records = []
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._text
+        self._parser = parser
+
+    def feed(self, data):
+        """Parse a chunk of the response; the records it completed."""
+        self._parser.Parse(data, False)
+        if self.error:
+            return []
+        records, self._records = self._records, []
+        return records
+
+    def close(self):
+        """Finish parsing; the last records."""
+        self._parser.Parse(b"", True)
+        records, self._records = self._records, []
+        if self.error:
+            data = merge(self.attributes, records)
+            raise nse_err.USGError("Execute request failed", data)
+        return records
+
+    def _start(self, tag, attrs):
+        level = self._level
+        self._level += 1
+        if level == 0:
+            self.tag = tag
+            self.attributes = attrs
+            self.error = attrs.get("RESULT") == "ERROR"
+        elif level >= self.depth:
+            record = {"@" + key: value for key, value in attrs.items()}
+            self._stack.append([tag, record, []])
+
+    def _end(self, tag):
+        self._level -= 1
+        if self._level < self.depth:
+            return
+        tag, record, parts = self._stack.pop()
+        text = "".join(parts).strip()
+        if not record:
+            record = text or None
+        elif text:
+            record["#text"] = text
+        if not self._stack:
+            self._records.append((tag, record))
+            return
+        parent = self._stack[-1][1]
+        if tag not in parent:
+            parent[tag] = record
+        elif isinstance(parent[tag], list):
+            parent[tag].append(record)
+        else:
+            parent[tag] = [parent[tag], record]
+
+    def _text(self, data):
+        if self._stack:
+            self._stack[-1][2].append(data)
@@ -0,0 +1,619 @@
+import logging
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.parsers.expat import ExpatError
+from xml.sax.saxutils import escape, quoteattr
+
+from nseapi.exceptions import ERROR_DESCRIPTIONS, USGError
+from nseapi.response import decode
+from nseapi.types import MACAddress
+
+logger = logging.getLogger(__name__)
+
+_SECONDS = {"SECONDS": 1, "MINUTES": 60, "HOURS": 3600, "DAYS": 86400}
+
+
+class _Fail(Exception):
+    """Answer the command with USG error ``num``."""
+
+    def __init__(self, num):
+        super().__init__(num)
+        self.num = num
+
+
+def _text(value):
+    return value.get("#text") if isinstance(value, dict) else value
+
+
+def _element(tag, attributes=None, children=()):
+    """
+    XML text of an element.
+
+    :param dict attributes: ``{name: value}``, ``None`` values left out
+    :param children: ``(tag, text)`` or ``(tag, text, attributes)`` tuples
+      of the child elements, ``None`` texts left out
+    """
+    attrs = "".join(
+        f" {key}={quoteattr(str(value))}"
+        for key, value in (attributes or {}).items()
+        if value is not None
+    )
+    body = "".join(
+        f"<{child[0]}"
+        + "".join(
+            f" {k}={quoteattr(str(v))}" for k, v in (child[2:] or [{}])[0].items()
+        )
+        + f">{escape(str(child[1]))}</{child[0]}>"
+        for child in children
+        if child[1] is not None
+    )
+    return f"<{tag}{attrs}>{body}</{tag}>" if body else f"<{tag}{attrs}/>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.nse._count("connections")
+
+    def do_POST(self):
+        request = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.split("?")[0] != FakeNSE.path:
+            self.send_error(404)
+            return
+        body = self.server.nse.handle(request)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeNSE:
+    """
+    In-process stand-in for an NSE, for tests and load tests without a
+    gateway or network.
+
+    Serves ``/usg/command.xml`` over HTTP/1.1 on localhost and answers the
+    commands of :mod:`nseapi.commands` from in-memory subscriber, device
+    and room tables: a subscriber added with ``ADD_USER`` can be queried,
+    authorized, given bandwidth and deleted, and commands on unknown users,
+    MAC addresses or rooms fail with the USG error the NSE reports (see
+    :data:`nseapi.exceptions.ERROR_DESCRIPTIONS`).
+
+    :param int port: port to listen on, any free one by default
+    :param float latency: seconds every command takes to process
+    :param float jitter: up to this many more seconds, drawn uniformly
+    :param float error_rate: share of commands failing at random with
+      error 207 (AAA internal error), leaving the tables as they were
+    :param int max_concurrency: commands processed at the same time;
+      further ones wait their turn (``None``: no limit)
+    :param int max_subscribers: subscribers the table holds before
+      additions fail with error 205
+    :param rooms: room numbers of the property; commands naming another
+      room fail with error 200 (``None``: any room exists)
+    :param int seed: seed of the jitter and error draws
+
+    Usage::
+
+        with FakeNSE(latency=0.005, jitter=0.01) as nse:
+            with Device("127.0.0.1", port=nse.port) as dev:
+                dev.execute(ADD_USER(mac, user_name="guest"))
+    """
+
+    path = "/usg/command.xml"
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        max_concurrency=None,
+        max_subscribers=None,
+        rooms=None,
+        seed=None,
+    ):
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_subscribers = max_subscribers
+        self._port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self._server = None
+        self._thread = None
+        # tables
+        self.subscribers = {}  # MACAddress -> {field: text}
+        self.devices = {}  # MACAddress -> {field: text}
+        self.groups = {}  # user name -> {field: text}
+        self.access_codes = {}  # code -> {field: text}
+        self.rooms = {}  # room number -> access mode
+        self.transactions = []  # (command, {field: text}) of payments and charges
+        self._known_rooms = None if rooms is None else {str(r) for r in rooms}
+        # counters
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.commands = {}  # COMMAND -> count
+
+    def __repr__(self):
+        return "FakeNSE(%s:%s)" % (self.host, self.port)
+
+    @property
+    def port(self):
+        if self._server is not None:
+            return self._server.server_address[1]
+        return self._port
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def start(self):
+        """Listen and serve from a background thread."""
+        server = ThreadingHTTPServer((self.host, self._port), _Handler)
+        server.daemon_threads = True
+        server.nse = self
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "requests": self.requests,
+                "errors": self.errors,
+                "commands": dict(self.commands),
+                "subscribers": len(self.subscribers),
+            }
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def handle(self, body):
+        """
+        Process one request body, as the HTTP endpoint does, and return
+        the response body.
+        """
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            delay = self.latency
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            return self._answer(body)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def _answer(self, body):
+        self._count("requests")
+        try:
+            data = decode(body)
+        except (ExpatError, ValueError, USGError):
+            return self._error(100)
+        command = data.get("@COMMAND")
+        with self._lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+        handler = self._HANDLERS.get(command)
+        if handler is None:
+            return self._error(101)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._error(207)
+        try:
+            with self._lock:
+                answer = handler(self, data)
+        except _Fail as e:
+            return self._error(e.num)
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n' + answer).encode("utf-8")
+
+    def _error(self, num):
+        with self._lock:
+            self.errors += 1
+        attributes = {
+            "RESULT": "ERROR",
+            "ERROR_NUM": num,
+            "ERROR_DESC": ERROR_DESCRIPTIONS.get(num, "Unknown error"),
+        }
+        return _element("USG", attributes).encode("utf-8")
+
+    # ---- request fields ----
+
+    @staticmethod
+    def _field(data, key, required=None):
+        """
+        Text of the attribute or element ``key`` of a request.
+
+        :param str required: ``"attribute"`` or ``"element"``, to fail with
+          error 102 or 103 respectively if the field is missing
+        """
+        value = data.get("@" + key)
+        if value is None:
+            value = _text(data.get(key))
+        if value is None and required is not None:
+            raise _Fail(102 if required == "attribute" else 103)
+        return value
+
+    @classmethod
+    def _mac(cls, data, key="MAC_ADDR", required="element"):
+        value = cls._field(data, key, required)
+        if value is None:
+            return None
+        try:
+            return MACAddress(value)
+        except (TypeError, ValueError):
+            raise _Fail(100)
+
+    @staticmethod
+    def _fields(data, skip=()):
+        """``{field: text}`` of every attribute and element of the request."""
+        fields = {}
+        for key, value in data.items():
+            name = key.lstrip("@")
+            if name in skip or name == "COMMAND":
+                continue
+            fields[name] = _text(value)
+        return fields
+
+    @staticmethod
+    def _expiry(data):
+        """Monotonic time an ``EXPIRY_TIME`` element ends at, if any."""
+        value = data.get("EXPIRY_TIME")
+        if value is None:
+            return None
+        units = value.get("@UNITS", "SECONDS") if isinstance(value, dict) else "SECONDS"
+        try:
+            seconds = int(_text(value)) * _SECONDS[units.upper()]
+        except (KeyError, TypeError, ValueError):
+            raise _Fail(100)
+        return time.monotonic() + seconds
+
+    def _room(self, room):
+        if room is not None and self._known_rooms is not None:
+            if room not in self._known_rooms:
+                raise _Fail(200)
+        return room
+
+    # ---- tables ----
+
+    def _subscriber(self, mac):
+        subscriber = self.subscribers.get(mac)
+        if subscriber is None:
+            raise _Fail(202)
+        return subscriber
+
+    def _by_user(self, data):
+        """The MAC and record of the ``<USER ID_TYPE=...>`` of a request."""
+        user = data.get("USER")
+        name = _text(user)
+        if name is None:
+            raise _Fail(103)
+        id_type = (
+            user.get("@ID_TYPE", "MAC_ADDR") if isinstance(user, dict) else "MAC_ADDR"
+        )
+        if id_type.upper() == "USER_NAME":
+            for mac, subscriber in self.subscribers.items():
+                if subscriber.get("USER_NAME") == name:
+                    return mac, subscriber
+            raise _Fail(201)
+        try:
+            mac = MACAddress(name)
+        except ValueError:
+            raise _Fail(100)
+        return mac, self._subscriber(mac)
+
+    def _add_subscriber(self, mac, fields, expires):
+        name = fields.get("USER_NAME")
+        if name is not None:
+            for other, subscriber in self.subscribers.items():
+                if other != mac and subscriber.get("USER_NAME") == name:
+                    raise _Fail(204)
+        if mac not in self.subscribers and self.max_subscribers is not None:
+            if len(self.subscribers) >= self.max_subscribers:
+                raise _Fail(205)
+        self._room(fields.get("ROOM_NUMBER"))
+        subscriber = self.subscribers.setdefault(mac, {"AUTHORIZED": False})
+        subscriber.update(fields)
+        if expires is not None:
+            subscriber["EXPIRES"] = expires
+        return subscriber
+
+    @staticmethod
+    def _ok(attributes=None, children=()):
+        return _element("USG", {"RESULT": "OK", **(attributes or {})}, children)
+
+    @staticmethod
+    def _subscriber_info(mac, subscriber):
+        """Answer to a query: the ``<SUBSCRIBER>`` record of ``mac``."""
+        children = [
+            (key, value)
+            for key, value in subscriber.items()
+            if key not in ("AUTHORIZED", "EXPIRES", "PASSWORD", "EXPIRY_TIME")
+        ]
+        expires = subscriber.get("EXPIRES")
+        if expires is not None:
+            left = max(0, int(expires - time.monotonic()))
+            children.append(("EXPIRY_TIME", left, {"UNITS": "SECONDS"}))
+        info = _element("SUBSCRIBER", {"MAC_ADDR": "%012X" % int(mac)}, children)
+        return '<USG RESULT="OK">' + info + "</USG>"
+
+    # ---- commands ----
+
+    def _subscriber_add(self, data):
+        mac = self._mac(data, required="attribute")
+        fields = self._fields(data, skip=("MAC_ADDR",))
+        self._add_subscriber(mac, fields, self._expiry(data))
+        return self._ok()
+
+    def _device_add(self, data):
+        mac = self._mac(data, required="attribute")
+        self.devices[mac] = self._fields(data, skip=("MAC_ADDR",))
+        return self._ok()
+
+    def _device_delete(self, data):
+        mac = self._mac(data, required="attribute")
+        if self.devices.pop(mac, None) is None:
+            raise _Fail(202)
+        return self._ok()
+
+    def _group_add(self, data):
+        name = self._field(data, "USER_NAME", "element")
+        if name in self.groups:
+            raise _Fail(204)
+        self.groups[name] = self._fields(data)
+        return self._ok()
+
+    def _access_code_add(self, data):
+        code = self._field(data, "USER_NAME", "element")
+        if code in self.access_codes:
+            raise _Fail(204)
+        self.access_codes[code] = self._fields(data)
+        return self._ok()
+
+    def _user_delete(self, data):
+        mac, _ = self._by_user(data)
+        del self.subscribers[mac]
+        return self._ok()
+
+    def _user_query(self, data):
+        return self._subscriber_info(*self._by_user(data))
+
+    def _subscriber_query_current(self, data):
+        mac = self._mac(data)
+        return self._subscriber_info(mac, self._subscriber(mac))
+
+    def _subscriber_query_auth(self, data):
+        if self._field(data, "MAC_ADDR") is not None:
+            mac = self._mac(data)
+            subscriber = self._subscriber(mac)
+        else:
+            name = self._field(data, "USER_NAME", "element")
+            data = {"USER": {"@ID_TYPE": "USER_NAME", "#text": name}}
+            mac, subscriber = self._by_user(data)
+        if not subscriber["AUTHORIZED"]:
+            raise _Fail(206)
+        return self._subscriber_info(mac, subscriber)
+
+    def _cache_update(self, data):
+        self._subscriber(self._mac(data, required="attribute"))["AUTHORIZED"] = True
+        return self._ok()
+
+    def _user_authorize(self, data):
+        subscriber = self._subscriber(self._mac(data, required="attribute"))
+        if subscriber["AUTHORIZED"]:
+            raise _Fail(209)
+        subscriber["AUTHORIZED"] = True
+        return self._ok()
+
+    def _set_bandwidth(self, data):
+        subscriber = self._subscriber(self._mac(data, "SUBSCRIBER", "attribute"))
+        subscriber.update(self._fields(data, skip=("SUBSCRIBER",)))
+        return self._ok()
+
+    def _radius_login(self, data):
+        name = self._field(data, "SUB_USER_NAME", "element")
+        password = self._field(data, "SUB_PASSWORD")
+        self._mac(data, "SUB_MAC_ADDR")
+        for subscriber in self.subscribers.values():
+            if subscriber.get("USER_NAME") == name:
+                break
+        else:
+            raise _Fail(300)
+        if subscriber.get("PASSWORD") not in (None, password):
+            raise _Fail(301)
+        subscriber["AUTHORIZED"] = True
+        return self._ok()
+
+    def _radius_logout(self, data):
+        name = self._field(data, "SUB_USER_NAME", "element")
+        for subscriber in self.subscribers.values():
+            if subscriber.get("USER_NAME") == name:
+                subscriber["AUTHORIZED"] = False
+                return self._ok()
+        raise _Fail(300)
+
+    def _user_payment(self, data):
+        if (self._field(data, "PAYMENT_METHOD") or "PMS").upper() != "PMS":
+            raise _Fail(303)
+        mac = self._mac(data)
+        fields = self._fields(data, skip=("MAC_ADDR",))
+        subscriber = self._add_subscriber(mac, fields, self._expiry(data))
+        subscriber["AUTHORIZED"] = True
+        self.transactions.append(("USER_PAYMENT", fields))
+        return self._ok()
+
+    def _user_purchase(self, data):
+        self._room(self._field(data, "ROOM_NUMBER", "attribute"))
+        self.transactions.append(("USER_PURCHASE", self._fields(data)))
+        return self._ok()
+
+    def _pms_pending_transaction(self, data):
+        self._field(data, "DATA", "element")
+        self.transactions.append(("PMS_PENDING_TRANSACTION", self._fields(data)))
+        return self._ok()
+
+    def _room_set_access(self, data):
+        room = self._room(self._field(data, "ROOM_NUMBER", "attribute"))
+        self.rooms[room] = self._field(data, "ACCESS_MODE", "element")
+        return self._ok()
+
+    def _room_query_access(self, data):
+        room = self._room(self._field(data, "ROOM_NUMBER", "element"))
+        if room not in self.rooms:
+            raise _Fail(200)
+        return self._ok({"ROOM_NUMBER": room}, [("ACCESS_MODE", self.rooms[room])])
+
+    _HANDLERS = {
+        "SUBSCRIBER_ADD": _subscriber_add,
+        "DEVICE_ADD": _device_add,
+        "DEVICE_DELETE": _device_delete,
+        "GROUP_ADD": _group_add,
+        "ACCESS_CODE_ADD": _access_code_add,
+        "USER_DELETE": _user_delete,
+        "USER_QUERY": _user_query,
+        "SUBSCRIBER_QUERY_CURRENT": _subscriber_query_current,
+        "SUBSCRIBER_QUERY_AUTH": _subscriber_query_auth,
+        "CACHE_UPDATE": _cache_update,
+        "USER_AUTHORIZE": _user_authorize,
+        "SET_BANDWIDTH_UP": _set_bandwidth,
+        "SET_BANDWIDTH_DOWN": _set_bandwidth,
+        "SET_BANDWIDTH_MAX_UP": _set_bandwidth,
+        "SET_BANDWIDTH_MAX_DOWN": _set_bandwidth,
+        "RADIUS_LOGIN": _radius_login,
+        "RADIUS_LOGOUT": _radius_logout,
+        "USER_PAYMENT": _user_payment,
+        "USER_PURCHASE": _user_purchase,
+        "PMS_PENDING_TRANSACTION": _pms_pending_transaction,
+        "ROOM_SET_ACCESS": _room_set_access,
+        "ROOM_QUERY_ACCESS": _room_query_access,
+    }
+
+    # -----------------------------------------------------------------------
+    # Context Manager
+    # -----------------------------------------------------------------------
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.stop()
+        except Exception as ex:
+            # exit should not raise any exception
+            logger.error("Stop in context manager hit exception: {}".format(ex))
+
+
+def free_port(host="127.0.0.1"):
+    """A TCP port of ``host`` nothing listens on, for unreachable gateways."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        request = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.record:
+            self.server.requests.append(request)
+        body = self.server.response
+        if callable(body):
+            body = body(request)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubNSE(ThreadingHTTPServer):
+    """
+    Local stand-in NSE answering every command with ``response``, without
+    looking at it, for transport tests and benchmarks that
+    :class:`FakeNSE` would slow down.
+
+    :param response: the response body, or a callable taking the request
+      body and returning it; may be changed while serving
+    :param bool record: keep the request bodies in ``requests``
+
+    ``connections`` counts the connections accepted.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        response=b'<?xml version="1.0"?><USG RESULT="OK"/>',
+        host="127.0.0.1",
+        port=0,
+        record=True,
+    ):
+        super().__init__((host, port), _StubHandler)
+        self.response = response
+        self.record = record
+        self.requests = []
+        self.connections = 0
+        self._thread = None
+
+    def __repr__(self):
+        return "StubNSE(%s:%s)" % self.server_address[:2]
+
+    def start(self):
+        """Serve from a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
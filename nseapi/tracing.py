@@ -0,0 +1,97 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """
+    A command sent by :meth:`Device.execute`, as handed to the hooks of a
+    :class:`Tracer`. The same span goes through every hook of one command,
+    retries included; ``data`` is free for the tracer to keep its own state
+    in, such as the span object of a tracing library.
+    """
+
+    __slots__ = (
+        "command",
+        "host",
+        "port",
+        "attempt",
+        "start",
+        "request_bytes",
+        "response_bytes",
+        "seconds",
+        "retry_delay",
+        "result",
+        "error",
+        "data",
+    )
+
+    def __init__(self, command, host, port, request_bytes):
+        # the COMMAND of the request, e.g. "SUBSCRIBER_ADD"
+        self.command = command
+        self.host = host
+        self.port = port
+        self.attempt = 0  # counted from 0
+        self.start = None  # time.perf_counter() of the attempt
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.seconds = None  # taken by the attempt, limiter wait included
+        self.retry_delay = None  # before the next attempt, None for none
+        self.result = None
+        self.error = None
+        self.data = {}
+
+    def __repr__(self):
+        return "Span(%s %s:%s attempt=%d)" % (
+            self.command,
+            self.host,
+            self.port,
+            self.attempt,
+        )
+
+    @property
+    def error_num(self):
+        """
+        :returns: the error number of a :class:`USGError` answer, if any
+        """
+        return getattr(self.error, "error_num", None)
+
+
+class Tracer:
+    """
+    Callbacks around the round trips of :meth:`Device.execute`; subclass it
+    and override the hooks needed, then pass an instance to a device as
+    ``tracer=``.
+
+    The hooks run in the thread and :mod:`contextvars` context of the
+    caller of ``execute``, so the current span of a tracing library (such
+    as OpenTelemetry) is the parent of the command. :meth:`Device.execute_many`,
+    :class:`~nseapi.fleet.Fleet` and asyncio tasks carry that context over.
+
+    Answers from the response cache and queries coalesced with one already
+    in flight make no round trip and are not traced. An exception raised
+    by a hook is logged and ignored.
+    """
+
+    def before_send(self, span):
+        """Called before every attempt to send the command."""
+
+    def after_send(self, span):
+        """Called when an attempt got a response, before it is parsed."""
+
+    def on_parse(self, span):
+        """Called with the parsed response in ``span.result``."""
+
+    def on_error(self, span):
+        """
+        Called when an attempt failed, with the exception in ``span.error``;
+        ``span.retry_delay`` is ``None`` if the command is not retried.
+        """
+
+
+def call(hook, span):
+    """Call a :class:`Tracer` hook, logging what it raises."""
+    try:
+        hook(span)
+    except Exception:
+        logger.exception("Tracer hook %s failed", getattr(hook, "__name__", hook))
@@ -0,0 +1,806 @@
+import asyncio
+import collections
+import http.client
+import logging
+import select
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# errors raised writing to a kept-alive connection the NSE already closed
+# on its side; the request did not reach the NSE, so it is safe to send again
+_STALE_ERRORS = (
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+
+class PoolTimeoutError(Exception):
+    """
+    Generated if no connection became available within the pool wait time
+    """
+
+
+class TransportError(Exception):
+    """
+    Generated if the NSE answers with a non-200 HTTP status
+    """
+
+    def __init__(self, status, reason):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+def is_connection_dropped(conn):
+    """
+    Check whether an idle connection was closed by the peer.
+
+    An idle HTTP/1.1 connection should never be readable; a readable socket
+    means either EOF (the NSE closed it) or stray data, both unusable.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        if hasattr(select, "poll"):
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)
+            return bool(poller.poll(0))
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def request_head(host, port, path, headers):
+    """The bytes every POST to ``path`` starts with, up to ``Content-Length``."""
+    return (
+        f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    ).encode("latin-1")
+
+
+def parse_head(head):
+    """
+    Parse the status line and headers of an HTTP/1.x response.
+
+    :param bytes head: the response up to the blank line ending its headers
+    :returns: ``(status, reason, headers, will_close)`` tuple, with
+      lower-cased header names
+    """
+    status_line, *lines = head.decode("latin-1").split("\r\n")
+    version, status, reason = (status_line.split(" ", 2) + [""])[:3]
+    if not version.startswith("HTTP/") or not status.isdigit():
+        raise http.client.BadStatusLine(status_line)
+    headers = {}
+    for line in lines:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    connection = headers.get("connection", "").lower()
+    will_close = connection == "close" or (
+        version == "HTTP/1.0" and connection != "keep-alive"
+    )
+    return int(status), reason, headers, will_close
+
+
+def parse_content_length(headers):
+    """The ``Content-Length`` of a response, checked to be a byte count."""
+    value = headers["content-length"]
+    if not value.isdecimal():
+        raise http.client.HTTPException("invalid Content-Length %r" % value)
+    return int(value)
+
+
+def parse_chunk_size(line):
+    """The size of a chunk of a chunked response, from its size ``line``."""
+    size = bytes(line).split(b";")[0].strip()
+    if not size or size.strip(b"0123456789abcdefABCDEF"):
+        raise http.client.HTTPException("invalid chunk size %r" % size)
+    return int(size, 16)
+
+
+class Connection:
+    """
+    Persistent HTTP/1.1 connection to the NSE XML endpoint.
+
+    A request goes out as three buffers, the request head shared by every
+    connection of a pool, its ``Content-Length`` line and the command
+    bytes, handed to the kernel in one ``sendmsg`` call without joining
+    them. Responses are read with ``recv_into`` into a buffer the
+    connection owns and reuses from call to call; only the body is copied
+    out of it, and bodies larger than the buffer are read straight into
+    their own.
+
+    :param bytes head: request head, see :func:`request_head`
+    :param int bufsize: initial size of the receive buffer
+    """
+
+    def __init__(self, host, port, timeout=None, head=b"", bufsize=16384):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.head = head
+        self.sock = None
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        self._pos = self._end = 0  # unread part of the buffer
+
+    def __repr__(self):
+        return "Connection(%s:%s)" % (self.host, self.port)
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        sock, self.sock = self.sock, None
+        self._pos = self._end = 0
+        if sock is not None:
+            sock.close()
+
+    def send(self, body):
+        """Send a POST request with ``body``, a bytes-like object."""
+        if self.sock is None:
+            self.connect()
+        buffers = [self.head, b"Content-Length: %d\r\n\r\n" % len(body), body]
+        sock = self.sock
+        if not hasattr(sock, "sendmsg"):
+            sock.sendall(b"".join(buffers))
+            return
+        while True:
+            sent = sock.sendmsg(buffers)
+            # short write: go on from where the kernel stopped
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                del buffers[0]
+            if not buffers:
+                return
+            buffers[0] = memoryview(buffers[0])[sent:]
+
+    def read_head(self):
+        """
+        Read the status line and headers of the response.
+
+        :returns: ``(status, reason, headers, will_close)`` tuple, see
+          :func:`parse_head`
+        """
+        try:
+            head = self._read_until(b"\r\n\r\n")
+        except http.client.IncompleteRead as e:
+            if e.partial:
+                raise
+            raise http.client.RemoteDisconnected(
+                "Remote end closed connection without response"
+            )
+        return parse_head(head)
+
+    def read_response(self):
+        """
+        Read one response.
+
+        :returns: ``(status, reason, body, will_close)`` tuple
+        """
+        status, reason, headers, will_close = self.read_head()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = bytearray()
+            for piece in self._iter_chunked(None):
+                body += piece
+        elif "content-length" in headers:
+            body = self._read_exact(parse_content_length(headers))
+        else:
+            body = bytearray(self._view[self._pos : self._end])
+            self._pos = self._end
+            while self._fill():
+                body += self._view[self._pos : self._end]
+                self._pos = self._end
+            will_close = True
+        return status, reason, body, will_close
+
+    def iter_body(self, headers, chunk_size=65536):
+        """
+        Yield the body of a response whose head was read with
+        :meth:`read_head` in pieces of at most ``chunk_size`` bytes.
+        """
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            yield from self._iter_chunked(chunk_size)
+        elif "content-length" in headers:
+            left = parse_content_length(headers)
+            while left:
+                piece = self._read_some(min(left, chunk_size))
+                left -= len(piece)
+                yield piece
+        else:
+            while self._pos < self._end or self._fill():
+                yield self._read_some(chunk_size)
+
+    def _iter_chunked(self, chunk_size):
+        while True:
+            size = parse_chunk_size(self._read_until(b"\r\n"))
+            if not size:
+                # skip trailers up to the terminating blank line
+                while self._read_until(b"\r\n"):
+                    pass
+                return
+            while size:
+                piece = self._read_some(
+                    size if chunk_size is None else min(size, chunk_size)
+                )
+                size -= len(piece)
+                yield piece
+            self._read_until(b"\r\n")
+
+    def _fill(self):
+        """Receive more of the response into the buffer; the bytes read."""
+        pos, end = self._pos, self._end
+        if pos == end:
+            pos = end = 0
+        elif end == len(self._buf):
+            size = end - pos
+            if pos:
+                self._view[:size] = self._view[pos:end]
+            else:
+                buf = bytearray(2 * len(self._buf))
+                buf[:size] = self._view
+                self._buf, self._view = buf, memoryview(buf)
+            pos, end = 0, size
+        n = self.sock.recv_into(self._view[end:])
+        self._pos, self._end = pos, end + n
+        return n
+
+    def _read_until(self, delim, limit=65536):
+        """The bytes up to ``delim``, which is consumed but not returned."""
+        searched = 0  # bytes after _pos known not to start delim
+        while True:
+            i = self._buf.find(delim, self._pos + searched, self._end)
+            if i >= 0:
+                data = bytes(self._view[self._pos : i])
+                self._pos = i + len(delim)
+                return data
+            searched = max(0, self._end - self._pos - len(delim) + 1)
+            if searched > limit:
+                raise http.client.LineTooLong("response head")
+            if not self._fill():
+                raise http.client.IncompleteRead(
+                    bytes(self._view[self._pos : self._end])
+                )
+
+    def _read_some(self, size):
+        """Up to ``size`` bytes, from the buffer or else the socket."""
+        if self._pos == self._end and not self._fill():
+            raise http.client.IncompleteRead(b"", size)
+        end = min(self._end, self._pos + size)
+        data = bytes(self._view[self._pos : end])
+        self._pos = end
+        return data
+
+    def _read_exact(self, size):
+        """Exactly ``size`` bytes."""
+        if size <= len(self._buf):
+            while self._end - self._pos < size:
+                if not self._fill():
+                    raise http.client.IncompleteRead(
+                        bytes(self._view[self._pos : self._end]), size
+                    )
+            return self._read_some(size)
+        # larger than the buffer: read into a buffer of its own
+        data = bytearray(size)
+        target = memoryview(data)
+        got = min(size, self._end - self._pos)
+        target[:got] = self._view[self._pos : self._pos + got]
+        self._pos += got
+        while got < size:
+            n = self.sock.recv_into(target[got:])
+            if not n:
+                raise http.client.IncompleteRead(bytes(target[:got]), size - got)
+            got += n
+        return data
+
+
+class ConnectionPool:
+    """
+    Bounded pool of persistent HTTP/1.1 connections to a single NSE.
+
+    :param str host: NSE host name or address
+    :param int port: NSE XML port
+    :param int maxsize: maximum number of connections open at the same time
+    :param float pool_timeout: seconds to wait for a free connection when
+        ``maxsize`` connections are busy (``None`` waits forever)
+    :param float idle_timeout: idle connections older than this (seconds) are
+        closed instead of being reused
+    :param float timeout: socket timeout of requests made without a
+      deadline
+    """
+
+    path = "/usg/command.xml"
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    def __init__(
+        self,
+        host,
+        port,
+        maxsize=4,
+        pool_timeout=None,
+        idle_timeout=60,
+        timeout=30,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.host = host
+        self.port = int(port)
+        self.maxsize = maxsize
+        self.pool_timeout = pool_timeout
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()  # (connection, last used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxsize)
+        self._closed = False
+        self._head = request_head(self.host, self.port, self.path, self.headers)
+        # time.monotonic() of the last response read, if any
+        self.last_response = None
+        # counters
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+
+    def __repr__(self):
+        return "ConnectionPool(%s:%s, idle=%d/%d)" % (
+            self.host,
+            self.port,
+            len(self._idle),
+            self.maxsize,
+        )
+
+    @property
+    def addr(self):
+        return self.host, self.port
+
+    @property
+    def num_idle(self):
+        return len(self._idle)
+
+    def _new_conn(self):
+        with self._lock:
+            self.created += 1
+        return Connection(self.host, self.port, self.timeout, self._head)
+
+    def _count_dropped(self):
+        with self._lock:
+            self.dropped += 1
+
+    def get(self, deadline=None):
+        """
+        Take a connection out of the pool, opening a new one if no idle
+        connection is usable.
+
+        :param float deadline: :func:`time.monotonic` time to give up
+          waiting for a free connection at, if before ``pool_timeout``
+
+        :returns: ``(connection, reused)`` tuple
+        """
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        wait = self.pool_timeout
+        if deadline is not None:
+            left = max(0.0, deadline - time.monotonic())
+            wait = left if wait is None else min(wait, left)
+        if not self._slots.acquire(timeout=wait):
+            raise PoolTimeoutError(
+                f"no connection to {self.host}:{self.port} " f"available within {wait}s"
+            )
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, last_used = self._idle.pop()
+            if self.idle_timeout is not None and now - last_used > self.idle_timeout:
+                conn.close()
+                continue
+            if is_connection_dropped(conn):
+                self._count_dropped()
+                conn.close()
+                continue
+            with self._lock:
+                self.reused += 1
+            return conn, True
+        return self._new_conn(), False
+
+    def put(self, conn):
+        """Return a healthy connection to the pool."""
+        if self._closed:
+            conn.close()
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    def discard(self, conn):
+        """Close a connection that must not be reused and free its slot."""
+        conn.close()
+        self._slots.release()
+
+    def prune(self):
+        """Close idle connections older than ``idle_timeout``."""
+        if self.idle_timeout is None:
+            return
+        limit = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [c for c, used in self._idle if used < limit]
+            self._idle = collections.deque(
+                (c, used) for c, used in self._idle if used >= limit
+            )
+        for conn in expired:
+            conn.close()
+
+    def close(self):
+        """Close every idle connection; busy ones are closed when returned."""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, collections.deque()
+        for conn, _ in idle:
+            conn.close()
+
+    def request(self, body, deadline=None, marks=None):
+        """
+        POST ``body`` to the NSE XML endpoint and return the response body.
+
+        A request that cannot be written to a reused connection because the
+        NSE closed it while idle is sent again on a fresh connection. Once
+        written, the request may have been acted on: failures to read the
+        response are raised, for the caller's retry policy to decide on.
+
+        :param float deadline: :func:`time.monotonic` time the whole request
+          must be done by; socket operations time out at it, or after
+          ``timeout`` without a deadline
+        :param list marks: if given, the :func:`time.perf_counter` time a
+          connection was acquired at is appended to it
+        """
+        conn, reused = self.get(deadline)
+        if marks is not None:
+            marks.append(time.perf_counter())
+        try:
+            conn = self._send(conn, body, deadline, reused)
+            status, reason, data, will_close = conn.read_response()
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.last_response = time.monotonic()
+        if will_close:
+            self.discard(conn)
+        else:
+            self.put(conn)
+        if status != 200:
+            raise TransportError(status, reason)
+        return data
+
+    def stream(self, body, deadline=None, chunk_size=65536):
+        """
+        POST ``body`` like :meth:`request`, yielding the response body in
+        chunks of at most ``chunk_size`` bytes as they arrive.
+
+        The connection goes back to the pool once the body was read to the
+        end; closing the generator early closes the connection.
+        """
+        conn, reused = self.get(deadline)
+        done = will_close = False
+        try:
+            conn = self._send(conn, body, deadline, reused)
+            status, reason, headers, will_close = conn.read_head()
+            self.last_response = time.monotonic()
+            if status != 200:
+                raise TransportError(status, reason)
+            pieces = conn.iter_body(headers, chunk_size)
+            while True:
+                if deadline is not None:
+                    self._set_timeout(conn, deadline)
+                piece = next(pieces, None)
+                if piece is None:
+                    break
+                yield piece
+            done = True
+        finally:
+            if done and not will_close:
+                self.put(conn)
+            else:
+                self.discard(conn)
+
+    def _send(self, conn, body, deadline, reused=False):
+        """
+        Write the request, on a fresh connection if ``conn`` was reused and
+        turns out to be closed.
+
+        :returns: the connection the request was written to
+        """
+        self._set_timeout(conn, deadline)
+        try:
+            conn.send(body)
+        except _STALE_ERRORS:
+            if not reused:
+                raise
+            logger.debug("stale connection to %s:%s, reconnecting", *self.addr)
+            conn.close()
+            self._count_dropped()
+            conn = self._new_conn()
+            try:
+                self._set_timeout(conn, deadline)
+                conn.send(body)
+            except BaseException:
+                conn.close()
+                raise
+        if deadline is not None:
+            self._set_timeout(conn, deadline)
+        return conn
+
+    def _set_timeout(self, conn, deadline):
+        # a kept-alive socket may still carry the budget of an earlier call;
+        # a deadline may be further out than ``timeout`` (a slow PMS posting)
+        timeout = self.timeout
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise socket.timeout("deadline exceeded")
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+
+class AsyncConnectionPool:
+    """
+    asyncio counterpart of :class:`ConnectionPool`.
+
+    ``maxsize`` is enforced with a semaphore, so it bounds both the number
+    of open connections and the number of requests in flight to the NSE;
+    callers beyond it wait their turn.
+    """
+
+    path = ConnectionPool.path
+    headers = ConnectionPool.headers
+
+    def __init__(self, host, port, maxsize=4, idle_timeout=60, timeout=30):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.host = host
+        self.port = int(port)
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()  # (reader, writer, last used)
+        self._slots = asyncio.Semaphore(maxsize)
+        self._closed = False
+        self._head = request_head(self.host, self.port, self.path, self.headers)
+        # time.monotonic() of the last response read, if any
+        self.last_response = None
+        # counters
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+
+    def __repr__(self):
+        return "AsyncConnectionPool(%s:%s, idle=%d/%d)" % (
+            self.host,
+            self.port,
+            len(self._idle),
+            self.maxsize,
+        )
+
+    @property
+    def num_idle(self):
+        return len(self._idle)
+
+    async def _new_conn(self):
+        self.created += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+
+    async def _get(self):
+        now = time.monotonic()
+        while self._idle:
+            reader, writer, last_used = self._idle.pop()
+            if self.idle_timeout is not None and now - last_used > self.idle_timeout:
+                writer.close()
+                continue
+            if writer.is_closing() or reader.at_eof():
+                self.dropped += 1
+                writer.close()
+                continue
+            self.reused += 1
+            return reader, writer, True
+        return (*await self._new_conn(), False)
+
+    async def close(self):
+        """Close every idle connection; busy ones are closed when returned."""
+        self._closed = True
+        idle, self._idle = self._idle, collections.deque()
+        for _, writer, _ in idle:
+            writer.close()
+        for _, writer, _ in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def request(self, body, deadline=None, marks=None):
+        """
+        POST ``body`` to the NSE XML endpoint and return the response body.
+
+        Waits for a free slot first. If the calling task is cancelled while
+        the request is on the wire, the connection is closed rather than
+        returned to the pool.
+
+        :param float deadline: :func:`time.monotonic` time the whole request,
+          waiting for a slot included, must be done by
+        :param list marks: as for :meth:`ConnectionPool.request`
+        """
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        if deadline is None:
+            return await self._request(body, marks, self.timeout)
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise asyncio.TimeoutError("deadline exceeded")
+        # the deadline bounds the read instead of ``timeout``
+        return await asyncio.wait_for(self._request(body, marks), left)
+
+    async def _request(self, body, marks=None, timeout=None):
+        async with self._slots:
+            reader, writer, reused = await self._get()
+            if marks is not None:
+                marks.append(time.perf_counter())
+            try:
+                try:
+                    await self._send(writer, body)
+                except _STALE_ERRORS:
+                    if not reused:
+                        raise
+                    writer.close()
+                    self.dropped += 1
+                    reader, writer = await self._new_conn()
+                    await self._send(writer, body)
+                rsp = await asyncio.wait_for(read_response(reader), timeout)
+            except BaseException:
+                writer.close()
+                raise
+            status, reason, data, will_close = rsp
+            self.last_response = time.monotonic()
+            if will_close or self._closed:
+                writer.close()
+            else:
+                self._idle.append((reader, writer, time.monotonic()))
+        if status != 200:
+            raise TransportError(status, reason)
+        return data
+
+    async def stream(self, body, deadline=None, chunk_size=65536):
+        """
+        POST ``body`` like :meth:`request`, yielding the response body in
+        chunks of at most ``chunk_size`` bytes as they arrive.
+
+        The connection goes back to the pool once the body was read to the
+        end; closing the generator early closes the connection.
+        """
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        timeout = self.timeout if deadline is None else None
+        async with self._slots:
+            reader, writer, reused = await _within(self._get(), deadline)
+            done = will_close = False
+            try:
+                try:
+                    await _within(self._send(writer, body), deadline)
+                except _STALE_ERRORS:
+                    if not reused:
+                        raise
+                    writer.close()
+                    self.dropped += 1
+                    reader, writer = await _within(self._new_conn(), deadline)
+                    await _within(self._send(writer, body), deadline)
+                head = await _within(
+                    asyncio.wait_for(read_head(reader), timeout), deadline
+                )
+                status, reason, headers, will_close = head
+                self.last_response = time.monotonic()
+                if status != 200:
+                    raise TransportError(status, reason)
+                pieces = iter_body(reader, headers, chunk_size)
+                while True:
+                    try:
+                        piece = await _within(pieces.__anext__(), deadline)
+                    except StopAsyncIteration:
+                        break
+                    yield piece
+                done = True
+            finally:
+                if done and not will_close and not self._closed:
+                    self._idle.append((reader, writer, time.monotonic()))
+                else:
+                    writer.close()
+
+    async def _send(self, writer, body):
+        writer.writelines((self._head, b"Content-Length: %d\r\n\r\n" % len(body), body))
+        await writer.drain()
+
+
+async def _within(aw, deadline):
+    """Await ``aw``, raising :class:`asyncio.TimeoutError` at ``deadline``."""
+    if deadline is None:
+        return await aw
+    left = deadline - time.monotonic()
+    if left <= 0:
+        aw.close()
+        raise asyncio.TimeoutError("deadline exceeded")
+    return await asyncio.wait_for(aw, left)
+
+
+async def read_response(reader):
+    """
+    Read one HTTP/1.x response from an asyncio stream.
+
+    :returns: ``(status, reason, body, will_close)`` tuple
+    """
+    status, reason, headers, will_close = await read_head(reader)
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = parse_chunk_size(await reader.readuntil(b"\r\n"))
+            if not size:
+                # skip trailers up to the terminating blank line
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(parse_content_length(headers))
+    else:
+        body = await reader.read()
+        will_close = True
+    return status, reason, body, will_close
+
+
+async def read_head(reader):
+    """
+    Read the status line and headers of an HTTP/1.x response.
+
+    :returns: ``(status, reason, headers, will_close)`` tuple, with
+      lower-cased header names
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    return parse_head(head[:-4])
+
+
+async def iter_body(reader, headers, chunk_size=65536):
+    """
+    Yield the body of a response whose head was read with :func:`read_head`
+    in pieces of at most ``chunk_size`` bytes.
+    """
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size = parse_chunk_size(await reader.readuntil(b"\r\n"))
+            if not size:
+                while await reader.readuntil(b"\r\n") != b"\r\n":
+                    pass
+                return
+            while size:
+                piece = await reader.readexactly(min(size, chunk_size))
+                size -= len(piece)
+                yield piece
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        left = parse_content_length(headers)
+        while left:
+            piece = await reader.readexactly(min(left, chunk_size))
+            left -= len(piece)
+            yield piece
+    else:
+        while True:
+            piece = await reader.read(chunk_size)
+            if not piece:
+                return
+            yield piece
@@ -1,28 +1,55 @@
 # -*- coding: UTF-8 -*-
+import functools
 import re
+from array import array
 from collections.abc import Sequence
-from typing import TypeVar
-
-import xmltodict
 
+from nseapi.serializer import compile_spec, spec_fields
 from nseapi.utils import generate_docstring
 
 
+_MISSING = object()
+
+
 class FixedList:
+    """
+    Validator accepting one of a fixed set of values.
+
+    Strings and integers match case-insensitively on their full text
+    (``"hours"`` and ``"HOURS"`` both give ``"HOURS"``, ``"1"`` gives ``1``);
+    other values match by equality. Matching is a dictionary lookup built
+    once, whatever the number of units.
+    """
+
     def __init__(self, name: str, units: list):
         self.name = name
-        self.units = units if isinstance(units, list) else [units]
+        self.units = list(units) if isinstance(units, (list, tuple)) else [units]
+        self._folded = {}
+        self._exact = {}
+        for unit in self.units:
+            if isinstance(unit, (str, int)):
+                self._folded.setdefault(str(unit).upper(), unit)
+            try:
+                self._exact.setdefault(unit, unit)
+            except TypeError:  # unhashable unit, matched by equality below
+                pass
 
     def _str_list(self):
         return ", ".join(str(unit) for unit in self.units)
 
     def __call__(self, value):
-        for unit in self.units:
-            if isinstance(unit, (str, int)) and isinstance(value, (str, int)):
-                if re.match(re.escape(str(unit)), str(value), re.IGNORECASE):
-                    return unit
-            elif unit == value:
+        if isinstance(value, (str, int)):
+            unit = self._folded.get(str(value).upper(), _MISSING)
+            if unit is not _MISSING:
                 return unit
+        try:
+            return self._exact[value]
+        except KeyError:
+            pass
+        except TypeError:
+            for unit in self.units:
+                if unit == value:
+                    return unit
         raise ValueError(f"Value must be one of {self._str_list()}")
 
     def __str__(self):
@@ -36,12 +63,23 @@ class FixedList:
         return iter(self.units)
 
 
-T = TypeVar("T", bound=str)
+class Char:
+    """
+    ``Char(n)`` is the ``str`` subclass accepting strings of at most ``n``
+    characters; there is one such class per ``n``.
+    """
 
+    _types = {}
 
-class Char:
     def __new__(cls, max_length: int):
+        try:
+            return cls._types[max_length]
+        except KeyError:
+            pass
+
         class VarChar(str):
+            __slots__ = ()
+
             def __new__(cls, value: str) -> "VarChar":
                 if not isinstance(value, str):
                     raise TypeError(
@@ -54,12 +92,26 @@ class Char:
                 return str.__new__(cls, value)
 
         VarChar.__name__ = f"Char({max_length})"
-        return VarChar
+        return cls._types.setdefault(max_length, VarChar)
 
 
 class FixedChar:
+    """
+    ``FixedChar(n)`` is the ``str`` subclass accepting strings of exactly
+    ``n`` characters; there is one such class per ``n``.
+    """
+
+    _types = {}
+
     def __new__(cls, size: int):
+        try:
+            return cls._types[size]
+        except KeyError:
+            pass
+
         class FixedChar(str):
+            __slots__ = ()
+
             def __new__(cls, value: str) -> "FixedChar":
                 if not isinstance(value, str):
                     raise TypeError(
@@ -70,142 +122,370 @@ class FixedChar:
                 return str.__new__(cls, value)
 
         FixedChar.__name__ = f"FixedChar({size})"
-        return FixedChar
+        return cls._types.setdefault(size, FixedChar)
 
 
 class MACAddress(Sequence):
+    """
+    An immutable, hashable MAC address stored as a 48-bit integer.
+
+    Accepts ``001A2B3C4D5E``, ``00:1A:2B:3C:4D:5E``, ``00-1a-2b-3c-4d-5e``, an
+    int or another ``MACAddress``. Recently parsed strings are served from a
+    bounded cache, so repeat lookups of the same address share one instance.
+    """
+
+    __slots__ = ("_int",)
+
     _regex = re.compile(r"^([0-9A-Fa-f]{2}([-:]?)){5}([0-9A-Fa-f]{2})$")
+    _strip = str.maketrans("", "", ":-")
+
+    def __new__(cls, addr):
+        if isinstance(addr, MACAddress):
+            return addr
+        if isinstance(addr, int) and not isinstance(addr, bool):
+            if not 0 <= addr < 1 << 48:
+                raise ValueError("Not a valid MAC address")
+            return cls._from_int(addr)
+        if not isinstance(addr, str):
+            raise TypeError(f"MAC address must be a string, not {type(addr).__name__}")
+        return _parse_mac(addr)
 
-    def __init__(self, addr: str):
-        if not self._is_valid(addr):
-            raise ValueError("Not a valid MAC address")
+    @classmethod
+    def _from_int(cls, value):
+        self = object.__new__(cls)
+        self._int = value
+        return self
 
-        # Normalize the address by removing separators and converting to uppercase
-        self._addr = addr.upper().replace(":", "").replace("-", "")
+    @classmethod
+    def parse_many(cls, column):
+        """
+        Normalize and validate a whole column of MAC addresses at once.
+
+        :param column: iterable of strings, ints or ``MACAddress`` objects,
+          in any of the accepted formats; whitespace around strings, as
+          found in CSV cells, is ignored
 
-        # Store the address as a list of 2-character segments for immutability
-        self._segments = [self._addr[i : i + 2] for i in range(0, 12, 2)]
+        :returns: :class:`MACAddressArray` of the valid addresses; the row
+          indices of the invalid ones are in its ``invalid`` attribute
+        """
+        return MACAddressArray.parse(column)
 
-    def _is_valid(self, addr: str) -> bool:
-        return bool(self._regex.match(addr))
+    @classmethod
+    def _is_valid(cls, addr: str) -> bool:
+        return bool(cls._regex.fullmatch(addr))
 
     def __getitem__(self, index):
-        return self._segments[index]
+        return self._segments()[index]
+
+    def __iter__(self):
+        return iter(self._segments())
 
     def __len__(self):
-        return len(self._segments)
+        return 6
+
+    def __int__(self):
+        return self._int
+
+    def __hash__(self):
+        return hash(self._int)
+
+    def __reduce__(self):
+        return MACAddress, (self._int,)
 
     def __str__(self):
-        return self.formatted("")
+        return "%012X" % self._int
 
     def __repr__(self):  # pragma: no cover
-        return f"MACAddress({self.formatted('')})"
+        return f"MACAddress({self})"
 
     def __eq__(self, other):
         if not isinstance(other, MACAddress):
             return NotImplemented
-        return self._addr == other._addr
+        return self._int == other._int
+
+    def __lt__(self, other):
+        if not isinstance(other, MACAddress):
+            return NotImplemented
+        return self._int < other._int
+
+    def _segments(self):
+        addr = "%012X" % self._int
+        return [addr[i : i + 2] for i in range(0, 12, 2)]
 
     def formatted(self, separator=":"):
         # Join the segments with the specified separator
-        return separator.join(self._segments)
+        if not separator:
+            return "%012X" % self._int
+        return separator.join(self._segments())
+
+
+_MAC_CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=_MAC_CACHE_SIZE)
+def _parse_mac(addr):
+    if not MACAddress._is_valid(addr):
+        raise ValueError("Not a valid MAC address")
+    return MACAddress._from_int(int(addr.translate(MACAddress._strip), 16))
+
+
+class MACAddressArray(Sequence):
+    """
+    A compact column of MAC addresses, 8 bytes each in an ``array('Q')``.
+
+    Items come out as :class:`MACAddress`, so they can be passed straight to
+    commands; ``rows`` holds the row each address was read from, to line it
+    up with the other columns of its source::
+
+        macs = MACAddress.parse_many(row["mac"] for row in rows)
+        commands = [ADD_DEVICE(mac, rows[i]["name"]) for i, mac in macs.items()]
+    """
+
+    __slots__ = ("values", "rows", "invalid")
+
+    def __init__(self, values=(), rows=None, invalid=()):
+        self.values = array("Q", values)
+        self.rows = array("Q", range(len(self.values)) if rows is None else rows)
+        self.invalid = list(invalid)
+
+    @classmethod
+    def parse(cls, column):
+        """See :meth:`MACAddress.parse_many`."""
+        values = array("Q")
+        rows = array("Q")
+        invalid = []
+        # bound once for the whole column
+        add_value, add_row, add_invalid = values.append, rows.append, invalid.append
+        match, strip = MACAddress._regex.fullmatch, MACAddress._strip
+        for row, addr in enumerate(column):
+            if isinstance(addr, str):
+                addr = addr.strip()
+                if match(addr) is None:
+                    add_invalid(row)
+                    continue
+                add_value(int(addr.translate(strip), 16))
+            elif isinstance(addr, MACAddress):
+                add_value(addr._int)
+            elif (
+                isinstance(addr, int)
+                and not isinstance(addr, bool)
+                and 0 <= addr < 1 << 48
+            ):
+                add_value(addr)
+            else:
+                add_invalid(row)
+                continue
+            add_row(row)
+        self = cls.__new__(cls)
+        self.values, self.rows, self.invalid = values, rows, invalid
+        return self
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MACAddressArray(self.values[index], self.rows[index])
+        return MACAddress._from_int(self.values[index])
+
+    def __iter__(self):
+        return map(MACAddress._from_int, self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):  # pragma: no cover
+        return f"MACAddressArray({len(self)} addresses, {len(self.invalid)} invalid)"
+
+    def items(self):
+        """Iterate over ``(row, MACAddress)`` pairs."""
+        return zip(self.rows, self)
+
+    def formatted(self, separator=":"):
+        """All addresses as strings with the given separator."""
+        return [mac.formatted(separator) for mac in self]
+
+
+def _freeze(value):
+    """A hashable equivalent of a spec: nested dicts and lists as tuples."""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class CommandLayout:
+    """
+    Everything about a command that only depends on its spec, computed once
+    per command class: the field layout, the flattened validation plan and
+    the compiled serializer.
+    """
+
+    __slots__ = ("fields", "index", "required", "steps", "serialize")
+
+    # layouts of the specs of bare Command(...) instances, by spec contents
+    _layouts = {}
+    _MAX_LAYOUTS = 256
+
+    def __init__(self, _type, _spec):
+        self.fields = spec_fields(_spec)
+        self.index = {key: i for i, key in enumerate(self.fields)}
+        self._plan(_type, _spec)
+        self.serialize = compile_spec(_type, _spec)
+
+    @classmethod
+    def of(cls, _type, _spec):
+        """
+        The layout of ``_spec``, shared by the commands built with an equal
+        spec; the spec must not be modified afterwards.
+        """
+        try:
+            key = (_type, _freeze(_spec))
+            layout = cls._layouts.get(key)
+        except TypeError:  # unhashable spec values
+            return cls(_type, _spec)
+        if layout is None:
+            if len(cls._layouts) >= cls._MAX_LAYOUTS:
+                cls._layouts.clear()
+            layout = cls._layouts[key] = cls(_type, _spec)
+        return layout
+
+    def _plan(self, _type, _spec):
+        """
+        Flatten the spec into ``required``, the ``(index, error)`` pairs of
+        required fields, and ``steps``, aligned with ``fields``: the
+        ``(key, convert, sub_steps)`` conversion of each field, where
+        ``sub_steps`` holds the ``(key, convert)`` pairs of an element's
+        attributes (``None`` for attributes), or ``None`` for fixed values.
+        """
+        required = []
+        steps = [None] * len(self.fields)
+        for key, spec in _spec.get("attributes", {}).items():
+            if "value" in spec:
+                continue
+            i = self.index[key]
+            if spec["required"]:
+                required.append((i, f"Attribute {key} is required for {_type}"))
+            steps[i] = (key, spec.get("type", str), None)
+        for key, spec in _spec.get("elements", {}).items():
+            i = self.index[key]
+            if spec["required"]:
+                required.append((i, f"Element {key} is required for {_type}"))
+            sub_steps = tuple(
+                (attr_key, attr_spec.get("type", str))
+                for attr_key, attr_spec in spec.get("attributes", {}).items()
+            )
+            steps[i] = (key, spec.get("type", str), sub_steps)
+        self.required = tuple(required)
+        self.steps = tuple(steps)
 
 
 class Command:
+    """
+    An NSE XML command.
+
+    Input values live in a per-instance list laid out as
+    ``self._layout.fields``, ``None`` marking an unset field.
+    """
+
+    __slots__ = ("_type", "_spec", "_layout", "_values")
 
-    _input_data = {}
+    # queries: no side effect on the gateway, safe to coalesce
+    _readonly = False
+    # typed fields of the response, {tag: type}; see nseapi.results
+    _response = None
 
     def __init__(self, _type, _spec, *args, **kwargs):
         self._type = _type
         self._spec = _spec
+        self._layout = CommandLayout.of(_type, _spec)
         self._transform(*args, **kwargs)
 
     def __str__(self) -> str:  # pragma: no cover
         return self.to_xml()
 
+    @property
+    def _input_data(self):
+        """The fields that are set, as a new ``{name: value}`` dict."""
+        return {
+            key: value
+            for key, value in zip(self._layout.fields, self._values)
+            if value is not None
+        }
+
     def _transform(self, *args, **kwargs):
-        """Transform input to dictionary based on command spec"""
+        """
+        Transform input to the field layout of the command spec; keys the
+        spec does not know are not part of the command and are dropped.
+        """
+        index = self._layout.index
+        values = [None] * len(index)
         # cleanup kwargs
-        cleaned_kwargs = {
-            k.upper(): (
-                v
-                if not isinstance(v, dict)
-                else {sk.upper(): sv for sk, sv in v.items()}
-            )
-            for k, v in kwargs.items()
-        }
-        # mapping args to kwargs
+        for key, value in kwargs.items():
+            key = key.upper()
+            if key not in index:
+                continue
+            if isinstance(value, dict):
+                value = {sk.upper(): sv for sk, sv in value.items()}
+            values[index[key]] = value
+        # mapping args to the fields not given as kwargs
         if args:
-            attribute_keys = list(self._spec.get("attributes", {}).keys())
-            element_keys = list(self._spec.get("elements", {}).keys())
-            _keys = (
-                _
-                for _ in attribute_keys + element_keys
-                if _ not in cleaned_kwargs.keys()
-            )
-            self._input_data.update(zip(_keys, args))
-
-        self._input_data.update(cleaned_kwargs)
+            free = [i for i, value in enumerate(values) if value is None]
+            for i, value in zip(free, args):
+                values[i] = value
+        self._values = values
 
     def validate(self):
-        for key, spec in self._spec.get("attributes", {}).items():
-            if "value" in spec:
+        values = self._values
+        for i, missing in self._layout.required:
+            if values[i] is None:
+                raise TypeError(missing)
+        steps = self._layout.steps
+        for i, value in enumerate(values):
+            if value is None or steps[i] is None:
                 continue
-            if spec["required"] and key not in self._input_data:
-                raise TypeError(f"Attribute {key} is required for {self._type}")
-            if key in self._input_data:
-                self._validate_value(key, spec)
-
-        for key, spec in self._spec.get("elements", {}).items():
-            if spec["required"] and key not in self._input_data:
-                raise TypeError(f"Element {key} is required for {self._type}")
-            if key in self._input_data:
-                self._validate_value(key, spec, is_element=True)
-
-    def _validate_value(self, key, spec, is_element=False):
-        value = self._input_data[key]
-        try:
-            if is_element and isinstance(value, dict):
-                element_value = value.get("VALUE", "")
-                value["VALUE"] = spec.get("type", str)(element_value)
-                if "attributes" in spec:
-                    for attr_key, attr_spec in spec["attributes"].items():
+            key, convert, sub_steps = steps[i]
+            # values already of the field type were converted before
+            try:
+                if sub_steps is not None and isinstance(value, dict):
+                    element_value = value.get("VALUE", "")
+                    if type(element_value) is not convert:
+                        value["VALUE"] = convert(element_value)
+                    for attr_key, attr_convert in sub_steps:
                         if attr_key in value:
-                            value[attr_key] = attr_spec.get("type", str)(
-                                value[attr_key]
-                            )
-            else:
-                self._input_data[key] = spec.get("type", str)(value)
-        except (TypeError, ValueError) as e:
-            raise TypeError(f"{key}: {str(e)}")
+                            attr_value = value[attr_key]
+                            if type(attr_value) is not attr_convert:
+                                value[attr_key] = attr_convert(attr_value)
+                elif type(value) is not convert:
+                    values[i] = convert(value)
+            except (TypeError, ValueError) as e:
+                raise TypeError(f"{key}: {str(e)}")
+
+    def to_bytes(self):
+        """Validate the input and render the command as UTF-8 encoded XML."""
+        self.validate()
+        return self._layout.serialize(self._values)
 
     def to_xml(self):
-        self.validate()
-        usg_dict = {"@COMMAND": self._type}
-        for key, spec in self._spec.get("attributes", {}).items():
-            if key in self._input_data:
-                usg_dict[f"@{key}"] = str(self._input_data[key])
-            elif "value" in spec:
-                usg_dict[f"@{key}"] = str(spec["value"])
-
-        for key in self._spec.get("elements", {}):
-            if key in self._input_data:
-                element_value = self._input_data[key]
-                if isinstance(element_value, dict):
-                    element_dict = {"#text": str(element_value.pop("VALUE", ""))}
-                    for attr_key, attr_value in element_value.items():
-                        element_dict[f"@{attr_key}"] = str(attr_value)
-                    usg_dict[key] = element_dict
-                else:
-                    usg_dict[key] = str(element_value)
-        return xmltodict.unparse({"USG": usg_dict}, pretty=True)
+        return self.to_bytes().decode("utf-8")
 
     def help(self):
         """Generate help text for the command."""
         return f"Help on class {self._type}:\n" + generate_docstring(self._spec)
 
 
-class BaseCommand(Command):
+class _CommandMeta(type):
+    """Give every command class ``__slots__`` so instances carry no __dict__."""
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        namespace.setdefault("__slots__", ())
+        return super().__new__(mcs, name, bases, namespace, **kwargs)
+
+
+class BaseCommand(Command, metaclass=_CommandMeta):
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "_spec" in cls.__dict__:
+            cls._layout = CommandLayout(cls._type, cls._spec)
 
     def __init__(self, *args, **kwargs):
         if hasattr(self, "_type") and hasattr(self, "_spec"):
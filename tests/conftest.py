@@ -3,3 +3,36 @@ import os
 
 # Add the parent directory of the current file to the path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import pytest
+
+from nseapi.testing import StubNSE, free_port
+
+
+@pytest.fixture
+def nse_server_factory():
+    """
+    Start local stand-in NSEs answering every command with
+    ``server.response``, either bytes or a callable taking the request body.
+    """
+    servers = []
+
+    def start():
+        server = StubNSE().start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def nse_server(nse_server_factory):
+    return nse_server_factory()
+
+
+@pytest.fixture
+def closed_port():
+    """A local port nothing listens on."""
+    return free_port()
@@ -0,0 +1,140 @@
+# -*- coding: UTF-8 -*-
+import threading
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.cache import ResponseCache, command_keys, response_keys
+from nseapi.commands import CACHE_UPDATE, pms, subscriber
+from nseapi.device import Device
+from nseapi.testing import FakeNSE
+from nseapi.tracing import Tracer
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+@pytest.fixture
+def device(nse_server):
+    cache = ResponseCache(ttl={"ROOM_QUERY_ACCESS": 0.05}, maxsize=3)
+    with Device("127.0.0.1", port=nse_server.server_port, cache=cache) as dev:
+        yield dev
+
+
+class TestResponseCache:
+    def test_hit(self, device, nse_server):
+        for _ in range(3):
+            device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+        assert len(nse_server.requests) == 1
+        assert device.cache.stats()["hits"] == 2
+        assert device.cache.stats()["misses"] == 1
+
+    def test_invalidated_by_mutation(self, device, nse_server):
+        device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+        device.execute(subscriber.USER_QUERY("001a2b3c4d5e"))
+        device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT("00:00:00:00:00:01"))
+        device.execute(CACHE_UPDATE("00-1A-2B-3C-4D-5E"))
+        assert device.cache.stats()["invalidations"] == 2
+        assert len(device.cache) == 1
+        device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+        assert len(nse_server.requests) == 5
+
+    def test_query_racing_mutation(self):
+        # a query reads the room, a mutation changes and invalidates it, and
+        # only then does the query get to cache what it read
+        read, mutated = threading.Event(), threading.Event()
+
+        class Pause(Tracer):
+            def after_send(self, span):
+                if span.command == "ROOM_QUERY_ACCESS" and not read.is_set():
+                    read.set()
+                    mutated.wait(5)
+
+        with FakeNSE(rooms=["101"]) as nse:
+            cache = ResponseCache()
+            with Device("127.0.0.1", port=nse.port, cache=cache, tracer=Pause()) as dev:
+                dev.execute(pms.ROOM_SET_ACCESS("101", "ROOM_OPEN"))
+                query = threading.Thread(
+                    target=dev.execute, args=(pms.ROOM_QUERY_ACCESS("101"),)
+                )
+                query.start()
+                assert read.wait(5)
+                dev.execute(pms.ROOM_SET_ACCESS("101", "ROOM_BLOCK"))
+                mutated.set()
+                query.join()
+                result = dev.execute(pms.ROOM_QUERY_ACCESS("101"))
+        assert result.access_mode == "ROOM_BLOCK"
+
+    def test_generation_bound(self):
+        cache = ResponseCache(maxsize=2)
+        generation = cache.generation()
+        for n in range(20):
+            cache.invalidate(CACHE_UPDATE("00:00:00:00:00:%02X" % n))
+        assert len(cache._invalidated) == 8
+        # forgotten invalidations still keep older responses out
+        cmd = subscriber.SUBSCRIBER_QUERY_CURRENT("00:00:00:00:00:00")
+        cache.put(("SUBSCRIBER_QUERY_CURRENT", b"q"), cmd, {}, 1, generation)
+        assert len(cache) == 0
+        cache.put(("SUBSCRIBER_QUERY_CURRENT", b"q"), cmd, {}, 1, cache.generation())
+        assert len(cache) == 1
+
+    def test_room_ttl(self, device, nse_server):
+        device.execute(pms.ROOM_QUERY_ACCESS("101"))
+        device.execute(pms.ROOM_QUERY_ACCESS("101"))
+        device.execute(pms.ROOM_SET_ACCESS("101", "ROOM_BLOCK"))
+        device.execute(pms.ROOM_QUERY_ACCESS("101"))
+        time.sleep(0.06)
+        device.execute(pms.ROOM_QUERY_ACCESS("101"))
+        assert len(nse_server.requests) == 4
+
+    def test_lru_bound(self, device):
+        for i in range(5):
+            device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(i))
+        assert len(device.cache) == 3
+        assert device.cache.stats()["evictions"] == 2
+
+    def test_byte_bound(self, nse_server):
+        cache = ResponseCache(max_bytes=100)
+        with Device("127.0.0.1", port=nse_server.server_port, cache=cache) as dev:
+            for i in range(5):
+                dev.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(i))
+        assert cache.stats()["evictions"] == 3
+
+    def test_query_by_name(self):
+        # a query by user name is dropped by mutations sent by MAC address
+        with FakeNSE(rooms=["101"]) as nse:
+            with Device("127.0.0.1", port=nse.port, cache=ResponseCache()) as dev:
+                dev.execute(subscriber.ADD_USER(MAC, user_name="bob"))
+                query = subscriber.USER_QUERY("bob", id_type="USER_NAME")
+                assert dev.execute(query)["SUBSCRIBER"]["USER_NAME"] == "bob"
+                dev.execute(
+                    subscriber.ADD_USER(MAC, user_name="bob", room_number="101")
+                )
+                assert dev.execute(query)["SUBSCRIBER"]["ROOM_NUMBER"] == "101"
+                dev.execute(subscriber.USER_DELETE(MAC))
+                with pytest.raises(nse_err.USGError):
+                    dev.execute(query)
+
+    def test_response_keys(self):
+        response = {
+            "@RESULT": "OK",
+            "SUBSCRIBER": [
+                {"@MAC_ADDR": "001A2B3C4D5E", "USER_NAME": "bob"},
+                {"@MAC_ADDR": "001A2B3C4D5F", "ROOM_NUMBER": {"#text": "101"}},
+            ],
+        }
+        assert response_keys(response) == {
+            ("MAC", 0x001A2B3C4D5E),
+            ("MAC", 0x001A2B3C4D5F),
+            ("USER_NAME", "bob"),
+            ("ROOM", "101"),
+        }
+
+    def test_command_keys(self):
+        assert command_keys(subscriber.USER_DELETE(MAC)) == command_keys(
+            CACHE_UPDATE("001A2B3C4D5E")
+        )
+        assert command_keys(subscriber.ADD_USER(MAC, user_name="bob")) == {
+            ("MAC", 0x001A2B3C4D5E),
+            ("USER_NAME", "bob"),
+        }
@@ -1,8 +1,12 @@
 # -*- coding: UTF-8 -*-
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+import xmltodict
 
 from nseapi.types import Command, BaseCommand, FixedChar
-from nseapi.commands import CACHE_UPDATE
+from nseapi.commands import CACHE_UPDATE, pms, subscriber
 
 
 class TestCommand:
@@ -39,6 +43,24 @@ class TestCommand:
         xml_output = command.to_xml()
         assert "COMMAND" in xml_output
 
+    def test_command_to_bytes(self, command):
+        assert xmltodict.parse(command.to_bytes()) == {
+            "USG": {
+                "@COMMAND": "TestType",
+                "@ATTR1": "value1",
+                "@ATTR2": "100",
+                "ELEM1": "element_value",
+                "ELEM2": {"@UNIT": "1", "#text": "e2"},
+            }
+        }
+        assert command.to_xml() == command.to_bytes().decode("utf-8")
+
+    def test_command_to_bytes_escaped(self, spec):
+        xml = Command("TestType", spec, 'a&"b\n', elem1="<element&val>").to_bytes()
+        data = xmltodict.parse(xml)["USG"]
+        assert data["@ATTR1"] == 'a&"b\n'
+        assert data["ELEM1"] == "<element&val>"
+
     def test_command_validation(self, command):
         command.validate()  # Should not raise an error
 
@@ -46,6 +68,12 @@ class TestCommand:
         help_text = command.help()
         assert "Help on class TestType" in help_text
 
+    def test_layout_shared(self, spec, command):
+        # equal specs share their layout and compiled serializer
+        other = Command("TestType", copy.deepcopy(spec), "value2", elem1="e")
+        assert other._layout is command._layout
+        assert Command("Other", spec, "v", elem1="e")._layout is not command._layout
+
     def test_command_invalid_input(self, spec):
         with pytest.raises(TypeError):
             Command("TestType", spec, attr1=1.1, elem1="e").validate()
@@ -66,3 +94,35 @@ class TestBaseCommand:
     def test_base_command_invalid(self):
         with pytest.raises(ValueError):
             BaseCommand("value1", ELEM1={"VALUE": "element_value"})
+
+    def test_base_command_unknown_field(self):
+        cmd = subscriber.ADD_USER("00:1A:2B:3C:4D:5E", no_such_field=1)
+        assert "NO_SUCH_FIELD" not in cmd.to_xml()
+
+
+class TestCommandState:
+    def test_instances_do_not_share_state(self):
+        first = subscriber.ADD_USER("00:1A:2B:3C:4D:5E", room_number="101")
+        second = pms.USER_PAYMENT("guest", "pw", "202", "00:00:00:00:00:01", "R1")
+        third = CACHE_UPDATE("00:00:00:00:00:02")
+        assert first._input_data == {
+            "MAC_ADDR": "00:1A:2B:3C:4D:5E",
+            "ROOM_NUMBER": "101",
+        }
+        assert xmltodict.parse(second.to_bytes())["USG"]["@PAYMENT_METHOD"] == "PMS"
+        assert "ROOM_NUMBER" not in third._input_data
+        assert 'MAC_ADDR="000000000002"' in third.to_xml()
+
+    def test_compact_instances(self):
+        cmd = subscriber.ADD_USER("00:1A:2B:3C:4D:5E")
+        assert not hasattr(cmd, "__dict__")
+        assert len(cmd._values) == len(subscriber.ADD_USER._layout.fields)
+
+    def test_build_in_threads(self):
+        def build(i):
+            mac = "00:00:00:00:%02X:%02X" % divmod(i, 256)
+            return CACHE_UPDATE(mac).to_xml(), mac.replace(":", "")
+
+        with ThreadPoolExecutor(8) as pool:
+            for xml, mac in pool.map(build, range(2000)):
+                assert f'MAC_ADDR="{mac}"' in xml
@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import time
+
+import pytest
+
+from nseapi import commands
+from nseapi import exceptions as nse_err
+from nseapi.commands import CACHE_UPDATE, pms
+from nseapi.deadline import DEFAULT_TIMEOUTS, current_deadline, deadline
+from nseapi.device import AsyncDevice, Device
+from nseapi.retry import RetryPolicy
+
+MAC = "00:1A:2B:3C:4D:5E"
+TEST = '<USG COMMAND="TEST"/>'
+
+
+@pytest.fixture
+def slow_server(nse_server):
+    """Stand-in NSE answering after ``server.delay`` seconds."""
+    nse_server.delay = 0.3
+
+    def respond(request):
+        time.sleep(nse_server.delay)
+        return b'<USG RESULT="OK"/>'
+
+    nse_server.response = respond
+    return nse_server
+
+
+@pytest.fixture
+def device(slow_server):
+    with Device("127.0.0.1", port=slow_server.server_port) as dev:
+        yield dev
+
+
+class TestDeadline:
+    def test_nested(self):
+        assert current_deadline() is None
+        with deadline(1) as outer:
+            with deadline(5) as inner:
+                assert inner == outer
+            with deadline(0.5) as inner:
+                assert inner < outer
+            assert current_deadline() == outer
+        assert current_deadline() is None
+
+    def test_context_deadline(self, device):
+        start = time.monotonic()
+        with deadline(0.1):
+            with pytest.raises(nse_err.DeadlineExceededError):
+                device.execute(TEST)
+        assert time.monotonic() - start < 0.25
+
+    def test_call_timeout(self, device, slow_server):
+        with pytest.raises(nse_err.DeadlineExceededError):
+            device.execute(TEST, timeout=0.1)
+        # the kept-alive connection gets the full budget again
+        slow_server.delay = 0.15
+        assert device.execute(TEST)["@RESULT"] == "OK"
+
+    def test_expired(self, device, slow_server):
+        with deadline(0):
+            with pytest.raises(nse_err.DeadlineExceededError):
+                device.execute(TEST)
+        assert not slow_server.requests
+
+    def test_command_timeouts(self, slow_server):
+        port = slow_server.server_port
+        timeouts = {"CACHE_UPDATE": 0.1}
+        with Device("127.0.0.1", port=port, command_timeouts=timeouts) as dev:
+            with pytest.raises(nse_err.DeadlineExceededError):
+                dev.execute(CACHE_UPDATE(MAC))
+            assert dev.execute(TEST)["@RESULT"] == "OK"
+            # PMS postings get a longer budget than the device default
+            payment = pms.USER_PAYMENT("guest", "secret", "101", MAC, "R1")
+            assert dev._deadline(payment, None) - time.monotonic() > dev.timeout
+
+    def test_budget_above_timeout(self, slow_server):
+        # a command budget may be longer than the device timeout
+        slow_server.delay = 0.5
+        port, timeouts = slow_server.server_port, {"CACHE_UPDATE": 2}
+        dev = Device("127.0.0.1", port=port, timeout=0.2, command_timeouts=timeouts)
+        with dev:
+            assert dev.execute(CACHE_UPDATE(MAC))["@RESULT"] == "OK"
+            with pytest.raises(nse_err.DeadlineExceededError):
+                dev.execute(TEST)
+
+    def test_budget_above_timeout_async(self, slow_server):
+        slow_server.delay = 0.5
+        port, timeouts = slow_server.server_port, {"CACHE_UPDATE": 2}
+
+        async def main():
+            dev = AsyncDevice(
+                "127.0.0.1", port=port, timeout=0.2, command_timeouts=timeouts
+            )
+            async with dev:
+                rsp = await dev.execute(CACHE_UPDATE(MAC))
+                with pytest.raises(nse_err.DeadlineExceededError):
+                    await dev.execute(TEST)
+                return rsp
+
+        assert asyncio.run(main())["@RESULT"] == "OK"
+
+    def test_default_timeouts_known(self):
+        types = {CACHE_UPDATE._type}
+        for name in ("radius", "subscriber", "pms", "network"):
+            module = getattr(commands, name)
+            types.update(
+                cls._type
+                for cls in vars(module).values()
+                if isinstance(cls, type)
+                and isinstance(getattr(cls, "_type", None), str)
+            )
+        assert set(DEFAULT_TIMEOUTS) <= types
+        assert {"RADIUS_LOGIN", "RADIUS_LOGOUT"} <= set(DEFAULT_TIMEOUTS)
+
+    def test_retries_bounded(self, closed_port):
+        port = closed_port
+        retry = RetryPolicy(attempts=100, backoff=0.05, jitter=False)
+        start = time.monotonic()
+        with Device("127.0.0.1", port=port, retry=retry) as dev:
+            with deadline(0.3):
+                with pytest.raises(nse_err.ConnectRefusedError):
+                    dev.execute(CACHE_UPDATE(MAC))
+        assert time.monotonic() - start < 0.4
+        assert 0 < retry.retries < 5
+
+    def test_execute_many(self, device):
+        start = time.monotonic()
+        with deadline(0.1):
+            results = device.execute_many([TEST] * 4)
+        assert all(isinstance(r, nse_err.DeadlineExceededError) for r in results)
+        assert time.monotonic() - start < 0.25
+
+    def test_async(self, slow_server):
+        async def main():
+            port = slow_server.server_port
+            async with AsyncDevice("127.0.0.1", port=port) as dev:
+                with deadline(0.1):
+                    with pytest.raises(nse_err.DeadlineExceededError):
+                        await dev.execute(TEST)
+                return await dev.execute(TEST, timeout=1)
+
+        assert asyncio.run(main())["@RESULT"] == "OK"
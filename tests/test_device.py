@@ -0,0 +1,285 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import http.client
+import re
+import socket
+import threading
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.breaker import CircuitBreaker
+from nseapi.commands import CACHE_UPDATE
+from nseapi.device import AsyncDevice, Device
+from nseapi.transport import Connection, ConnectionPool, PoolTimeoutError
+
+
+@pytest.fixture
+def device(nse_server):
+    with Device("127.0.0.1", port=nse_server.server_port, timeout=5) as dev:
+        yield dev
+
+
+class TestConnectionPool:
+    def test_reuses_connection(self, device, nse_server):
+        for _ in range(5):
+            assert device.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E"))["@RESULT"] == "OK"
+        assert nse_server.connections == 1
+        assert device._conn.reused == 4
+        assert b'COMMAND="CACHE_UPDATE"' in nse_server.requests[0]
+
+    def test_idle_eviction(self, nse_server):
+        pool = ConnectionPool("127.0.0.1", nse_server.server_port, idle_timeout=0)
+        pool.request(b"<USG/>")
+        pool.request(b"<USG/>")
+        assert pool.created == 2
+        assert pool.reused == 0
+        pool.close()
+
+    def test_dropped_connection(self, nse_server):
+        pool = ConnectionPool("127.0.0.1", nse_server.server_port)
+        pool.request(b"<USG/>")
+        conn, _ = pool._idle[0]
+        conn.sock.close()
+        pool.request(b"<USG/>")
+        assert pool.dropped == 1
+        assert pool.created == 2
+        pool.close()
+
+    def test_resend_unwritten(self, nse_server):
+        pool = ConnectionPool("127.0.0.1", nse_server.server_port)
+        pool.request(b"<USG/>")
+        conn, _ = pool._idle[0]
+        conn.sock.shutdown(socket.SHUT_WR)  # writing to it fails
+        pool.request(b"<USG/>")
+        assert (pool.dropped, pool.created) == (1, 2)
+        assert len(nse_server.requests) == 2
+        pool.close()
+
+    def test_no_resend_after_write(self):
+        # the NSE closes a kept-alive connection after reading a request
+        server = socket.create_server(("127.0.0.1", 0))
+        server.settimeout(1)
+        requests = []
+
+        def serve():
+            sock, _ = server.accept()
+            for answer in (True, False):
+                data = b""
+                while not data.endswith(b"<USG/>"):
+                    data += sock.recv(4096)
+                requests.append(data)
+                if answer:
+                    sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 6\r\n\r\n<USG/>")
+            sock.close()
+            try:
+                sock, _ = server.accept()
+            except socket.timeout:
+                return
+            requests.append(sock.recv(4096))
+            sock.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        pool = ConnectionPool("127.0.0.1", server.getsockname()[1])
+        pool.request(b"<USG/>")
+        with pytest.raises(http.client.RemoteDisconnected):
+            pool.request(b"<USG/>")
+        thread.join()
+        server.close()
+        pool.close()
+        assert len(requests) == 2
+
+    def test_pool_timeout(self, nse_server):
+        pool = ConnectionPool(
+            "127.0.0.1", nse_server.server_port, maxsize=1, pool_timeout=0.01
+        )
+        conn, _ = pool.get()
+        with pytest.raises(PoolTimeoutError):
+            pool.get()
+        pool.put(conn)
+        pool.close()
+
+
+def connection_pair(bufsize=64):
+    """A :class:`Connection` and the socket of its peer."""
+    ours, peer = socket.socketpair()
+    conn = Connection("127.0.0.1", 80, head=b"POST / HTTP/1.1\r\n", bufsize=bufsize)
+    conn.sock = ours
+    return conn, peer
+
+
+class TestConnection:
+    def test_send(self):
+        conn, peer = connection_pair()
+        conn.send(memoryview(b"<USG/>"))
+        assert peer.recv(1024) == (
+            b"POST / HTTP/1.1\r\nContent-Length: 6\r\n\r\n<USG/>"
+        )
+
+    def test_buffer_reused(self):
+        conn, peer = connection_pair()
+        for body in (b"<USG/>", b'<USG RESULT="OK"/>'):
+            peer.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body))
+            peer.sendall(body)
+            assert conn.read_response() == (200, "OK", body, False)
+        assert len(conn._buf) == 64
+
+    def test_large_body(self):
+        conn, peer = connection_pair()
+        body = b"<USG>" + b"x" * 100000 + b"</USG>"
+        head = b"HTTP/1.1 200 OK\r\nX-Padding: %s\r\nContent-Length: %d\r\n\r\n"
+        sender = threading.Thread(
+            target=peer.sendall, args=(head % (b"p" * 100, len(body)) + body,)
+        )
+        sender.start()
+        status, _, data, _ = conn.read_response()
+        sender.join()
+        assert (status, data) == (200, body)
+
+    def test_chunked(self):
+        conn, peer = connection_pair()
+        peer.sendall(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5\r\n<USG \r\n2;ext=1\r\n/>\r\n0\r\nX-Trailer: 1\r\n\r\n"
+        )
+        assert conn.read_response()[2] == b"<USG />"
+
+    def test_read_to_close(self):
+        conn, peer = connection_pair()
+        peer.sendall(b"HTTP/1.0 200 OK\r\n\r\n<USG/>")
+        peer.close()
+        assert conn.read_response() == (200, "OK", b"<USG/>", True)
+
+    def test_closed(self):
+        conn, peer = connection_pair()
+        peer.close()
+        with pytest.raises(http.client.RemoteDisconnected):
+            conn.read_response()
+        conn, peer = connection_pair()
+        peer.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n<USG")
+        peer.close()
+        with pytest.raises(http.client.IncompleteRead):
+            conn.read_response()
+
+    def test_garbled(self):
+        for head in (
+            b"HTTP/1.1 200 OK\r\nContent-Length: 6x\r\n\r\n<USG/>",
+            b"HTTP/1.1 200 OK\r\nContent-Length: -1\r\n\r\n<USG/>",
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n-6\r\n",
+        ):
+            conn, peer = connection_pair()
+            peer.sendall(head)
+            with pytest.raises(http.client.HTTPException):
+                conn.read_response()
+
+
+class TestDevice:
+    def test_execute_closed(self, nse_server):
+        dev = Device("127.0.0.1", port=nse_server.server_port)
+        with pytest.raises(nse_err.ConnectClosedError):
+            dev.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E"))
+
+    def test_execute_many(self, device, nse_server):
+        def echo(request):
+            seq = re.search(rb'SEQ="(\w+)"', request).group(1)
+            if seq == b"bad":
+                return b"<USG"
+            return b'<USG RESULT="OK" SEQ="%s"/>' % seq
+
+        nse_server.response = echo
+        commands = [f'<USG COMMAND="TEST" SEQ="{i}"/>' for i in range(20)]
+        commands[7] = '<USG COMMAND="TEST" SEQ="bad"/>'
+        results = device.execute_many(commands, max_workers=8)
+        assert len(results) == 20
+        assert isinstance(results[7], nse_err.ConnectError)
+        for i, result in enumerate(results):
+            if i != 7:
+                assert result["@SEQ"] == str(i)
+        assert nse_server.connections <= device._pool_size
+
+    def test_garbled_response(self):
+        server = socket.create_server(("127.0.0.1", 0))
+        server.settimeout(5)
+
+        def serve():
+            for _ in range(2):
+                sock, _ = server.accept()
+                sock.recv(4096)
+                sock.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 6x\r\n\r\n<USG/>")
+                sock.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        breaker = CircuitBreaker(failure_threshold=2)
+        port = server.getsockname()[1]
+        with Device("127.0.0.1", port=port, timeout=5, breaker=breaker) as dev:
+            for _ in range(2):
+                with pytest.raises(nse_err.ConnectError) as exc:
+                    dev.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E"))
+                assert isinstance(exc.value.msg, http.client.HTTPException)
+            with pytest.raises(nse_err.CircuitOpenError):
+                dev.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E"))
+        thread.join()
+        server.close()
+
+
+class TestAsyncDevice:
+    def run(self, nse_server, coro_fn, **kwargs):
+        async def main():
+            dev = AsyncDevice("127.0.0.1", port=nse_server.server_port, **kwargs)
+            async with dev:
+                return await coro_fn(dev)
+
+        return asyncio.run(main())
+
+    def test_execute(self, nse_server):
+        async def go(dev):
+            for _ in range(3):
+                rsp = await dev.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E"))
+                assert rsp["@RESULT"] == "OK"
+            return dev._conn
+
+        pool = self.run(nse_server, go)
+        assert nse_server.connections == 1
+        assert pool.reused == 2
+
+    def test_concurrency_limit(self, nse_server):
+        def slow(request):
+            time.sleep(0.01)
+            return b'<USG RESULT="OK"/>'
+
+        nse_server.response = slow
+
+        async def go(dev):
+            return await dev.execute_many(['<USG COMMAND="TEST"/>'] * 30)
+
+        results = self.run(nse_server, go, pool_size=3)
+        assert all(r["@RESULT"] == "OK" for r in results)
+        assert nse_server.connections == 3
+
+    def test_cancel(self, nse_server):
+        def slow(request):
+            time.sleep(0.2)
+            return b'<USG RESULT="OK"/>'
+
+        nse_server.response = slow
+
+        async def go(dev):
+            task = asyncio.ensure_future(dev.execute('<USG COMMAND="TEST"/>'))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert dev._conn.num_idle == 0
+            nse_server.response = b'<USG RESULT="OK"/>'
+            return await dev.execute('<USG COMMAND="TEST"/>')
+
+        assert self.run(nse_server, go, pool_size=1)["@RESULT"] == "OK"
+
+    def test_sync_context_manager(self, nse_server):
+        with pytest.raises(TypeError):
+            with AsyncDevice("127.0.0.1", port=nse_server.server_port):
+                pass  # pragma: no cover
@@ -0,0 +1,108 @@
+# -*- coding: UTF-8 -*-
+import threading
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.cache import ResponseCache
+from nseapi.commands import CACHE_UPDATE, pms
+from nseapi.device import Device
+from nseapi.fleet import Fleet
+from nseapi.testing import FakeNSE
+
+
+@pytest.fixture
+def servers(nse_server_factory):
+    """Three stand-in NSEs answering after 0, 50 and 100 ms."""
+    started = []
+    for delay in (0, 0.05, 0.1):
+        server = nse_server_factory()
+        server.inflight = server.peak = 0
+        server.lock = threading.Lock()
+
+        def respond(request, server=server, delay=delay):
+            with server.lock:
+                server.inflight += 1
+                server.peak = max(server.peak, server.inflight)
+            time.sleep(delay)
+            with server.lock:
+                server.inflight -= 1
+            return b'<USG RESULT="OK"/>'
+
+        server.response = respond
+        started.append(server)
+    return started
+
+
+@pytest.fixture
+def fleet(servers):
+    devices = [Device("127.0.0.1", port=s.server_port, timeout=5) for s in servers]
+    with Fleet(devices, per_host=2) as fleet:
+        yield fleet
+
+
+class TestFleet:
+    def test_execute_all(self, fleet, servers):
+        start = time.monotonic()
+        results = list(fleet.execute(CACHE_UPDATE("00:1A:2B:3C:4D:5E")))
+        elapsed = time.monotonic() - start
+        assert len(results) == 3
+        assert all(r.ok and r.result["@RESULT"] == "OK" for r in results)
+        # fastest gateway first, and no slower than the slowest gateway
+        assert results[0].device.port == servers[0].server_port
+        assert elapsed < 0.2
+
+    def test_execute_map_per_host_limit(self, fleet, servers):
+        slow = ("127.0.0.1", servers[2].server_port)
+        results = list(fleet.execute_map({slow: ['<USG COMMAND="TEST"/>'] * 6}))
+        assert len(results) == 6
+        assert servers[2].peak == 2
+        assert not servers[0].requests
+
+    def test_eager(self, fleet, servers):
+        slow = ("127.0.0.1", servers[2].server_port)
+        results = fleet.execute_map({slow: ['<USG COMMAND="TEST"/>'] * 6})
+        # sent without reading the results, still two at a time
+        deadline = time.monotonic() + 2
+        while len(servers[2].requests) < 6 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(servers[2].requests) == 6
+        assert servers[2].peak == 2
+        assert len(list(results)) == 6
+
+    def test_errors_are_results(self, fleet, servers):
+        fleet[("127.0.0.1", servers[1].server_port)].close()
+        results = list(fleet.execute('<USG COMMAND="TEST"/>'))
+        failed = [r for r in results if not r.ok]
+        assert len(failed) == 1
+        assert isinstance(failed[0].error, nse_err.ConnectClosedError)
+
+    def test_lookup(self, fleet, servers):
+        with pytest.raises(KeyError):
+            fleet["127.0.0.1"]
+        assert len(fleet) == 3
+
+    def test_device_cache(self):
+        # commands go through each device's cache like Device.execute
+        with FakeNSE(rooms=["101"]) as nse:
+            dev = Device("127.0.0.1", port=nse.port, cache=ResponseCache())
+            with Fleet([dev]) as fleet:
+                dev.execute(pms.ROOM_SET_ACCESS("101", "ROOM_OPEN"))
+                assert dev.execute(pms.ROOM_QUERY_ACCESS("101")).access_mode == (
+                    "ROOM_OPEN"
+                )
+                (res,) = fleet.execute(pms.ROOM_SET_ACCESS("101", "ROOM_BLOCK"))
+                assert res.ok
+                assert dev.execute(pms.ROOM_QUERY_ACCESS("101")).access_mode == (
+                    "ROOM_BLOCK"
+                )
+
+    def test_typed_results(self):
+        with FakeNSE(rooms=["101"]) as nse:
+            dev = Device("127.0.0.1", port=nse.port)
+            with Fleet([dev]) as fleet:
+                dev.execute(pms.ROOM_SET_ACCESS("101", "ROOM_BLOCK"))
+                (res,) = fleet.execute(pms.ROOM_QUERY_ACCESS("101"))
+        assert type(res.result).__name__ == "RoomQueryAccessResult"
+        assert res.result.access_mode == "ROOM_BLOCK"
@@ -0,0 +1,139 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.commands import subscriber
+from nseapi.device import AsyncDevice, Device
+from nseapi.fleet import Fleet
+from nseapi.health import _target, check, check_all
+from nseapi.testing import FakeNSE, free_port
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+@pytest.fixture
+def listeners():
+    socks = []
+    for _ in range(300):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(4)
+        socks.append(sock)
+    yield [sock.getsockname()[1] for sock in socks]
+    for sock in socks:
+        sock.close()
+
+
+class TestCheck:
+    def test_many(self, listeners):
+        closed = free_port()
+        targets = ["127.0.0.1:%d" % port for port in listeners]
+        targets.append(("127.0.0.1", closed))
+        start = time.monotonic()
+        statuses = check_all(targets, timeout=2, concurrency=100)
+        assert time.monotonic() - start < 2
+        assert [s.port for s in statuses] == listeners + [closed]
+        assert all(s.ok and s.rtt is not None for s in statuses[:-1])
+        down = statuses[-1]
+        assert not down.ok and not down.pooled
+        assert isinstance(down.error, ConnectionRefusedError)
+        assert down.address == "127.0.0.1:%d" % closed
+
+    def test_retry_until_up(self):
+        port = free_port()
+        sock = socket.socket()
+
+        def listen():
+            sock.bind(("127.0.0.1", port))
+            sock.listen(1)
+
+        timer = threading.Timer(0.3, listen)
+        timer.start()
+        try:
+            start = time.monotonic()
+            assert check("127.0.0.1", port, timeout=5, retry=True).ok
+            assert time.monotonic() - start < 1.5
+        finally:
+            timer.join()
+            sock.close()
+
+    def test_targets(self):
+        assert _target("10.0.0.1:2222") == ("10.0.0.1", 2222, None)
+        assert _target("nse.example") == ("nse.example", 1111, None)
+        assert _target("[::1]:2222") == ("::1", 2222, None)
+        assert _target("[::1]") == ("::1", 1111, None)
+        assert _target("::1") == ("::1", 1111, None)
+        assert _target(("::1", "2222")) == ("::1", 2222, None)
+
+    def test_ipv6(self):
+        with socket.socket(socket.AF_INET6) as sock:
+            try:
+                sock.bind(("::1", 0))
+            except OSError:
+                pytest.skip("no IPv6 loopback")
+            sock.listen(1)
+            port = sock.getsockname()[1]
+            (status,) = check_all(["[::1]:%d" % port], timeout=1)
+        assert status.ok and status.host == "::1"
+
+    def test_inside_event_loop(self):
+        async def main():
+            with pytest.raises(RuntimeError, match="check_many"):
+                check_all(["127.0.0.1:%d" % free_port()], timeout=1)
+
+        asyncio.run(main())
+
+    def test_pooled(self):
+        with FakeNSE() as nse:
+            dev = Device("127.0.0.1", port=nse.port).open()
+            dev.execute(subscriber.ADD_USER(MAC))
+        # the NSE is gone, but answered a moment ago on a pooled connection
+        try:
+            (status,) = check_all([dev], timeout=1)
+            assert status.ok and status.pooled and status.rtt is None
+            (status,) = check_all([dev], timeout=1, fresh=None)
+            assert not status.ok
+        finally:
+            dev.close()
+
+
+class TestDeviceProbe:
+    def test_auto_probe(self):
+        with FakeNSE() as nse:
+            with Device("127.0.0.1", port=nse.port).open(auto_probe=2) as dev:
+                assert dev.probe(timeout=1)
+                assert dev.execute(subscriber.ADD_USER(MAC)).ok
+
+    def test_auto_probe_fails(self):
+        dev = Device("127.0.0.1", port=free_port())
+        start = time.monotonic()
+        with pytest.raises(nse_err.ProbeError) as exc:
+            dev.open(auto_probe=0.3)
+        assert time.monotonic() - start < 1
+        assert isinstance(exc.value.msg, ConnectionRefusedError)
+        assert not dev.connected
+
+    def test_async(self):
+        async def main(port):
+            dev = AsyncDevice("127.0.0.1", port=port)
+            async with await dev.open(auto_probe=2):
+                assert await dev.probe(timeout=1)
+            with pytest.raises(nse_err.ProbeError):
+                await AsyncDevice("127.0.0.1", port=free_port()).open(auto_probe=0.3)
+
+        with FakeNSE() as nse:
+            asyncio.run(main(nse.port))
+
+    def test_fleet(self):
+        with FakeNSE() as nse:
+            up = Device("127.0.0.1", port=nse.port)
+            down = Device("127.0.0.1", port=free_port())
+            statuses = Fleet([up, down]).probe(timeout=1)
+            assert statuses[up].ok and not statuses[down].ok
+            statuses = asyncio.run(Fleet([up, down]).probe_async(timeout=1))
+        assert statuses[up].ok and not statuses[down].ok
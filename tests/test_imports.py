@@ -0,0 +1,57 @@
+# -*- coding: UTF-8 -*-
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def imported(code):
+    """``{module: cumulative microseconds}`` of what ``code`` imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class TestStartup:
+    def test_commands_lazy(self):
+        modules = imported("import nseapi.commands")
+        assert "nseapi.commands" in modules
+        for name in ("radius", "subscriber", "pms", "network", "options"):
+            assert f"nseapi.commands.{name}" not in modules
+        assert "xmltodict" not in modules
+        assert "asyncio" not in modules
+
+    def test_submodule_on_access(self):
+        # importlib.import_module is not reported by -X importtime
+        code = (
+            "import sys; import nseapi.commands as c; c.pms.ROOM_QUERY_ACCESS; "
+            "print(' '.join(sys.modules))"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+        )
+        modules = proc.stdout.split()
+        assert "nseapi.commands.pms" in modules
+        assert "nseapi.commands.subscriber" not in modules
+
+    def test_no_xmltodict(self):
+        modules = imported("import nseapi.device, nseapi.fleet")
+        assert "xmltodict" not in modules
+
+    def test_star_import(self):
+        namespace = {}
+        exec("from nseapi.commands import *", namespace)
+        for name in ("radius", "subscriber", "pms", "network", "CACHE_UPDATE"):
+            assert name in namespace
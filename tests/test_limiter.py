@@ -0,0 +1,107 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.device import AsyncDevice, Device
+from nseapi.limiter import AdaptiveLimiter
+
+TEST = '<USG COMMAND="TEST"/>'
+
+
+@pytest.fixture
+def slow_server(nse_server):
+    """Stand-in NSE answering after 10 ms and recording its peak load."""
+    nse_server.inflight = nse_server.peak = 0
+    nse_server.lock = threading.Lock()
+
+    def respond(request):
+        with nse_server.lock:
+            nse_server.inflight += 1
+            nse_server.peak = max(nse_server.peak, nse_server.inflight)
+        time.sleep(0.01)
+        with nse_server.lock:
+            nse_server.inflight -= 1
+        return b'<USG RESULT="OK"/>'
+
+    nse_server.response = respond
+    return nse_server
+
+
+def fail(limiter, error):
+    with pytest.raises(type(error)):
+        with limiter.slot():
+            raise error
+
+
+class TestAdaptiveLimiter:
+    def test_grows_under_load(self, slow_server):
+        limiter = AdaptiveLimiter(initial=2, max_limit=6, tolerance=10)
+        port = slow_server.server_port
+        with Device("127.0.0.1", port=port, limiter=limiter) as dev:
+            assert dev._pool_size == 6
+            results = dev.execute_many([TEST] * 60)
+            assert all(r["@RESULT"] == "OK" for r in results)
+            assert dev.concurrency_limit > 2
+        assert slow_server.peak <= 6
+        assert limiter.stats()["successes"] == 60
+        assert limiter.inflight == 0
+
+    def test_error_cuts_once_per_window(self):
+        limiter = AdaptiveLimiter(initial=8, max_limit=8)
+        with limiter.slot():
+            time.sleep(0.05)
+        fail(limiter, ConnectionResetError())
+        fail(limiter, ConnectionResetError())
+        assert limiter.limit == 4
+        assert limiter.errors == 2 and limiter.drops == 1
+
+    def test_min_limit(self):
+        limiter = AdaptiveLimiter(initial=2, min_limit=2)
+        fail(limiter, ConnectionResetError())
+        assert limiter.limit == 2
+
+    def test_latency_increase(self):
+        limiter = AdaptiveLimiter(initial=8, max_limit=8)
+        for _ in range(5):
+            with limiter.slot():
+                pass
+        for _ in range(3):
+            with limiter.slot():
+                time.sleep(0.01)
+        assert limiter.limit < 8
+
+    def test_timeout(self, nse_server):
+        def slow(request):
+            time.sleep(0.3)
+            return b'<USG RESULT="OK"/>'
+
+        nse_server.response = slow
+        limiter = AdaptiveLimiter(initial=4)
+        port = nse_server.server_port
+        with Device("127.0.0.1", port=port, limiter=limiter, timeout=0.05) as dev:
+            with pytest.raises(nse_err.ConnectTimeoutError):
+                dev.execute(TEST)
+        assert limiter.timeouts == 1
+        assert limiter.limit == 2
+
+    def test_async(self, slow_server):
+        limiter = AdaptiveLimiter(initial=2, max_limit=2)
+
+        async def main():
+            port = slow_server.server_port
+            async with AsyncDevice("127.0.0.1", port=port, limiter=limiter) as dev:
+                tasks = [asyncio.ensure_future(dev.execute(TEST)) for _ in range(10)]
+                await asyncio.sleep(0)
+                # cancelled while waiting for a slot: does not leak it
+                tasks[-1].cancel()
+                return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(main())
+        assert isinstance(results[-1], asyncio.CancelledError)
+        assert all(r["@RESULT"] == "OK" for r in results[:-1])
+        assert slow_server.peak == 2
+        assert limiter.inflight == 0
@@ -0,0 +1,134 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.commands import CACHE_UPDATE, subscriber
+from nseapi.device import AsyncDevice, Device
+from nseapi.fleet import Fleet
+from nseapi.metrics import Histogram, Metrics, command_type
+from nseapi.retry import RetryPolicy
+from nseapi.testing import FakeNSE
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+@pytest.fixture
+def nse():
+    with FakeNSE() as nse:
+        yield nse
+
+
+class TestHistogram:
+    def test_buckets(self):
+        histogram = Histogram((1, 10, 100))
+        for value in (0.5, 1, 5, 50, 500):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1, 1]
+        assert histogram.count == 5
+        assert histogram.sum == 556.5
+        snapshot = histogram.snapshot()
+        assert snapshot["buckets"] == {1: 2, 10: 3, 100: 4, float("inf"): 5}
+
+    def test_quantile(self):
+        histogram = Histogram((1, 2, 3, 4))
+        assert histogram.quantile(0.5) is None
+        for value in (0.5, 1.5, 2.5, 3.5):
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == 2
+        assert histogram.quantile(0.99) == pytest.approx(3.96)
+
+    def test_command_type(self):
+        assert command_type(CACHE_UPDATE(MAC).to_bytes()) == "CACHE_UPDATE"
+        assert command_type(b"<USG/>") == "UNKNOWN"
+
+
+class TestDeviceMetrics:
+    def test_execute(self, nse):
+        metrics = Metrics()
+        with Device("127.0.0.1", port=nse.port, metrics=metrics) as dev:
+            dev.execute(subscriber.ADD_USER(MAC, user_name="guest"))
+            dev.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+            with pytest.raises(nse_err.USGError):
+                dev.execute(subscriber.DEVICE_DELETE(MAC))
+            dev.execute('<USG COMMAND="CACHE_UPDATE" MAC_ADDR="001A2B3C4D5E"/>')
+        gateway = metrics.snapshot()["127.0.0.1:%d" % nse.port]
+        add = gateway["SUBSCRIBER_ADD"]
+        for name in ("serialize_seconds", "wire_seconds", "parse_seconds"):
+            assert add[name]["count"] == 1
+            assert add[name]["sum"] > 0
+        assert add["request_bytes"]["sum"] == len(
+            subscriber.ADD_USER(MAC, user_name="guest").to_bytes()
+        )
+        assert gateway["SUBSCRIBER_QUERY_CURRENT"]["response_bytes"]["sum"] > 50
+        assert gateway["DEVICE_DELETE"]["usg_errors"] == {202: 1}
+        # raw XML: labelled by its COMMAND, nothing was serialized
+        assert gateway["CACHE_UPDATE"]["wire_seconds"]["count"] == 1
+        assert gateway["CACHE_UPDATE"]["serialize_seconds"]["count"] == 0
+
+    def test_fleet(self, nse):
+        metrics = Metrics()
+        dev = Device("127.0.0.1", port=nse.port, metrics=metrics)
+        with Fleet([dev]) as fleet:
+            (res,) = fleet.execute(subscriber.ADD_USER(MAC))
+            assert res.ok
+        series = metrics.snapshot()["127.0.0.1:%d" % nse.port]["SUBSCRIBER_ADD"]
+        assert series["serialize_seconds"]["count"] == 1
+        assert series["wire_seconds"]["count"] == 1
+
+    def test_pool_wait(self):
+        metrics = Metrics()
+        with FakeNSE(latency=0.1) as nse:
+            gateway = "127.0.0.1:%d" % nse.port
+            with Device(
+                "127.0.0.1", port=nse.port, pool_size=1, metrics=metrics
+            ) as dev:
+                macs = ["00:1A:2B:3C:4D:%02X" % n for n in range(4)]
+                dev.execute_many(map(subscriber.ADD_USER, macs), max_workers=4)
+        series = metrics.snapshot()[gateway]["SUBSCRIBER_ADD"]
+        # four 0.1 s round trips, one connection: they queue for it
+        assert series["wire_seconds"]["count"] == 4
+        assert series["wire_seconds"]["sum"] < 0.6
+        assert series["pool_wait_seconds"]["count"] == 4
+        assert series["pool_wait_seconds"]["sum"] > 0.4
+
+    def test_connect_errors(self, closed_port):
+        port = closed_port
+        metrics = Metrics()
+        retry = RetryPolicy(attempts=3, backoff=0)
+        with Device("127.0.0.1", port=port, metrics=metrics, retry=retry) as dev:
+            with pytest.raises(nse_err.ConnectRefusedError):
+                dev.execute(CACHE_UPDATE(MAC))
+        errors = metrics.snapshot()["127.0.0.1:%d" % port]["CACHE_UPDATE"]
+        assert errors["connect_errors"] == {"ConnectRefusedError": 3}
+
+    def test_async(self, nse):
+        metrics = Metrics()
+
+        async def main():
+            async with AsyncDevice("127.0.0.1", port=nse.port, metrics=metrics) as dev:
+                await dev.execute(subscriber.ADD_USER(MAC))
+
+        asyncio.run(main())
+        series = metrics.snapshot()["127.0.0.1:%d" % nse.port]["SUBSCRIBER_ADD"]
+        assert series["wire_seconds"]["count"] == 1
+
+    def test_prometheus(self, nse):
+        metrics = Metrics(latency_buckets=(0.5, 60.0), size_buckets=(1024,))
+        with Device("127.0.0.1", port=nse.port, metrics=metrics) as dev:
+            with pytest.raises(nse_err.USGError):
+                dev.execute(CACHE_UPDATE(MAC))
+        text = metrics.prometheus()
+        labels = 'gateway="127.0.0.1:%d",command="CACHE_UPDATE"' % nse.port
+        assert "# TYPE nseapi_wire_seconds histogram" in text
+        assert 'nseapi_wire_seconds_bucket{%s,le="60.0"} 1' % labels in text
+        assert 'nseapi_request_bytes_bucket{%s,le="+Inf"} 1' % labels in text
+        assert "nseapi_wire_seconds_count{%s} 1" % labels in text
+        assert 'nseapi_usg_errors_total{%s,error_num="202"} 1' % labels in text
+        assert text.endswith("\n")
+
+    def test_label_escaping(self):
+        metrics = Metrics()
+        metrics.count_error('a"b\\c', "X", nse_err.ConnectError(None))
+        assert 'gateway="a\\"b\\\\c"' in metrics.prometheus()
@@ -0,0 +1,144 @@
+# -*- coding: UTF-8 -*-
+import pytest
+
+from nseapi.cache import ResponseCache
+from nseapi.commands import pms, subscriber
+from nseapi.device import Device
+from nseapi.outbox import FAILED, PENDING, SENDING, SENT, Outbox
+from nseapi.testing import FakeNSE, free_port
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+def purchase(trans_id, room="1204"):
+    return pms.USER_PURCHASE(
+        room, "WIFI", "Wifi 24h", 10.0, 1.0, 11.0, "Doe", "R1", trans_id=trans_id
+    )
+
+
+@pytest.fixture
+def nse():
+    with FakeNSE(rooms=["1204"]) as nse:
+        yield nse
+
+
+@pytest.fixture
+def device(nse):
+    with Device("127.0.0.1", port=nse.port, timeout=5) as dev:
+        yield dev
+
+
+class TestOutbox:
+    def test_deliver(self, tmp_path, nse, device):
+        with Outbox(tmp_path / "outbox.db", [device], workers=3) as outbox:
+            for trans_id in range(20):
+                item = outbox.submit(device, purchase(trans_id))
+                assert item.status in (PENDING, SENDING, SENT)
+            payment = pms.USER_PAYMENT(
+                "guest", "secret", "1204", MAC, "R1", trans_id=100
+            )
+            outbox.submit(device, payment)
+            assert outbox.drain(timeout=5)
+            assert outbox.stats() == {PENDING: 0, SENDING: 0, SENT: 21, FAILED: 0}
+        commands = [command for command, _ in nse.transactions]
+        assert commands.count("USER_PURCHASE") == 20
+        assert commands.count("USER_PAYMENT") == 1
+
+    def test_dedupe(self, tmp_path, nse, device):
+        with Outbox(tmp_path / "outbox.db", [device]) as outbox:
+            first = outbox.submit(device, purchase(7))
+            assert outbox.drain(timeout=5)
+            again = outbox.submit(device, purchase(7))
+            assert (again.created, again.status) == (first.created, SENT)
+            # the same TRANS_ID on another gateway is another charge
+            assert outbox.submit("10.0.0.1:1111", purchase(7)).status == PENDING
+        assert len(nse.transactions) == 1
+
+    def test_rejected(self, tmp_path, nse, device):
+        with Outbox(tmp_path / "outbox.db", [device]) as outbox:
+            outbox.submit(device, purchase(1, room="9999"))
+            assert outbox.drain(timeout=5)
+            item = outbox.status(device, 1)
+        assert (item.status, item.attempts, item.error_num) == (FAILED, 1, 200)
+        assert item.done
+
+    def test_retry(self, tmp_path):
+        port = free_port()
+        dev = Device("127.0.0.1", port=port, timeout=5).open()
+        outbox = Outbox(tmp_path / "outbox.db", [dev], backoff=0.02, jitter=False)
+        with outbox:
+            outbox.submit(dev, purchase(1))
+            outbox.submit(dev, purchase(2))
+            assert not outbox.drain(timeout=0.3)
+            assert outbox.status(dev, 1).attempts > 1
+            assert "ConnectRefusedError" in outbox.status(dev, 1).error
+            with FakeNSE(port=port, rooms=["1204"]) as nse:
+                assert outbox.drain(timeout=5)
+                assert len(nse.transactions) == 2
+            assert outbox.status(dev, 1).status == SENT
+        dev.close()
+
+    def test_attempts(self, tmp_path):
+        dev = Device("127.0.0.1", port=free_port()).open()
+        outbox = Outbox(tmp_path / "outbox.db", [dev], attempts=3, backoff=0)
+        with outbox:
+            outbox.submit(dev, purchase(1))
+            assert outbox.drain(timeout=5)
+            item = outbox.status(dev, 1)
+        assert (item.status, item.attempts) == (FAILED, 3)
+        dev.close()
+
+    def test_opens_devices(self, tmp_path, nse):
+        dev = Device("127.0.0.1", port=nse.port)
+        with Outbox(tmp_path / "outbox.db", [dev], poll_interval=0.05) as outbox:
+            assert dev.connected
+            outbox.submit(dev, purchase(1))
+            assert outbox.drain(timeout=5)
+            # closed under the outbox: the charge waits, attempts are kept
+            dev.close()
+            outbox.submit(dev, purchase(2))
+            assert not outbox.drain(timeout=0.3)
+            item = outbox.status(dev, 2)
+            assert (item.status, item.attempts) == (PENDING, 0)
+            dev.open()
+            assert outbox.drain(timeout=5)
+        assert not dev.connected
+        assert len(nse.transactions) == 2
+
+    def test_durable(self, tmp_path, nse, device):
+        path = tmp_path / "outbox.db"
+        outbox = Outbox(path, [device])
+        outbox.submit(device, purchase(1))
+        outbox.submit(device, purchase(2))
+        with outbox._cond:
+            outbox._claim(device._gateway)  # the process stops while sending
+        outbox.close()
+
+        outbox = Outbox(path, [device])
+        assert outbox.status(device, 1).status == SENDING
+        with outbox.start():
+            assert outbox.drain(timeout=5)
+            assert [item.status for item in outbox.items()] == [SENT, SENT]
+        assert len(nse.transactions) == 2
+
+    def test_invalidates_cache(self, tmp_path, nse):
+        cache = ResponseCache()
+        with Device("127.0.0.1", port=nse.port, cache=cache) as dev:
+            first = pms.USER_PAYMENT("g2", "secret", "1204", MAC, "R1", trans_id=1)
+            dev.execute(first)
+            query = subscriber.SUBSCRIBER_QUERY_CURRENT(MAC)
+            assert dev.execute(query)["SUBSCRIBER"]["USER_NAME"] == "g2"
+            with Outbox(tmp_path / "outbox.db", [dev]) as outbox:
+                second = pms.USER_PAYMENT("g3", "secret", "1204", MAC, "R1", trans_id=2)
+                outbox.submit(dev, second)
+                assert outbox.drain(timeout=5)
+            query = subscriber.SUBSCRIBER_QUERY_CURRENT(MAC)
+            assert dev.execute(query)["SUBSCRIBER"]["USER_NAME"] == "g3"
+
+    def test_submit_checks(self, tmp_path, device):
+        with Outbox(tmp_path / "outbox.db") as outbox:
+            with pytest.raises(TypeError):
+                outbox.submit(device, subscriber.ADD_USER(MAC))
+            with pytest.raises(ValueError):
+                outbox.submit(device, purchase(None))
+            assert outbox.items() == []
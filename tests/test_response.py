@@ -0,0 +1,58 @@
+# -*- coding: UTF-8 -*-
+from xml.parsers.expat import ExpatError
+
+import pytest
+import xmltodict
+
+from nseapi import exceptions as nse_err
+from nseapi.device import Device
+from nseapi.response import decode
+
+DOCUMENTS = [
+    b'<USG RESULT="OK"/>',
+    b'<?xml version="1.0" encoding="UTF-8"?>\n<USG RESULT="OK" ID="12" />\n',
+    b'<USG RESULT="OK" NOTE="a &amp; b"/>',
+    b"<USG RESULT='OK'/>",
+    b'<USG RESULT="OK" NAME="caf\xc3\xa9"/>',
+    b'<?xml version="1.0" encoding="ISO-8859-1"?><USG RESULT="OK" NAME="caf\xe9"/>',
+    b"<?xml version='1.0' encoding='utf-8'?><USG RESULT=\"OK\" NAME=\"caf\xc3\xa9\"/>",
+    b'<USG RESULT="OK" NOTE="a\tb\nc\r\nd"/>',
+    b'<USG RESULT="OK"><ROOM_NUMBER>1204</ROOM_NUMBER>'
+    b"<ACCESS_MODE>ROOM_OPEN</ACCESS_MODE></USG>",
+    b'<USG RESULT="OK">\n  <SUBSCRIBER MAC_ADDR="001A2B3C4D5E">\n'
+    b'    <EXPIRY_TIME UNITS="HOURS">24</EXPIRY_TIME>\n'
+    b"    <PLAN>1</PLAN><PLAN>2</PLAN><EMPTY/>\n"
+    b'  </SUBSCRIBER>\n  <SUBSCRIBER MAC_ADDR="001A2B3C4D5F"/>\n</USG>',
+]
+
+
+class TestDecode:
+    @pytest.mark.parametrize("body", DOCUMENTS)
+    def test_matches_xmltodict(self, body):
+        assert decode(body) == xmltodict.parse(body)["USG"]
+
+    def test_error(self):
+        with pytest.raises(nse_err.USGError) as exc:
+            decode(b'<USG RESULT="ERROR" ERROR_NUM="204"/>')
+        assert exc.value.error_num == 204
+        with pytest.raises(nse_err.USGError) as exc:
+            decode(b'<USG RESULT="ERROR"><ERROR_NUM>201</ERROR_NUM></USG>')
+        assert exc.value.error_num == 201
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            decode(b'<HTML RESULT="OK"/>')
+        with pytest.raises(ExpatError):
+            decode(b'<USG RESULT="OK">')
+        with pytest.raises(ExpatError):
+            decode(b'<USG RESULT="OK" NAME="caf\xe9"/>')
+        # xmltodict reads the text, which is no NSE response
+        assert xmltodict.parse(b"<USG>text</USG>")["USG"] == "text"
+        with pytest.raises(ValueError):
+            decode(b"<USG>text</USG>")
+
+    def test_device_parse_error(self, nse_server):
+        nse_server.response = b"<HTML><BODY>Not found</BODY></HTML>"
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            with pytest.raises(nse_err.ParseError):
+                dev.execute('<USG COMMAND="TEST"/>')
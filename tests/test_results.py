@@ -0,0 +1,63 @@
+# -*- coding: UTF-8 -*-
+import datetime
+
+from nseapi.commands.pms import ROOM_QUERY_ACCESS
+from nseapi.commands.subscriber import SUBSCRIBER_QUERY_CURRENT, USER_DELETE
+from nseapi.device import Device
+from nseapi.response import decode
+from nseapi.results import Result, result_class
+from nseapi.types import MACAddress
+
+SUBSCRIBER = (
+    b'<USG RESULT="OK"><SUBSCRIBER MAC_ADDR="001A2B3C4D5E">'
+    b"<USER_NAME>guest</USER_NAME><ROOM_NUMBER>1204</ROOM_NUMBER>"
+    b'<EXPIRY_TIME UNITS="HOURS">24</EXPIRY_TIME>'
+    b"<BANDWIDTH_MAX_UP>2048</BANDWIDTH_MAX_UP></SUBSCRIBER></USG>"
+)
+
+
+class TestResult:
+    def test_fields(self):
+        cls = result_class(SUBSCRIBER_QUERY_CURRENT)
+        assert cls.__name__ == "SubscriberQueryCurrentResult"
+        result = cls(decode(SUBSCRIBER))
+        assert result.ok
+        assert result.mac_addr == MACAddress("00:1A:2B:3C:4D:5E")
+        assert result.user_name == "guest"
+        assert result.expiry_time == datetime.timedelta(hours=24)
+        assert result.bandwidth_max_up == 2048
+        assert result.bandwidth_down is None
+        assert result.typed()["room_number"] == "1204"
+
+    def test_lazy(self):
+        result = result_class(SUBSCRIBER_QUERY_CURRENT)(decode(SUBSCRIBER))
+        assert result["@RESULT"] == "OK"
+        assert result._typed is None
+        assert result.mac_addr is result.mac_addr
+        assert list(result._typed) == ["mac_addr"]
+
+    def test_mapping(self):
+        data = decode(b'<USG RESULT="OK" ID="1"/>')
+        result = Result(data)
+        assert result == data
+        assert dict(result) == data
+        assert result.get("@ID") == "1"
+        assert not hasattr(result, "__dict__")
+
+    def test_classes(self):
+        assert result_class(USER_DELETE) is Result
+        cls = result_class(ROOM_QUERY_ACCESS)
+        assert cls is result_class(ROOM_QUERY_ACCESS)
+        body = b'<USG RESULT="OK" ROOM_NUMBER="12"><ACCESS_MODE>ROOM_OPEN</ACCESS_MODE></USG>'
+        result = cls(decode(body))
+        assert (result.room_number, result.access_mode) == ("12", "ROOM_OPEN")
+
+
+class TestDeviceResult:
+    def test_execute(self, nse_server):
+        nse_server.response = SUBSCRIBER
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            result = dev.execute(SUBSCRIBER_QUERY_CURRENT("00:1A:2B:3C:4D:5E"))
+            assert type(result).__name__ == "SubscriberQueryCurrentResult"
+            assert result.expiry_time == datetime.timedelta(days=1)
+            assert type(dev.execute('<USG COMMAND="TEST"/>')) is Result
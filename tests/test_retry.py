@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+import time
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.breaker import CircuitBreaker
+from nseapi.commands import CACHE_UPDATE, subscriber
+from nseapi.device import Device
+from nseapi.retry import RetryPolicy
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+@pytest.fixture
+def flaky_server(nse_server):
+    """Stand-in NSE dropping the connection of its first request."""
+
+    def respond(request):
+        if len(nse_server.requests) == 1:
+            raise ConnectionAbortedError("dropped")
+        return b'<USG RESULT="OK"/>'
+
+    nse_server.handle_error = lambda *args: None
+    nse_server.response = respond
+    return nse_server
+
+
+class TestErrors:
+    def test_usg_error_not_wrapped(self, nse_server):
+        nse_server.response = b'<USG RESULT="ERROR" ERROR_NUM="204"/>'
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            with pytest.raises(nse_err.USGError) as exc:
+                dev.execute(CACHE_UPDATE(MAC))
+        assert exc.value.error_num == 204
+        assert exc.value.error_desc == "User name already used"
+
+    def test_refused(self, closed_port):
+        with Device("127.0.0.1", port=closed_port) as dev:
+            with pytest.raises(nse_err.ConnectRefusedError) as exc:
+                dev.execute(CACHE_UPDATE(MAC))
+        assert isinstance(exc.value.__cause__, ConnectionRefusedError)
+
+
+class TestRetryPolicy:
+    def test_delay(self):
+        retry = RetryPolicy(attempts=4, backoff=0.1, max_backoff=0.3, jitter=False)
+        error = nse_err.ConnectTimeoutError(None)
+        assert [retry.delay(i, error, True) for i in range(4)] == [0.1, 0.2, 0.3, None]
+        assert retry.delay(0, error) is None
+        assert retry.delay(0, nse_err.ParseError(None)) is None
+        assert retry.delay(0, nse_err.USGError("failed", {"@ERROR_NUM": "1"})) is None
+        assert retry.delay(0, nse_err.ConnectRefusedError(None)) == 0.1
+
+    def test_jitter(self):
+        retry = RetryPolicy(attempts=10, backoff=0.1)
+        error = nse_err.ConnectRefusedError(None)
+        assert all(0 <= retry.delay(2, error) <= 0.4 for _ in range(50))
+
+    def test_retries_refused(self, closed_port):
+        retry = RetryPolicy(attempts=3, backoff=0.01)
+        with Device("127.0.0.1", port=closed_port, retry=retry) as dev:
+            with pytest.raises(nse_err.ConnectRefusedError):
+                dev.execute(CACHE_UPDATE(MAC))
+        assert retry.retries == 2
+
+    def test_retries_query(self, flaky_server):
+        retry = RetryPolicy(backoff=0.01)
+        port = flaky_server.server_port
+        with Device("127.0.0.1", port=port, retry=retry) as dev:
+            rsp = dev.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+        assert rsp["@RESULT"] == "OK"
+        assert len(flaky_server.requests) == 2
+
+    def test_mutation_not_retried(self, flaky_server):
+        retry = RetryPolicy(backoff=0.01)
+        port = flaky_server.server_port
+        with Device("127.0.0.1", port=port, retry=retry) as dev:
+            with pytest.raises(nse_err.ConnectError):
+                dev.execute(CACHE_UPDATE(MAC))
+        assert len(flaky_server.requests) == 1
+
+
+class TestCircuitBreaker:
+    def test_fails_fast(self, closed_port):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        with Device("127.0.0.1", port=closed_port, breaker=breaker) as dev:
+            for _ in range(2):
+                with pytest.raises(nse_err.ConnectRefusedError):
+                    dev.execute(CACHE_UPDATE(MAC))
+            assert breaker.state == "open"
+            with pytest.raises(nse_err.CircuitOpenError):
+                dev.execute(CACHE_UPDATE(MAC))
+            time.sleep(0.1)
+            assert breaker.state == "half-open"
+            # the probe fails: open again
+            with pytest.raises(nse_err.ConnectRefusedError):
+                dev.execute(CACHE_UPDATE(MAC))
+            with pytest.raises(nse_err.CircuitOpenError):
+                dev.execute(CACHE_UPDATE(MAC))
+        assert breaker.stats()["opened"] == 2
+        assert breaker.stats()["rejected"] == 2
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.05)
+        breaker.before_call(None)
+        # a single probe at a time
+        with pytest.raises(nse_err.CircuitOpenError):
+            breaker.before_call(None)
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_call(None)
+
+    def test_usg_error_is_success(self, nse_server):
+        nse_server.response = b'<USG RESULT="ERROR" ERROR_NUM="201"/>'
+        breaker = CircuitBreaker(failure_threshold=1)
+        port = nse_server.server_port
+        with Device("127.0.0.1", port=port, breaker=breaker) as dev:
+            for _ in range(3):
+                with pytest.raises(nse_err.USGError):
+                    dev.execute(CACHE_UPDATE(MAC))
+        assert breaker.state == "closed"
@@ -0,0 +1,123 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import threading
+import time
+
+from nseapi import exceptions as nse_err
+from nseapi.commands import CACHE_UPDATE, subscriber
+from nseapi.device import AsyncDevice, Device
+from nseapi.singleflight import SingleFlight
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+def slow(request):
+    time.sleep(0.1)
+    return b'<USG RESULT="OK"/>'
+
+
+def run_threads(fn, count):
+    results = [None] * count
+
+    def target(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight:
+    def test_do(self):
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def fn():
+            started.set()
+            time.sleep(0.05)
+            return object()
+
+        leader = threading.Thread(target=flights.do, args=("k", fn))
+        leader.start()
+        started.wait()
+        results = run_threads(lambda: flights.do("k", fn), 4)
+        leader.join()
+        assert len({id(r) for r in results}) == 1
+        assert flights.stats() == {"calls": 1, "deduplicated": 4}
+        # nothing in flight any more: a new call runs again
+        assert flights.do("k", lambda: 1) == 1
+        assert flights.calls == 2
+
+    def test_error_shared(self):
+        flights = SingleFlight()
+
+        def fn():
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        results = run_threads(lambda: flights.do("k", fn), 4)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert not flights._calls
+
+
+class TestDeviceCoalescing:
+    def test_queries_coalesced(self, nse_server):
+        nse_server.response = slow
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            results = run_threads(
+                lambda: dev.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC)), 5
+            )
+            assert all(r["@RESULT"] == "OK" for r in results)
+            assert len(nse_server.requests) == 1
+            assert dev.flights.stats() == {"calls": 1, "deduplicated": 4}
+
+    def test_mutations_not_coalesced(self, nse_server):
+        nse_server.response = slow
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            run_threads(lambda: dev.execute(CACHE_UPDATE(MAC)), 3)
+        assert len(nse_server.requests) == 3
+
+    def test_disabled(self, nse_server):
+        nse_server.response = slow
+        with Device("127.0.0.1", port=nse_server.server_port, coalesce=False) as dev:
+            assert dev.flights is None
+            run_threads(
+                lambda: dev.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC)), 3
+            )
+        assert len(nse_server.requests) == 3
+
+    def test_error_shared(self, nse_server):
+        def error(request):
+            time.sleep(0.1)
+            return b'<USG RESULT="ERROR" ERROR_NUM="1"/>'
+
+        nse_server.response = error
+        with Device("127.0.0.1", port=nse_server.server_port) as dev:
+            results = run_threads(lambda: dev.execute(subscriber.USER_QUERY(MAC)), 3)
+        assert all(isinstance(r, nse_err.USGError) for r in results)
+        assert len(nse_server.requests) == 1
+
+    def test_async(self, nse_server):
+        nse_server.response = slow
+
+        async def main():
+            async with AsyncDevice("127.0.0.1", port=nse_server.server_port) as dev:
+                cmd = subscriber.SUBSCRIBER_QUERY_CURRENT(MAC)
+                tasks = [asyncio.ensure_future(dev.execute(cmd)) for _ in range(5)]
+                await asyncio.sleep(0.02)
+                # a cancelled caller does not cancel the shared query
+                tasks[0].cancel()
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                return results, dev.flights.stats()
+
+        results, stats = asyncio.run(main())
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert all(r["@RESULT"] == "OK" for r in results[1:])
+        assert len(nse_server.requests) == 1
+        assert stats == {"calls": 1, "deduplicated": 4}
@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import tracemalloc
+
+import pytest
+import xmltodict
+
+from nseapi import exceptions as nse_err
+from nseapi.device import AsyncDevice, Device
+from nseapi.stream import RecordParser
+
+TEST = '<USG COMMAND="TEST"/>'
+
+
+def dump(count):
+    rows = b"".join(
+        b'<SUBSCRIBER MAC_ADDR="00:1A:2B:%02X:%02X:%02X">'
+        b"<USER_NAME>user%d</USER_NAME><PLAN>1</PLAN><PLAN>2</PLAN>"
+        b"</SUBSCRIBER>" % (i >> 16 & 255, i >> 8 & 255, i & 255, i)
+        for i in range(count)
+    )
+    return b'<?xml version="1.0"?><USG RESULT="OK">' + rows + b"</USG>"
+
+
+@pytest.fixture
+def device(nse_server):
+    with Device("127.0.0.1", port=nse_server.server_port) as dev:
+        yield dev
+
+
+class TestRecordParser:
+    def test_records(self):
+        body = dump(3)
+        parser = RecordParser()
+        records = []
+        for i in range(0, len(body), 7):
+            records.extend(parser.feed(body[i : i + 7]))
+        records.extend(parser.close())
+        assert parser.attributes == {"RESULT": "OK"}
+        expected = xmltodict.parse(body)["USG"]["SUBSCRIBER"]
+        assert [r for _, r in records] == expected
+        assert records[0][0] == "SUBSCRIBER"
+
+    def test_depth(self):
+        parser = RecordParser(depth=2)
+        body = b'<USG RESULT="OK"><TABLE><ROW ID="1">a</ROW><ROW ID="2"/></TABLE></USG>'
+        records = parser.feed(body) + parser.close()
+        assert records == [("ROW", {"@ID": "1", "#text": "a"}), ("ROW", {"@ID": "2"})]
+
+    def test_error(self):
+        parser = RecordParser()
+        assert parser.feed(b'<USG RESULT="ERROR" ERROR_NUM="201"><X/>') == []
+        with pytest.raises(nse_err.USGError) as exc:
+            parser.feed(b"</USG>")
+            parser.close()
+        assert exc.value.error_num == 201
+
+
+class TestDeviceStream:
+    def test_stream(self, device, nse_server):
+        nse_server.response = dump(1000)
+        records = list(device.stream(TEST, chunk_size=1024))
+        assert len(records) == 1000
+        assert records[-1][1]["USER_NAME"] == "user999"
+        # read to the end: the connection is kept
+        assert device._conn.num_idle == 1
+        assert device.execute(TEST)["@RESULT"] == "OK"
+        assert nse_server.connections == 1
+
+    def test_close_early(self, device, nse_server):
+        nse_server.response = dump(1000)
+        records = device.stream(TEST, chunk_size=1024)
+        assert next(records)[0] == "SUBSCRIBER"
+        records.close()
+        assert device._conn.num_idle == 0
+        nse_server.response = b'<USG RESULT="OK"/>'
+        assert device.execute(TEST)["@RESULT"] == "OK"
+
+    def test_errors(self, device, nse_server):
+        nse_server.response = b'<USG RESULT="ERROR" ERROR_NUM="201"/>'
+        with pytest.raises(nse_err.USGError):
+            list(device.stream(TEST))
+        nse_server.response = b'<USG RESULT="OK"><X></USG>'
+        with pytest.raises(nse_err.ParseError):
+            list(device.stream(TEST))
+
+    def test_flat_memory(self, device, nse_server):
+        def peak(count):
+            nse_server.response = dump(count)
+            tracemalloc.start()
+            try:
+                assert sum(1 for _ in device.stream(TEST)) == count
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        # a 10x larger response does not take more memory to stream
+        assert peak(10000) < peak(1000) * 1.5
+
+    def test_async(self, nse_server):
+        nse_server.response = dump(100)
+
+        async def main():
+            port = nse_server.server_port
+            async with AsyncDevice("127.0.0.1", port=port) as dev:
+                records = [r async for r in dev.stream(TEST, chunk_size=512)]
+                return records, dev._conn.num_idle
+
+        records, idle = asyncio.run(main())
+        assert len(records) == 100
+        assert records[0][1]["PLAN"] == ["1", "2"]
+        assert idle == 1
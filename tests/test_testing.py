@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.commands import CACHE_UPDATE, pms, subscriber
+from nseapi.device import Device
+from nseapi.testing import FakeNSE
+from nseapi.types import MACAddress
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+
+@pytest.fixture
+def nse():
+    with FakeNSE(rooms=["1204", "1205"], seed=1) as nse:
+        yield nse
+
+
+@pytest.fixture
+def device(nse):
+    with Device("127.0.0.1", port=nse.port, timeout=5, coalesce=False) as dev:
+        yield dev
+
+
+def error_num(dev, cmd):
+    with pytest.raises(nse_err.USGError) as exc:
+        dev.execute(cmd)
+    return exc.value.error_num
+
+
+class TestSubscribers:
+    def test_lifecycle(self, device, nse):
+        add = subscriber.ADD_USER(
+            MAC,
+            user_name="guest",
+            room_number="1204",
+            expiry_time={"VALUE": 2, "UNITS": "HOURS"},
+            bandwidth_max_up=2048,
+        )
+        assert device.execute(add).ok
+        result = device.execute(subscriber.SUBSCRIBER_QUERY_CURRENT(MAC))
+        assert result.mac_addr == MACAddress(MAC)
+        assert result.user_name == "guest"
+        assert result.bandwidth_max_up == 2048
+        assert datetime.timedelta(hours=1) < result.expiry_time
+        assert result.expiry_time <= datetime.timedelta(hours=2)
+
+        assert error_num(device, subscriber.SUBSCRIBER_QUERY_AUTH(mac_addr=MAC)) == 206
+        device.execute(CACHE_UPDATE(MAC))
+        assert device.execute(subscriber.SUBSCRIBER_QUERY_AUTH(mac_addr=MAC)).ok
+        assert error_num(device, subscriber.USER_AUTHORIZE(MAC)) == 209
+
+        device.execute(subscriber.USER_DELETE("guest", id_type="USER_NAME"))
+        assert nse.subscribers == {}
+        assert error_num(device, subscriber.USER_DELETE(MAC)) == 202
+        assert error_num(device, subscriber.USER_QUERY("guest", "USER_NAME")) == 201
+
+    def test_user_name_taken(self, device):
+        device.execute(subscriber.ADD_USER(MAC, user_name="guest"))
+        other = subscriber.ADD_USER("00:1A:2B:3C:4D:5F", user_name="guest")
+        assert error_num(device, other) == 204
+
+    def test_table_full(self, device, nse):
+        nse.max_subscribers = 1
+        device.execute(subscriber.ADD_USER(MAC))
+        assert error_num(device, subscriber.ADD_USER("00:1A:2B:3C:4D:5F")) == 205
+
+
+class TestRooms:
+    def test_access(self, device):
+        assert error_num(device, pms.ROOM_QUERY_ACCESS("1204")) == 200
+        device.execute(pms.ROOM_SET_ACCESS("1204", "ROOM_BLOCK"))
+        result = device.execute(pms.ROOM_QUERY_ACCESS("1204"))
+        assert (result.room_number, result.access_mode) == ("1204", "ROOM_BLOCK")
+        assert error_num(device, pms.ROOM_SET_ACCESS("9999", "ROOM_OPEN")) == 200
+
+
+class TestRequests:
+    def test_errors(self, device, nse):
+        assert error_num(device, '<USG COMMAND="NOPE"/>') == 101
+        assert error_num(device, "<USG") == 100
+        assert error_num(device, '<USG COMMAND="CACHE_UPDATE"/>') == 102
+        assert nse.stats()["errors"] == 3
+
+    def test_error_rate(self):
+        with FakeNSE(error_rate=0.5, seed=7) as nse:
+            answers = [nse.handle(CACHE_UPDATE(MAC).to_bytes()) for _ in range(200)]
+        injected = sum(b'ERROR_NUM="207"' in answer for answer in answers)
+        assert 60 < injected < 140
+
+    def test_max_concurrency(self):
+        with FakeNSE(latency=0.05, max_concurrency=2) as nse:
+            start = time.monotonic()
+            with ThreadPoolExecutor(4) as pool:
+                list(pool.map(nse.handle, [b'<USG COMMAND="NOPE"/>'] * 4))
+            # 4 commands, 2 at a time: two rounds of latency
+            assert time.monotonic() - start >= 0.1
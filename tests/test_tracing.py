@@ -0,0 +1,113 @@
+# -*- coding: UTF-8 -*-
+import asyncio
+import contextvars
+
+import pytest
+
+from nseapi import exceptions as nse_err
+from nseapi.commands import CACHE_UPDATE, subscriber
+from nseapi.device import AsyncDevice, Device
+from nseapi.retry import RetryPolicy
+from nseapi.testing import FakeNSE
+from nseapi.tracing import Tracer
+
+MAC = "00:1A:2B:3C:4D:5E"
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class Recorder(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def before_send(self, span):
+        self.events.append(("before_send", span.command, span.attempt))
+
+    def after_send(self, span):
+        self.events.append(("after_send", span.command, span.response_bytes > 0))
+
+    def on_parse(self, span):
+        self.events.append(("on_parse", span.command, span.result.ok))
+
+    def on_error(self, span):
+        self.events.append(("on_error", span.command, span.error_num, span.retry_delay))
+
+
+class ContextTracer(Tracer):
+    def __init__(self):
+        self.seen = set()
+
+    def before_send(self, span):
+        self.seen.add(request_id.get())
+
+
+@pytest.fixture
+def nse():
+    with FakeNSE() as nse:
+        yield nse
+
+
+class TestTracer:
+    def test_hooks(self, nse):
+        tracer = Recorder()
+        with Device("127.0.0.1", port=nse.port, tracer=tracer) as dev:
+            assert dev.tracer is tracer
+            dev.execute(subscriber.ADD_USER(MAC))
+            with pytest.raises(nse_err.USGError):
+                dev.execute(subscriber.DEVICE_DELETE("00:1A:2B:3C:4D:5F"))
+        assert tracer.events == [
+            ("before_send", "SUBSCRIBER_ADD", 0),
+            ("after_send", "SUBSCRIBER_ADD", True),
+            ("on_parse", "SUBSCRIBER_ADD", True),
+            ("before_send", "DEVICE_DELETE", 0),
+            ("after_send", "DEVICE_DELETE", True),
+            ("on_error", "DEVICE_DELETE", 202, None),
+        ]
+
+    def test_retries(self, closed_port):
+        tracer = Recorder()
+        retry = RetryPolicy(attempts=2, backoff=0)
+        port = closed_port
+        with Device("127.0.0.1", port=port, tracer=tracer, retry=retry) as dev:
+            with pytest.raises(nse_err.ConnectRefusedError):
+                dev.execute(CACHE_UPDATE(MAC))
+        assert tracer.events == [
+            ("before_send", "CACHE_UPDATE", 0),
+            ("on_error", "CACHE_UPDATE", None, 0),
+            ("before_send", "CACHE_UPDATE", 1),
+            ("on_error", "CACHE_UPDATE", None, None),
+        ]
+
+    def test_failing_hook(self, nse, caplog):
+        class Broken(Tracer):
+            def after_send(self, span):
+                raise RuntimeError("boom")
+
+        with Device("127.0.0.1", port=nse.port, tracer=Broken()) as dev:
+            assert dev.execute(subscriber.ADD_USER(MAC)).ok
+        assert "Tracer hook after_send failed" in caplog.text
+
+    def test_threads_context(self, nse):
+        tracer = ContextTracer()
+        request_id.set("portal-login-1")
+        try:
+            with Device("127.0.0.1", port=nse.port, tracer=tracer) as dev:
+                macs = ["00:1A:2B:3C:4D:%02X" % n for n in range(8)]
+                dev.execute_many(map(subscriber.ADD_USER, macs), max_workers=4)
+        finally:
+            request_id.set(None)
+        assert tracer.seen == {"portal-login-1"}
+
+    def test_asyncio_context(self, nse):
+        tracer = ContextTracer()
+
+        async def login(dev, n):
+            request_id.set("portal-login-%d" % n)
+            await dev.execute(subscriber.ADD_USER("00:1A:2B:3C:4D:%02X" % n))
+
+        async def main():
+            async with AsyncDevice("127.0.0.1", port=nse.port, tracer=tracer) as dev:
+                await asyncio.gather(*(login(dev, n) for n in range(3)))
+
+        asyncio.run(main())
+        assert tracer.seen == {"portal-login-0", "portal-login-1", "portal-login-2"}
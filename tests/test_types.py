@@ -1,6 +1,9 @@
 # -*- coding: UTF-8 -*-
+import pickle
+
 import pytest
 
+from nseapi.commands.subscriber import ADD_DEVICE
 from nseapi.types import FixedList, Char, FixedChar, MACAddress
 
 
@@ -28,8 +31,22 @@ class TestFixedList:
     def test_list(self, in_list):
         assert list(in_list) == ["unit1", 2, 1.2]
 
+    def test_tuple_units(self):
+        units = FixedList("TimeUnit", ("DAYS", "HOURS"))
+        assert units("hours") == "HOURS"
+        assert FixedList("Countdown", (0, 1))("1") == 1
+
+    def test_full_match_only(self, in_list):
+        with pytest.raises(ValueError):
+            in_list("unit10")
+
 
 class TestChar:
+    def test_char_interned(self):
+        assert Char(5) is Char(5)
+        assert Char(5) is not Char(6)
+        assert Char(5).__name__ == "Char(5)"
+
     def test_char_creation_valid(self):
         char = Char(5)("test")
         assert char == "test"
@@ -42,6 +59,9 @@ class TestChar:
 
 
 class TestFixedChar:
+    def test_fixed_char_interned(self):
+        assert FixedChar(5) is FixedChar(5)
+
     def test_fixed_char_creation_valid(self):
         fixed_char = FixedChar(5)("valid")
         assert fixed_char == "valid"
@@ -70,3 +90,64 @@ class TestMACAddress:
     def test_invalid_mac_address(self):
         with pytest.raises(ValueError):
             MACAddress("invalid_mac")
+        with pytest.raises(ValueError):
+            MACAddress("001A2B3C4D5E\n")
+        with pytest.raises(ValueError):
+            MACAddress(1 << 48)
+        with pytest.raises(TypeError):
+            MACAddress(1.2)
+
+    def test_hashable(self, mac):
+        index = {mac: "room 101"}
+        assert index[MACAddress("001a2b3c4d5e")] == "room 101"
+        assert len({mac, MACAddress("00-1A-2B-3C-4D-5E")}) == 1
+
+    def test_int_backed(self, mac):
+        assert int(mac) == 0x001A2B3C4D5E
+        assert MACAddress(0x001A2B3C4D5E) == mac
+        assert MACAddress(mac) is mac
+        assert not hasattr(mac, "__dict__")
+
+    def test_interned(self):
+        assert MACAddress("00:1A:2B:3C:4D:5F") is MACAddress("00:1A:2B:3C:4D:5F")
+
+    def test_formatted(self, mac):
+        assert mac.formatted() == "00:1A:2B:3C:4D:5E"
+        assert mac.formatted("-") == "00-1A-2B-3C-4D-5E"
+        assert mac.formatted("") == "001A2B3C4D5E"
+        assert list(mac) == ["00", "1A", "2B", "3C", "4D", "5E"]
+        assert mac[1:3] == ["1A", "2B"]
+
+    def test_pickle(self, mac):
+        assert pickle.loads(pickle.dumps(mac)) == mac
+
+
+class TestMACAddressArray:
+    @pytest.fixture
+    def column(self):
+        return [
+            "00:1A:2B:3C:4D:5E",
+            "00-1a-2b-3c-4d-5f",
+            " 001A2B3C4D60 ",
+            "not a mac",
+            MACAddress("00:00:00:00:00:01"),
+            0x0000000000FF,
+            None,
+            "001A2B3C4D",
+        ]
+
+    def test_parse_many(self, column):
+        macs = MACAddress.parse_many(column)
+        assert len(macs) == 5
+        assert macs.invalid == [3, 6, 7]
+        assert list(macs.rows) == [0, 1, 2, 4, 5]
+        assert macs.values.typecode == "Q"
+        assert macs[1] == MACAddress("001A2B3C4D5F")
+        assert macs.formatted("")[2] == "001A2B3C4D60"
+        assert len(macs[1:3]) == 2
+
+    def test_feeds_commands(self, column):
+        macs = MACAddress.parse_many(column)
+        commands = [ADD_DEVICE(mac, f"device {row}") for row, mac in macs.items()]
+        assert 'MAC_ADDR="001A2B3C4D5E"' in commands[0].to_xml()
+        assert "<DEVICE_NAME>device 5</DEVICE_NAME>" in commands[-1].to_xml()